@@ -14,6 +14,7 @@ class MonthlyTargetInline(admin.TabularInline):
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     list_display = ('email', 'name', 'current_hourly_wage', 'is_staff', 'is_active', 'created_at', 'last_login')
+    list_select_related = ('current_salary_grade',)
     list_filter = ('is_staff', 'is_active', 'created_at')
     search_fields = ('email', 'name')
     ordering = ('-created_at',)
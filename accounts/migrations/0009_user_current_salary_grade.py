@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_current_salary_grade(apps, schema_editor):
+    """既存ユーザーの現在のグレードを最新の給与グレード履歴から設定"""
+    User = apps.get_model('accounts', 'User')
+    UserSalaryGrade = apps.get_model('salary', 'UserSalaryGrade')
+    latest_grade = UserSalaryGrade.objects.filter(
+        user=OuterRef('pk')
+    ).order_by('-effective_date', '-id').values('salary_grade_id')[:1]
+    User.objects.update(current_salary_grade_id=Subquery(latest_grade))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_remove_hourly_wage'),
+        ('salary', '0004_salarygrade_description'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='current_salary_grade',
+            field=models.ForeignKey(blank=True, editable=False, help_text='最新の給与グレード履歴（UserSalaryGrade）のグレード。履歴の作成・編集・削除時に自動更新されます。', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='current_members', to='salary.salarygrade', verbose_name='現在の給与グレード'),
+        ),
+        migrations.RunPython(fill_current_salary_grade, migrations.RunPython.noop),
+    ]
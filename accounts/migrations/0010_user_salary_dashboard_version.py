@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_user_current_salary_grade'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='salary_dashboard_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='習得スキル・スキル申告・給与グレード履歴の変更時に自動更新され、ダッシュボードのキャッシュキーに使用されます。', verbose_name='ダッシュボード給与・スキル欄バージョン'),
+        ),
+    ]
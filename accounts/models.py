@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
 
+from core.models import SignalMaintainedFieldsMixin
+
 
 class UserManager(BaseUserManager):
     def create_user(self, email, name, password=None):
@@ -27,7 +29,7 @@ class UserManager(BaseUserManager):
         return user
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(SignalMaintainedFieldsMixin, AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(
         verbose_name='メールアドレス',
         max_length=255,
@@ -76,9 +78,28 @@ class User(AbstractBaseUser, PermissionsMixin):
         blank=True,
         help_text='有給休暇の付与日リスト。["YYYY-MM-DD", ...] の形式。入社日に基づいて自動計算されます。',
     )
+    current_salary_grade = models.ForeignKey(
+        'salary.SalaryGrade',
+        verbose_name='現在の給与グレード',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='current_members',
+        help_text='最新の給与グレード履歴（UserSalaryGrade）のグレード。履歴の作成・編集・削除時に自動更新されます。',
+    )
+    salary_dashboard_version = models.PositiveIntegerField(
+        verbose_name='ダッシュボード給与・スキル欄バージョン',
+        default=0,
+        editable=False,
+        help_text='習得スキル・スキル申告・給与グレード履歴の変更時に自動更新され、ダッシュボードのキャッシュキーに使用されます。',
+    )
     
     objects = UserManager()
     
+    # 他のモデルのシグナルから直接更新されるフィールド（通常の save() では書き込まない）
+    SIGNAL_MAINTAINED_FIELDS = ('current_salary_grade', 'salary_dashboard_version')
+    
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['name']
     
@@ -104,6 +125,8 @@ class User(AbstractBaseUser, PermissionsMixin):
             - hire_dateが変更された場合、paid_leave_grant_scheduleを自動更新
             - 入社日から全ての付与日を計算（1回目〜20回目程度）
             - super().save()を呼び出してデータベースに保存
+            - 既存ユーザーの保存では、シグナルで自動更新されるフィールド（SIGNAL_MAINTAINED_FIELDS）を
+              読み込み時の値で上書きしない（SignalMaintainedFieldsMixin）
         """
         # 入社日が変更された場合、付与スケジュールを自動更新
         if self.hire_date:
@@ -214,11 +237,19 @@ class User(AbstractBaseUser, PermissionsMixin):
         
         return target_date_str in self.paid_leave_grant_schedule
     
-    @property
-    def current_salary_grade(self):
-        """現在の給与グレード（最新のUserSalaryGradeから取得）"""
-        latest_grade = self.salary_history.order_by('-effective_date').first()
-        return latest_grade.salary_grade if latest_grade else None
+    def refresh_current_salary_grade(self):
+        """
+        最新の給与グレード履歴から current_salary_grade を更新する
+        
+        Rules:
+            - 適用日が最も新しい履歴（同日の場合は後に登録したもの）を現在のグレードとする
+            - 他のフィールドを上書きしないよう、このフィールドのみを更新する
+        """
+        latest_grade_id = self.salary_history.order_by(
+            '-effective_date', '-id'
+        ).values_list('salary_grade_id', flat=True).first()
+        type(self).objects.filter(pk=self.pk).update(current_salary_grade_id=latest_grade_id)
+        self.current_salary_grade_id = latest_grade_id
     
     @property
     def current_hourly_wage(self):
@@ -9,4 +9,5 @@ urlpatterns = [
     path('cron/cleanup-pins/', views.cleanup_expired_pins, name='cron_cleanup_pins'),
     path('cron/health-check/', views.cron_health_check, name='cron_health_check'),
     path('cron/recalculate-leaderboards/', views.recalculate_leaderboards, name='cron_recalculate_leaderboards'),
+    path('cron/close-leaderboard-month/', views.close_leaderboard_month, name='cron_close_leaderboard_month'),
 ]
\ No newline at end of file
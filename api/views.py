@@ -14,10 +14,10 @@ from django.contrib.auth.decorators import login_required
 from zoneinfo import ZoneInfo
 import hashlib
 import hmac
+import json
 
 from timeclock.services.paid_leave_auto_processor import PaidLeaveAutoProcessor
 from bulletin_board.models import Message
-from leaderboard.models import LeaderboardEntry
 from leaderboard.services.leaderboard_service import LeaderboardService
 
 logger = logging.getLogger(__name__)
@@ -282,6 +282,8 @@ def recalculate_leaderboards(request):
     ランキングデータ完全再計算API
     
     Google Apps Scriptから日次で呼び出される
+    リクエストボディの "workers" で並列ワーカー数を指定できる
+    （未指定の場合は settings.LEADERBOARD_RECALC_WORKERS、1未満は1として扱う）
     """
     if not verify_cron_request(request):
         return JsonResponse({
@@ -295,77 +297,58 @@ def recalculate_leaderboards(request):
         target_year = now.year
         target_month = now.month
         
-        logger.info(f'API経由でランキングデータ完全再計算を開始: {target_year}年{target_month}月')
+        try:
+            payload = json.loads(request.body or b'{}')
+        except json.JSONDecodeError:
+            payload = {}
+        if not isinstance(payload, dict):
+            payload = {}
+        try:
+            workers = int(payload.get('workers') or getattr(settings, 'LEADERBOARD_RECALC_WORKERS', 1))
+        except (TypeError, ValueError):
+            return JsonResponse({
+                'success': False,
+                'error': 'workers は整数で指定してください'
+            }, status=400)
+        workers = max(1, workers)
+        
+        logger.info(
+            f'API経由でランキングデータ完全再計算を開始: {target_year}年{target_month}月 '
+            f'(ワーカー数: {workers})'
+        )
         
-        # 対象年月のエントリを取得
-        entries = LeaderboardEntry.objects.filter(
-            year=target_year,
-            month=target_month
-        ).select_related('user')
+        service = LeaderboardService()
+        recalculation = service.recalculate_month_from_scratch(
+            target_year, target_month, workers=workers
+        )
         
-        if not entries:
-            result = {
-                'success': True,
-                'message': f'{target_year}年{target_month}月の参加者はいません',
-                'target_year': target_year,
-                'target_month': target_month,
-                'processed_count': 0,
-                'success_count': 0,
-                'error_count': 0
-            }
-            logger.info(f'ランキング再計算完了: 対象なし ({target_year}年{target_month}月)')
-            return JsonResponse(result)
-        
-        success_count = 0
-        error_count = 0
-        
-        # 各エントリを完全再計算
-        for entry in entries:
-            try:
-                service = LeaderboardService(entry.user)
-                result_entry, response = service.recalculate_user_stats_from_scratch(
-                    year=target_year,
-                    month=target_month
-                )
-                
-                if response and response.get('success'):
-                    success_count += 1
-                    logger.debug(f'ユーザー {entry.user.name} の再計算成功')
-                else:
-                    error_count += 1
-                    error_msg = response.get('error', '不明なエラー') if response else '不明なエラー'
-                    logger.error(f'ユーザー {entry.user.name} の再計算失敗: {error_msg}')
-                    
-            except Exception as e:
-                error_count += 1
-                logger.error(f'ユーザー {entry.user.name} の再計算エラー: {e}', exc_info=True)
-        
-        # ランキングを更新
-        ranking_updated = False
-        if success_count > 0:
-            service = LeaderboardService()
-            ranking_result = service.update_leaderboard(target_year, target_month)
-            
-            if ranking_result.get('success'):
-                ranking_updated = True
-                logger.info(f'ランキング更新完了: {target_year}年{target_month}月')
-            else:
-                logger.error(f'ランキング更新エラー: {ranking_result}')
+        success_count = recalculation['success_count']
+        error_count = recalculation['error_count']
+        
+        for error in recalculation['errors']:
+            logger.error(f'ユーザー {error["user"]} の再計算エラー: {error["error"]}')
         
         # 結果を返却
         result = {
             'success': True,
-            'message': f'{target_year}年{target_month}月のランキングデータ完全再計算完了',
+            'message': recalculation['message'],
             'target_year': target_year,
             'target_month': target_month,
-            'processed_count': len(entries),
+            'processed_count': recalculation['processed_count'],
             'success_count': success_count,
             'error_count': error_count,
-            'ranking_updated': ranking_updated
+            'ranking_updated': recalculation['ranking_updated'],
+            'workers': workers,
+            'chunks': recalculation['chunks'],
+            'elapsed': round(recalculation['elapsed'], 3),
+            'throughput': round(recalculation['throughput'], 2),
         }
         
         if error_count == 0:
-            logger.info(f'ランキングデータ完全再計算完了: {target_year}年{target_month}月, 成功{success_count}件')
+            logger.info(
+                f'ランキングデータ完全再計算完了: {target_year}年{target_month}月, 成功{success_count}件 '
+                f'({recalculation["elapsed"]:.2f}秒, {recalculation["throughput"]:.1f}件/秒)'
+            )
         else:
             logger.warning(
                 f'ランキングデータ完全再計算完了（エラーあり）: {target_year}年{target_month}月, '
@@ -380,4 +363,51 @@ def recalculate_leaderboards(request):
         return JsonResponse({
             'success': False,
             'error': error_msg
-        }, status=500)
\ No newline at end of file
+        }, status=500)
+
+
+@csrf_exempt
+@require_POST
+def close_leaderboard_month(request):
+    """
+    月次ランキング締めAPI
+    
+    Google Apps Scriptから毎月1日に呼び出され、前月のランキングをスナップショットとして凍結する
+    """
+    if not verify_cron_request(request):
+        return JsonResponse({
+            'success': False,
+            'error': 'Unauthorized'
+        }, status=401)
+    
+    try:
+        jst = ZoneInfo(settings.TIME_ZONE)
+        now = timezone.now().astimezone(jst)
+        if now.month == 1:
+            target_year, target_month = now.year - 1, 12
+        else:
+            target_year, target_month = now.year, now.month - 1
+        
+        logger.info(f'API経由でランキング締め処理を開始: {target_year}年{target_month}月')
+        
+        service = LeaderboardService()
+        result = service.close_month(target_year, target_month)
+        result.update({
+            'target_year': target_year,
+            'target_month': target_month,
+        })
+        
+        if result['success']:
+            logger.info(result['message'])
+        else:
+            logger.warning(result['error'])
+        
+        return JsonResponse(result)
+        
+    except Exception as e:
+        error_msg = f'ランキング締め処理でエラーが発生: {e}'
+        logger.error(error_msg, exc_info=True)
+        return JsonResponse({
+            'success': False,
+            'error': error_msg
+        }, status=500)
@@ -11,6 +11,9 @@ python manage.py collectstatic --no-input
 # Apply any outstanding database migrations
 python manage.py migrate
 
+# Create the database cache table (no-op if it already exists)
+python manage.py createcachetable
+
 # Create superuser if needed
 python manage.py superuser
 
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BulletinBoardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bulletin_board'
+    
+    def ready(self):
+        # リアクションの作成・削除をメッセージのリアクション数に反映
+        import bulletin_board.signals
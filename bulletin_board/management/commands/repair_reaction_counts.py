@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from bulletin_board.models import Message, Reaction
+
+
+class Command(BaseCommand):
+    help = 'メッセージのリアクション数をリアクションの件数から再集計して補正'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='実際の補正は行わず、ずれているメッセージを表示するのみ',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='一度に更新するメッセージ数（デフォルト: 500）',
+        )
+    
+    def handle(self, *args, **options):
+        fields = Message.REACTION_COUNT_FIELDS
+        
+        # リアクションの実際の件数（メッセージ・種類ごとに1回のクエリで集計）
+        actual = {}
+        for row in Reaction.objects.values('message_id', 'reaction_type').annotate(count=Count('id')).order_by():
+            field = Message.reaction_count_field(row['reaction_type'])
+            if field in fields:
+                actual.setdefault(row['message_id'], {})[field] = row['count']
+        
+        # 保持しているリアクション数と比較し、ずれているメッセージのみ補正する
+        drifted = []
+        for message in Message.objects.only('id', *fields).iterator(chunk_size=options['batch_size']):
+            counts = actual.get(message.id, {})
+            changes = {
+                field: (getattr(message, field), counts.get(field, 0))
+                for field in fields
+                if getattr(message, field) != counts.get(field, 0)
+            }
+            if not changes:
+                continue
+            
+            if options['dry_run']:
+                self.stdout.write(
+                    f'ID: {message.id} | ' + ', '.join(
+                        f'{field}: {before} → {after}' for field, (before, after) in changes.items()
+                    )
+                )
+            for field, (_, after) in changes.items():
+                setattr(message, field, after)
+            drifted.append(message)
+        
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('リアクション数のずれはありません。'))
+            return
+        
+        if options['dry_run']:
+            self.stdout.write(
+                self.style.WARNING(f'[DRY RUN] {len(drifted)}件のメッセージのリアクション数が補正対象です。')
+            )
+            return
+        
+        Message.objects.bulk_update(drifted, fields, batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'成功: {len(drifted)}件のメッセージのリアクション数を補正しました。')
+        )
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:29
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_reactions(apps, schema_editor):
+    """既存のリアクションからリアクション数を集計"""
+    Message = apps.get_model('bulletin_board', 'Message')
+    Reaction = apps.get_model('bulletin_board', 'Reaction')
+
+    counts = {}
+    for row in Reaction.objects.values('message_id', 'reaction_type').annotate(count=Count('id')).order_by():
+        counts.setdefault(row['message_id'], {})[f"{row['reaction_type']}_count"] = row['count']
+    for message_id, fields in counts.items():
+        Message.objects.filter(pk=message_id).update(**fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulletin_board', '0002_message_show_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='heart_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='❤️の数'),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='laughing_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='😂の数'),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='surprised_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='😮の数'),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='thumbs_up_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='👍の数'),
+        ),
+        migrations.RunPython(count_reactions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulletin_board', '0003_message_reaction_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['is_pinned', '-created_at', '-id'], name='bulletin_bo_is_pinn_7afa7f_idx'),
+        ),
+    ]
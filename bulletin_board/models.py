@@ -1,14 +1,15 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.db.models import Count
 from datetime import timedelta
 from zoneinfo import ZoneInfo
 from django.conf import settings
 
+from core.models import SignalMaintainedFieldsMixin
+
 User = get_user_model()
 
-class Message(models.Model):
+class Message(SignalMaintainedFieldsMixin, models.Model):
     """伝言板メッセージ"""
     
     user = models.ForeignKey(
@@ -55,6 +56,11 @@ class Message(models.Model):
         blank=True,
         help_text='ピン留めが自動解除される日時'
     )
+    # リアクション種類ごとの件数（Reaction の作成・削除時にシグナルで増減する）
+    thumbs_up_count = models.PositiveIntegerField(verbose_name='👍の数', default=0, editable=False)
+    heart_count = models.PositiveIntegerField(verbose_name='❤️の数', default=0, editable=False)
+    laughing_count = models.PositiveIntegerField(verbose_name='😂の数', default=0, editable=False)
+    surprised_count = models.PositiveIntegerField(verbose_name='😮の数', default=0, editable=False)
     created_at = models.DateTimeField(
         verbose_name='投稿日時',
         auto_now_add=True
@@ -64,6 +70,10 @@ class Message(models.Model):
         auto_now=True
     )
     
+    # リアクションのシグナルから直接更新されるフィールド（通常の save() では書き込まない）
+    REACTION_COUNT_FIELDS = ('thumbs_up_count', 'heart_count', 'laughing_count', 'surprised_count')
+    SIGNAL_MAINTAINED_FIELDS = REACTION_COUNT_FIELDS
+    
     class Meta:
         verbose_name = 'メッセージ'
         verbose_name_plural = 'メッセージ'
@@ -73,13 +83,25 @@ class Message(models.Model):
             '-pinned_at',  # ピン留め日時が新しい順
             '-created_at'  # 通常の投稿日時順
         ]
+        indexes = [
+            # フィードのキーセットページング（ピン留め以外を (created_at, id) の降順に読む）
+            models.Index(fields=['is_pinned', '-created_at', '-id']),
+        ]
         
     def __str__(self):
         return f"{self.user.name}: {self.content[:50]}..."
+    
+    @staticmethod
+    def reaction_count_field(reaction_type):
+        """リアクション種類の件数フィールド名"""
+        return f'{reaction_type}_count'
         
     def get_reaction_counts(self):
-        """各リアクションの数を取得"""
-        return self.reactions.values('reaction_type').annotate(count=Count('reaction_type'))
+        """各リアクションの数を取得（リアクション数フィールドから）"""
+        return {
+            reaction_type: getattr(self, self.reaction_count_field(reaction_type))
+            for reaction_type, _ in Reaction.REACTION_CHOICES
+        }
         
     def is_pin_expired(self):
         """ピン留めが期限切れかどうかを判定"""
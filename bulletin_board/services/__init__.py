@@ -0,0 +1,17 @@
+from .message_feed import (
+    FEED_PAGE_SIZE,
+    bump_pinned_version,
+    decode_cursor,
+    encode_cursor,
+    get_feed_page,
+    get_pinned_messages,
+)
+
+__all__ = [
+    'FEED_PAGE_SIZE',
+    'bump_pinned_version',
+    'decode_cursor',
+    'encode_cursor',
+    'get_feed_page',
+    'get_pinned_messages',
+]
@@ -0,0 +1,124 @@
+"""
+伝言板のメッセージフィード
+
+ピン留めされていないメッセージは (created_at, id) の降順にキーセット方式でページングする。
+ページ番号（COUNT + OFFSET）ではなく前ページ末尾のキーを不透明なカーソルとして受け取り、
+複合インデックス (is_pinned, -created_at, -id) を使って続きから読むため、深いページでも遅くならない。
+
+ピン留めされたメッセージはフィードとは別に、表示順のIDリストをキャッシュして返す。
+キャッシュはピン留め・解除・削除の際にバージョンを更新して無効化する。
+リアクション数とユーザーのリアクション有無は変化が多いため、キャッシュせず毎回取得する。
+"""
+
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+
+from core.cache_versions import bump_cache_version_on_commit, get_cache_version
+
+from ..models import Message, Reaction
+
+FEED_PAGE_SIZE = 20
+
+PINNED_VERSION_KEY = 'bulletin_board:pinned:version'
+PINNED_KEY = 'bulletin_board:pinned:{version}'
+
+# ピン留めIDリストの保持期間（秒）。変更時はバージョンで無効化される
+PINNED_TIMEOUT = 60 * 60
+
+
+def annotate_reactions(queryset, user):
+    """
+    メッセージのQuerySetにユーザーのリアクション有無を注釈する
+
+    注釈名は {reaction_type}_reacted（リアクション数は Message のリアクション数フィールドを使う）
+    """
+    annotations = {}
+    for reaction_type, _ in Reaction.REACTION_CHOICES:
+        annotations[f'{reaction_type}_reacted'] = Exists(
+            Reaction.objects.filter(message=OuterRef('pk'), user=user, reaction_type=reaction_type)
+        )
+    return queryset.annotate(**annotations)
+
+
+def encode_cursor(message) -> str:
+    """メッセージの位置 (created_at, id) を不透明なカーソル文字列にする"""
+    raw = f'{message.created_at.isoformat()}|{message.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    カーソル文字列を (created_at, id) に戻す
+
+    Raises:
+        ValueError: カーソルの形式が正しくない場合
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, message_id = raw.split('|')
+        created_at = datetime.fromisoformat(created_at)
+        message_id = int(message_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError('カーソルの形式が正しくありません') from e
+    if created_at.tzinfo is None:
+        raise ValueError('カーソルの形式が正しくありません')
+    return created_at, message_id
+
+
+def get_feed_page(user, cursor: Optional[str] = None, limit: int = FEED_PAGE_SIZE) -> Tuple[List[Message], Optional[str]]:
+    """
+    ピン留めされていないメッセージを新しい順に1ページ分取得（1クエリ）
+
+    Args:
+        user: リアクション有無を判定するユーザー
+        cursor: 前ページの next_cursor（Noneの場合は先頭から）
+        limit: 1ページの件数
+
+    Returns:
+        (メッセージのリスト, 次ページのカーソル（最終ページの場合はNone）)
+
+    Raises:
+        ValueError: カーソルの形式が正しくない場合
+    """
+    messages = Message.objects.filter(is_pinned=False)
+    if cursor:
+        created_at, message_id = decode_cursor(cursor)
+        messages = messages.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=message_id)
+        )
+    messages = list(
+        annotate_reactions(messages.select_related('user'), user).order_by('-created_at', '-id')[:limit + 1]
+    )
+    if len(messages) > limit:
+        messages = messages[:limit]
+        return messages, encode_cursor(messages[-1])
+    return messages, None
+
+
+def bump_pinned_version() -> None:
+    """ピン留めメッセージのキャッシュを無効化する（ピン留め・解除・削除時）"""
+    bump_cache_version_on_commit(PINNED_VERSION_KEY)
+
+
+def get_pinned_messages(user) -> List[Message]:
+    """
+    ピン留めされたメッセージを表示順に取得
+
+    表示順のIDリストはキャッシュし、メッセージ本体（リアクション数・ユーザーのリアクション有無を含む）は
+    主キーで取得する
+    """
+    key = PINNED_KEY.format(version=get_cache_version(PINNED_VERSION_KEY))
+    pinned_ids = cache.get(key)
+    if pinned_ids is None:
+        # Message の既定の並び順（ピン留め期間・ピン留め日時・投稿日時）
+        pinned_ids = list(Message.objects.filter(is_pinned=True).values_list('id', flat=True))
+        cache.set(key, pinned_ids, PINNED_TIMEOUT)
+    if not pinned_ids:
+        return []
+
+    messages = annotate_reactions(Message.objects.select_related('user'), user).in_bulk(pinned_ids)
+    return [messages[message_id] for message_id in pinned_ids if message_id in messages]
@@ -0,0 +1,64 @@
+"""
+伝言板のシグナル
+
+- リアクションの作成・種類の変更・削除に応じてメッセージのリアクション数を増減する
+- ピン留めされたメッセージの変更・削除に応じてピン留めメッセージのキャッシュを無効化する
+"""
+
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import previous_value, stored_value, track_stored_values
+
+from .models import Message, Reaction
+from .services.message_feed import bump_pinned_version
+
+
+def adjust_reaction_count(message_id, reaction_type, delta):
+    """
+    メッセージのリアクション数を増減する（UPDATE ... SET x_count = x_count + n）
+
+    呼び出し元のトランザクション内でリアクションの変更と同時に反映される
+    """
+    field = Message.reaction_count_field(reaction_type)
+    if field not in Message.REACTION_COUNT_FIELDS or not delta:
+        return
+    Message.objects.filter(pk=message_id).update(**{field: Greatest(F(field) + delta, 0)})
+
+
+# 保存時にリアクション種類の変更・ピン留め状態の変化を判定できるよう、データベース上の値を保持する
+track_stored_values(Reaction, 'reaction_type')
+track_stored_values(Message, 'is_pinned')
+
+
+@receiver(post_save, sender=Reaction)
+def count_saved_reaction(sender, instance, created, **kwargs):
+    """リアクションの作成・種類の変更時にリアクション数を増減"""
+    previous_type = previous_value(instance, 'reaction_type')
+    if created:
+        adjust_reaction_count(instance.message_id, instance.reaction_type, 1)
+    elif previous_type != instance.reaction_type:
+        adjust_reaction_count(instance.message_id, previous_type, -1)
+        adjust_reaction_count(instance.message_id, instance.reaction_type, 1)
+
+
+@receiver(post_delete, sender=Reaction)
+def count_deleted_reaction(sender, instance, **kwargs):
+    """リアクションの削除時にリアクション数を減らす"""
+    adjust_reaction_count(instance.message_id, stored_value(instance, 'reaction_type'), -1)
+
+
+@receiver(post_save, sender=Message)
+def invalidate_pinned_on_save(sender, instance, **kwargs):
+    """ピン留め・解除・ピン留め中のメッセージの保存時にピン留めメッセージのキャッシュを無効化"""
+    if instance.is_pinned or previous_value(instance, 'is_pinned'):
+        bump_pinned_version()
+
+
+@receiver(post_delete, sender=Message)
+def invalidate_pinned_on_delete(sender, instance, **kwargs):
+    """ピン留め中のメッセージの削除時にピン留めメッセージのキャッシュを無効化"""
+    if stored_value(instance, 'is_pinned'):
+        bump_pinned_version()
@@ -1,3 +1,187 @@
+"""
+伝言板機能テスト
+"""
+
+from io import StringIO
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from bulletin_board.models import Message, Reaction
+from bulletin_board.services import get_pinned_messages
+
+User = get_user_model()
+
+
+class MessageListReactionTest(TestCase):
+    """メッセージ一覧のリアクション集計のテスト"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='user@example.com', name='User', password='pass')
+        self.other = User.objects.create_user(email='other@example.com', name='Other', password='pass')
+        self.url = reverse('bulletin_board:message_list')
+        self.client.force_login(self.user)
+
+    def _create_messages(self, count):
+        messages = [Message.objects.create(user=self.other, content=f'message {index}') for index in range(count)]
+        for message in messages:
+            Reaction.objects.create(user=self.user, message=message, reaction_type='heart')
+            Reaction.objects.create(user=self.other, message=message, reaction_type='heart')
+            Reaction.objects.create(user=self.other, message=message, reaction_type='thumbs_up')
+        return messages
+
+    def _get(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries.captured_queries)
+
+    def test_reaction_summary_and_user_reactions(self):
+        message = self._create_messages(1)[0]
+        Message.objects.create(user=self.other, content='no reactions')
+
+        response, _ = self._get()
+
+        messages = {m.pk: m for m in response.context['feed_messages']}
+        self.assertEqual(
+            messages[message.pk].reaction_summary,
+            {'thumbs_up': 1, 'heart': 2, 'laughing': 0, 'surprised': 0},
+        )
+        self.assertEqual(messages[message.pk].user_reactions, ['heart'])
+        others = [m for pk, m in messages.items() if pk != message.pk]
+        self.assertEqual(others[0].user_reactions, [])
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        self._create_messages(2)
+        # 初回はピン留めメッセージのキャッシュ作成を含む
+        self._get()
+        _, baseline = self._get()
+
+        self._create_messages(20)
+        response, queries = self._get()
+
+        self.assertEqual(len(response.context['feed_messages']), 20)
+        self.assertEqual(queries, baseline)
+
+
+class ReactionCounterTest(TestCase):
+    """メッセージのリアクション数フィールドのテスト"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='user@example.com', name='User', password='pass')
+        self.other = User.objects.create_user(email='other@example.com', name='Other', password='pass')
+        self.message = Message.objects.create(user=self.user, content='hello')
+        self.url = reverse('bulletin_board:toggle_reaction')
+        self.client.force_login(self.user)
+
+    def _toggle(self, reaction_type='heart'):
+        return self.client.post(self.url, {'message_id': self.message.pk, 'reaction_type': reaction_type}).json()
+
+    def test_toggle_returns_counter_without_counting(self):
+        Reaction.objects.create(user=self.other, message=self.message, reaction_type='heart')
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self._toggle()
+        self.assertEqual((data['action'], data['reaction_count']), ('added', 2))
+        self.assertFalse(any('COUNT(' in query['sql'].upper() for query in queries.captured_queries))
+
+        data = self._toggle()
+        self.assertEqual((data['action'], data['reaction_count']), ('removed', 1))
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.get_reaction_counts()['heart'], 1)
+
+        self.assertFalse(self._toggle('unknown')['success'])
+
+    def test_counters_follow_deletes_and_survive_stale_saves(self):
+        stale = Message.objects.get(pk=self.message.pk)
+        self._toggle('thumbs_up')
+        Reaction.objects.create(user=self.other, message=self.message, reaction_type='thumbs_up')
+
+        # 読み込み済みのインスタンスの保存でリアクション数を上書きしない
+        stale.pin_message(12)
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.thumbs_up_count, 2)
+
+        # ユーザー削除に伴うリアクションの削除も反映する
+        self.other.delete()
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.thumbs_up_count, 1)
+
+        Reaction.objects.create(user=self.user, message=self.message, reaction_type='laughing')
+        reaction = Reaction.objects.get(message=self.message, reaction_type='laughing')
+        reaction.reaction_type = 'surprised'
+        reaction.save()
+        self.message.refresh_from_db()
+        self.assertEqual((self.message.laughing_count, self.message.surprised_count), (0, 1))
+
+    def test_repair_command_recomputes_counters(self):
+        Reaction.objects.create(user=self.user, message=self.message, reaction_type='heart')
+        Message.objects.filter(pk=self.message.pk).update(heart_count=5, laughing_count=3)
+
+        output = StringIO()
+        call_command('repair_reaction_counts', '--dry-run', stdout=output)
+        self.assertIn('heart_count: 5 → 1', output.getvalue())
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.heart_count, 5)
+
+        call_command('repair_reaction_counts', stdout=StringIO())
+        self.message.refresh_from_db()
+        self.assertEqual((self.message.heart_count, self.message.laughing_count), (1, 0))
+
+
+class MessageFeedTest(TestCase):
+    """メッセージフィード（キーセットページング・ピン留めメッセージ）のテスト"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='user@example.com', name='User', password='pass')
+        self.url = reverse('bulletin_board:message_feed')
+        self.client.force_login(self.user)
+
+    def _create_messages(self, count):
+        return [Message.objects.create(user=self.user, content=f'message {index}') for index in range(count)]
+
+    def test_pages_through_feed_with_cursor(self):
+        created = self._create_messages(45)
+        pinned = created[10]
+        pinned.pin_message(24)
+
+        response = self.client.get(reverse('bulletin_board:message_list'))
+        self.assertEqual([m.pk for m in response.context['pinned_messages']], [pinned.pk])
+        seen = [m.pk for m in response.context['feed_messages']]
+        cursor = response.context['next_cursor']
+
+        while cursor:
+            with CaptureQueriesContext(connection) as queries:
+                data = self.client.get(self.url, {'cursor': cursor}).json()
+            self.assertTrue(data['success'])
+            self.assertFalse(any('OFFSET' in query['sql'].upper() for query in queries.captured_queries))
+            seen += [int(pk) for pk in re.findall(r'class="memo-card[^"]*" data-message-id="(\d+)"', data['html'])]
+            cursor = data['next_cursor']
+
+        expected = [m.pk for m in sorted(created, key=lambda m: (m.created_at, m.pk), reverse=True) if m.pk != pinned.pk]
+        self.assertEqual(seen, expected)
+
+        self.assertFalse(self.client.get(self.url, {'cursor': 'invalid'}).json()['success'])
+
+    def test_pinned_messages_cache_follows_pin_changes(self):
+        first, second = self._create_messages(2)
+        self.assertEqual(get_pinned_messages(self.user), [])
+
+        first.pin_message(12)
+        self.assertEqual(get_pinned_messages(self.user), [first])
+
+        # キャッシュ済みでもリアクション数は最新の値を返す
+        Reaction.objects.create(user=self.user, message=first, reaction_type='heart')
+        self.assertEqual(get_pinned_messages(self.user)[0].heart_count, 1)
+
+        second.pin_message(168)
+        self.assertEqual(get_pinned_messages(self.user), [second, first])
 
-# Create your tests here.
+        second.delete()
+        first.unpin_message()
+        self.assertEqual(get_pinned_messages(self.user), [])
@@ -3,9 +3,11 @@ from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.http import JsonResponse
 from django.contrib import messages
-from django.core.paginator import Paginator
+from django.template.loader import render_to_string
 from django.conf import settings
+from django.db import transaction
 from .models import Message, Reaction
+from .services import get_feed_page, get_pinned_messages
 from zoneinfo import ZoneInfo
 
 @login_required
@@ -27,25 +29,53 @@ def message_list(request):
             messages.error(request, 'メッセージ内容を入力してください。')
         return redirect('bulletin_board:message_list')
     
-    # メッセージ一覧取得（ページング対応）
-    message_list = Message.objects.select_related('user').prefetch_related('reactions')
-    paginator = Paginator(message_list, 20)  # 20件ずつ表示
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # ピン留めメッセージ（キャッシュ）と、ピン留め以外のメッセージの最初のページ（キーセット方式）
+    # cursor 指定時はその続きのみ表示する（JavaScriptが無効な場合の「もっと見る」リンク用）
+    cursor = request.GET.get('cursor')
+    try:
+        feed_messages, next_cursor = get_feed_page(request.user, cursor)
+    except ValueError:
+        cursor = None
+        feed_messages, next_cursor = get_feed_page(request.user)
+    pinned_messages = [] if cursor else get_pinned_messages(request.user)
     
     # 各メッセージのリアクション情報を整理
-    for message in page_obj:
-        message.reaction_summary = get_reaction_summary(message)
-        if request.user.is_authenticated:
-            message.user_reactions = get_user_reactions(message, request.user)
+    attach_reactions(pinned_messages + feed_messages)
     
     context = {
-        'page_obj': page_obj,
+        'pinned_messages': pinned_messages,
+        'feed_messages': feed_messages,
+        'next_cursor': next_cursor,
         'reaction_choices': Reaction.REACTION_CHOICES,
     }
     
     return render(request, 'bulletin_board/message_list.html', context)
 
+@login_required
+def message_feed(request):
+    """ピン留め以外のメッセージの続きを取得（無限スクロール用API）"""
+    
+    try:
+        feed_messages, next_cursor = get_feed_page(request.user, request.GET.get('cursor'))
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        })
+    
+    attach_reactions(feed_messages)
+    html = render_to_string('bulletin_board/message_cards.html', {
+        'message_items': feed_messages,
+        'reaction_choices': Reaction.REACTION_CHOICES,
+    }, request=request)
+    
+    return JsonResponse({
+        'success': True,
+        'html': html,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    })
+
 def message_detail(request, message_id):
     """メッセージ詳細（現在は未実装）"""
     # 将来的に実装する可能性があるため、URLは定義しておく
@@ -60,23 +90,36 @@ def toggle_reaction(request):
         message_id = request.POST.get('message_id')
         reaction_type = request.POST.get('reaction_type')
         
-        message = Message.objects.get(id=message_id)
-        
-        # 既存リアクションを確認
-        reaction, created = Reaction.objects.get_or_create(
-            user=request.user,
-            message=message,
-            reaction_type=reaction_type
-        )
-        
-        if not created:
-            reaction.delete()
-            action = 'removed'
-        else:
-            action = 'added'
+        if reaction_type not in dict(Reaction.REACTION_CHOICES):
+            return JsonResponse({
+                'success': False,
+                'error': 'Invalid reaction type'
+            })
         
-        # 更新後のリアクション数を取得
-        reaction_count = message.reactions.filter(reaction_type=reaction_type).count()
+        count_field = Message.reaction_count_field(reaction_type)
+        with transaction.atomic():
+            # 同じメッセージへの切り替えを直列化する（リアクション数はシグナルで同じトランザクション内に増減）
+            message = Message.objects.select_for_update().only('id').get(id=message_id)
+            
+            # 既存リアクションがあれば削除、なければ作成
+            deleted, _ = Reaction.objects.filter(
+                user=request.user,
+                message=message,
+                reaction_type=reaction_type
+            ).delete()
+            
+            if deleted:
+                action = 'removed'
+            else:
+                Reaction.objects.create(
+                    user=request.user,
+                    message=message,
+                    reaction_type=reaction_type
+                )
+                action = 'added'
+            
+            # 更新後のリアクション数を取得（集計せずにリアクション数フィールドから）
+            reaction_count = Message.objects.values_list(count_field, flat=True).get(id=message.id)
         
         return JsonResponse({
             'success': True,
@@ -229,19 +272,19 @@ def delete_message(request):
         })
 
 # ヘルパー関数
+def attach_reactions(message_items):
+    """メッセージにリアクション数とユーザーのリアクション一覧を設定（annotate_reactions で注釈済みのメッセージ）"""
+    for message in message_items:
+        message.reaction_summary = get_reaction_summary(message)
+        message.user_reactions = get_user_reactions(message)
+
 def get_reaction_summary(message):
-    """メッセージのリアクション数を取得（全てのリアクションタイプを0で初期化）"""
-    # 全てのリアクションタイプを0で初期化
-    summary = {reaction_type: 0 for reaction_type, _ in Reaction.REACTION_CHOICES}
-    
-    # 実際のリアクション数を上書き
-    reaction_counts = message.get_reaction_counts()
-    for reaction in reaction_counts:
-        summary[reaction['reaction_type']] = reaction['count']
-    
-    return summary
+    """メッセージのリアクション数を取得（リアクション数フィールドから）"""
+    return message.get_reaction_counts()
 
-def get_user_reactions(message, user):
-    """ユーザーがしたリアクションの一覧を取得"""
-    user_reactions = message.reactions.filter(user=user)
-    return [reaction.reaction_type for reaction in user_reactions]
\ No newline at end of file
+def get_user_reactions(message):
+    """ユーザーがしたリアクションの一覧を取得（annotate_reactions で注釈済みのメッセージから）"""
+    return [
+        reaction_type for reaction_type, _ in Reaction.REACTION_CHOICES
+        if getattr(message, f'{reaction_type}_reacted')
+    ]
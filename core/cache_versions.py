@@ -0,0 +1,50 @@
+"""
+バージョン付きキーによるキャッシュの無効化
+
+キャッシュするデータごとにバージョン（キャッシュに保存した整数）を持ち、データのキーに含める。
+データが変わったときはバージョンを更新するだけで、古いキーのキャッシュは参照されなくなる（期限切れで消える）。
+バージョンは最終更新時刻（UNIXミリ秒）を兼ね、同じミリ秒内に更新しても必ず増える。
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get_cache_version(key: str) -> int:
+    """
+    バージョンを取得（未設定の場合は現在時刻で初期化）
+
+    Returns:
+        int: バージョン（最終更新時刻のUNIXミリ秒）
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cache_version(key: str) -> int:
+    """
+    バージョンを更新する（現在時刻、ただし現在のバージョン以下にはしない）
+
+    Returns:
+        int: 更新後のバージョン
+    """
+    current = cache.get(key) or 0
+    version = max(int(time.time() * 1000), current + 1)
+    cache.set(key, version, None)
+    return version
+
+
+def bump_cache_version_on_commit(key: str) -> None:
+    """
+    トランザクション内の変更に伴ってバージョンを更新する（即時とコミット後の2回）
+
+    即時の更新で同じトランザクション内の読み取りに古いキャッシュを返さないようにし、
+    コミット後の更新でコミット前の内容から作られたキャッシュを参照しないようにする
+    """
+    bump_cache_version(key)
+    transaction.on_commit(lambda: bump_cache_version(key))
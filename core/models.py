@@ -1,3 +1,93 @@
-from django.db import models
+"""
+プロジェクト全体で使用するモデルの汎用機能
 
-# Create your models here.
+- SignalMaintainedFieldsMixin: シグナルから直接更新されるフィールドを通常の save() で上書きしない
+- track_stored_values: 保存・削除時のシグナルで、データベース上の変更前の値を参照できるようにする
+"""
+
+from django.db import DatabaseError, router, transaction
+from django.db.models.signals import post_init, pre_save
+
+# {モデル: 変更前の値を保持するフィールド名}
+_TRACKED_FIELDS = {}
+
+
+class SignalMaintainedFieldsMixin:
+    """
+    他のモデルのシグナルから UPDATE で直接更新されるフィールドを持つモデル用の Mixin
+
+    既存行を update_fields を指定せずに保存した場合は、SIGNAL_MAINTAINED_FIELDS と
+    遅延読み込みで未読み込みのフィールドを除いた update_fields を指定して保存し、
+    読み込み後に更新された値を古いインスタンスの値で上書きしないようにする。
+    行が削除されていた場合は通常の save() と同じく INSERT し直す。
+    update_fields で明示した場合は対象のフィールドも書き込む
+    """
+
+    # シグナルから直接更新されるフィールド名（通常の save() では書き込まない）
+    SIGNAL_MAINTAINED_FIELDS = ()
+
+    def save(self, *args, **kwargs):
+        if (args or self._state.adding or kwargs.get('update_fields') is not None
+                or kwargs.get('force_insert') or kwargs.get('force_update')):
+            return super().save(*args, **kwargs)
+
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        deferred = self.get_deferred_fields()
+        update_fields = [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key
+            and field.name not in self.SIGNAL_MAINTAINED_FIELDS
+            and field.attname not in deferred
+        ]
+        try:
+            # 更新対象の行がない場合のエラーで呼び出し元のトランザクションを中断しないよう、セーブポイント内で保存する
+            with transaction.atomic(using=using):
+                return super().save(update_fields=update_fields, **kwargs)
+        except DatabaseError:
+            if type(self)._base_manager.using(using).filter(pk=self.pk).exists():
+                raise
+        # 行が削除されていた場合は作り直す
+        return super().save(**kwargs)
+
+
+def track_stored_values(model, *field_names):
+    """
+    モデルのフィールドについて、データベース上の値（読み込み時・直前の保存時の値）を保持する
+
+    post_save のレシーバーでは previous_value() で保存前の値を、
+    post_delete のレシーバーでは stored_value() で削除した行の値を参照できる。
+    シグナルの登録時（signals モジュールの読み込み時）に呼び出す
+    """
+    fields = _TRACKED_FIELDS.setdefault(model, set())
+    if not fields:
+        post_init.connect(_remember_loaded_values, sender=model, weak=False)
+        pre_save.connect(_remember_saved_values, sender=model, weak=False)
+    fields.update(field_names)
+
+
+def stored_value(instance, field_name):
+    """データベース上の値（読み込み時、または直前の保存時の値）"""
+    return instance._stored_values.get(field_name)
+
+
+def previous_value(instance, field_name):
+    """直前の保存の前にデータベース上にあった値（post_save のレシーバーから参照する）"""
+    return instance._previous_values.get(field_name)
+
+
+def _remember_loaded_values(sender, instance, **kwargs):
+    # 遅延読み込みのフィールドを問い合わせないよう __dict__ から取得する
+    instance._stored_values = {name: instance.__dict__.get(name) for name in _TRACKED_FIELDS[sender]}
+    instance._previous_values = instance._stored_values
+
+
+def _remember_saved_values(sender, instance, update_fields=None, **kwargs):
+    instance._previous_values = instance._stored_values
+    instance._stored_values = {
+        name: (
+            instance.__dict__.get(name)
+            if (name in instance.__dict__ if update_fields is None else name in update_fields)
+            else value
+        )
+        for name, value in instance._previous_values.items()
+    }
@@ -1,3 +1,33 @@
+"""
+汎用機能テスト
+"""
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from core.cache_versions import bump_cache_version, bump_cache_version_on_commit, get_cache_version
+
+
+class CacheVersionTest(TestCase):
+    """バージョン付きキーのバージョン管理のテスト"""
+
+    key = 'core:test:version'
+
+    def tearDown(self):
+        cache.delete(self.key)
+
+    def test_bump_always_increases_version(self):
+        version = get_cache_version(self.key)
+        self.assertEqual(get_cache_version(self.key), version)
+
+        # 同じミリ秒内の更新や、時刻より先のバージョンからでも必ず増える
+        cache.set(self.key, version + 10 ** 6, None)
+        self.assertEqual(bump_cache_version(self.key), version + 10 ** 6 + 1)
+
+    def test_bump_on_commit_bumps_again_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            bump_cache_version_on_commit(self.key)
+        bumped = get_cache_version(self.key)
+
+        callbacks[0]()
+        self.assertGreater(get_cache_version(self.key), bumped)
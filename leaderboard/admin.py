@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import LeaderboardEntry
+from .models import LeaderboardEntry, LeaderboardSnapshot
 
 
 @admin.register(LeaderboardEntry)
@@ -22,7 +22,7 @@ class LeaderboardEntryAdmin(admin.ModelAdmin):
     ordering = ('year', 'month', 'rank')
     
     readonly_fields = (
-        'joined_at', 'last_updated', 'total_hours_display'
+        'joined_at', 'last_updated', 'total_hours_display', 'daily_minutes_display'
     )
     
     fieldsets = (
@@ -33,9 +33,9 @@ class LeaderboardEntryAdmin(admin.ModelAdmin):
             'fields': ('rank', 'total_minutes', 'total_hours_display')
         }),
         ('キャッシュデータ', {
-            'fields': ('cached_daily_minutes',),
+            'fields': ('daily_minutes_display',),
             'classes': ('collapse',),
-            'description': '日別労働時間のキャッシュデータ（JSON形式）'
+            'description': '日別労働時間のキャッシュデータ（日: 分）'
         }),
         ('タイムスタンプ', {
             'fields': ('joined_at', 'last_updated'),
@@ -43,11 +43,17 @@ class LeaderboardEntryAdmin(admin.ModelAdmin):
         })
     )
     
+    def daily_minutes_display(self, obj):
+        """日別労働時間のキャッシュデータを {'日': 分} 形式で表示"""
+        return obj.cached_daily_minutes.to_dict()
+    
+    daily_minutes_display.short_description = '日別労働時間（分）'
+    
     # 一覧ページでの表示件数
     list_per_page = 25
     
     # 年月での絞り込みを簡単にするアクション
-    actions = ['recalculate_rankings', 'recalculate_from_scratch']
+    actions = ['recalculate_rankings', 'recalculate_from_scratch', 'close_months']
     
     def recalculate_rankings(self, request, queryset):
         """選択されたエントリの年月でランキングを再計算"""
@@ -114,6 +120,21 @@ class LeaderboardEntryAdmin(admin.ModelAdmin):
     
     recalculate_from_scratch.short_description = '選択したエントリを完全再計算（キャッシュリセット）'
     
+    def close_months(self, request, queryset):
+        """選択されたエントリの年月のランキングを締めてスナップショット化"""
+        from .services import LeaderboardService
+        
+        year_months = set(queryset.values_list('year', 'month'))
+        service = LeaderboardService()
+        for year, month in sorted(year_months):
+            result = service.close_month(year, month, closed_by=request.user)
+            if result.get('success'):
+                self.message_user(request, result['message'])
+            else:
+                self.message_user(request, result['error'], level='WARNING')
+    
+    close_months.short_description = '選択した年月のランキングを締める（スナップショット化）'
+    
     # カスタムクエリセット（パフォーマンス最適化）
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('user')
@@ -122,3 +143,37 @@ class LeaderboardEntryAdmin(admin.ModelAdmin):
     def get_user_display(self, obj):
         return f"{obj.user.name} ({obj.user.name})"
     get_user_display.short_description = 'ユーザー'
+
+
+@admin.register(LeaderboardSnapshot)
+class LeaderboardSnapshotAdmin(admin.ModelAdmin):
+    """締め済みランキングスナップショットの管理画面設定（閲覧のみ）"""
+    
+    list_display = ('year', 'month', 'participant_count', 'closed_at', 'closed_by')
+    list_filter = ('year',)
+    ordering = ('-year', '-month')
+    readonly_fields = (
+        'year', 'month', 'participant_count', 'closed_at', 'closed_by',
+        'rows', 'daily_minutes'
+    )
+    actions = ['reopen_months']
+    
+    def has_add_permission(self, request):
+        # スナップショットは締め処理からのみ作成する
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        # 削除は締め解除アクション経由で行う
+        return False
+    
+    def reopen_months(self, request, queryset):
+        """選択した月の締めを解除する"""
+        from .services import LeaderboardService
+        
+        service = LeaderboardService()
+        year_months = list(queryset.values_list('year', 'month'))
+        for year, month in year_months:
+            service.reopen_month(year, month)
+        self.message_user(request, f'{len(year_months)}件の月の締めを解除しました')
+    
+    reopen_months.short_description = '選択した月の締めを解除（再計算可能にする）'
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class LeaderboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'leaderboard'
+    
+    def ready(self):
+        # 打刻イベントによるランキング差分更新を有効化
+        import leaderboard.signals
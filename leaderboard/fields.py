@@ -0,0 +1,188 @@
+"""
+ランキング用のカスタムフィールド
+
+日別労働時間（分）を31日分の uint16 配列（リトルエンディアン・62バイト）として保存する。
+JSON辞書と異なり、1日分の更新や月合計の算出で文字列キーの解析・再シリアライズが不要になる。
+"""
+
+from array import array
+import base64
+from collections.abc import Mapping
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import models
+
+DAYS_PER_MONTH = 31
+MAX_DAILY_MINUTES = 0xFFFF
+
+
+class DailyMinutes:
+    """
+    1か月分の日別労働時間（分）
+
+    日付は1始まりでアクセスする（minutes[1] が1日）。労働時間がない日は0
+    """
+
+    __slots__ = ('_values',)
+
+    def __init__(self, values: Optional[List[int]] = None):
+        if values is None:
+            self._values = array('H', bytes(DAYS_PER_MONTH * 2))
+        else:
+            if len(values) != DAYS_PER_MONTH:
+                raise ValueError(f'日別労働時間は{DAYS_PER_MONTH}日分が必要です')
+            self._values = array('H', values)
+
+    # ------------------------------------------------------------------
+    # 変換
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'DailyMinutes':
+        """保存形式（リトルエンディアンのuint16×31）から作成"""
+        data = bytes(data)
+        if not data:
+            return cls()
+        if len(data) != DAYS_PER_MONTH * 2:
+            raise ValueError(f'日別労働時間のバイト長が不正です: {len(data)}')
+        instance = cls()
+        instance._values = array('H', data)
+        if sys.byteorder == 'big':
+            instance._values.byteswap()
+        return instance
+
+    def to_bytes(self) -> bytes:
+        """保存形式（リトルエンディアンのuint16×31）に変換"""
+        if sys.byteorder == 'big':
+            values = array('H', self._values)
+            values.byteswap()
+            return values.tobytes()
+        return self._values.tobytes()
+
+    @classmethod
+    def from_dict(cls, mapping: Mapping) -> 'DailyMinutes':
+        """{'1': 480, '2': 420, ...} 形式（旧形式）から作成"""
+        instance = cls()
+        for day, minutes in mapping.items():
+            instance[int(day)] = int(minutes)
+        return instance
+
+    def to_dict(self) -> Dict[str, int]:
+        """{'1': 480, '2': 420, ...} 形式（労働時間がある日のみ）に変換"""
+        return {str(day): minutes for day, minutes in self.items()}
+
+    def as_list(self, days: int = DAYS_PER_MONTH) -> List[int]:
+        """1日からdays日までの労働時間のリスト"""
+        return self._values[:days].tolist()
+
+    # ------------------------------------------------------------------
+    # 参照・更新
+    # ------------------------------------------------------------------
+
+    def __getitem__(self, day: int) -> int:
+        return self._values[self._index(day)]
+
+    def __setitem__(self, day: int, minutes: int) -> None:
+        if not 0 <= minutes <= MAX_DAILY_MINUTES:
+            raise ValueError(f'労働時間（分）が範囲外です: {minutes}')
+        self._values[self._index(day)] = minutes
+
+    def _index(self, day: int) -> int:
+        if not 1 <= day <= DAYS_PER_MONTH:
+            raise IndexError(f'日付が範囲外です: {day}')
+        return day - 1
+
+    def items(self) -> Iterator[Tuple[int, int]]:
+        """労働時間がある日の (日, 分) を日付順に返す"""
+        for index, minutes in enumerate(self._values):
+            if minutes:
+                yield index + 1, minutes
+
+    def total(self) -> int:
+        """月合計（分）"""
+        return sum(self._values)
+
+    def worked_days(self) -> int:
+        """労働時間がある日数"""
+        return DAYS_PER_MONTH - self._values.count(0)
+
+    def latest_day(self) -> int:
+        """労働時間がある最後の日（ない場合は0）"""
+        for index in range(DAYS_PER_MONTH - 1, -1, -1):
+            if self._values[index]:
+                return index + 1
+        return 0
+
+    def __bool__(self) -> bool:
+        return any(self._values)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, DailyMinutes):
+            return self._values == other._values
+        if isinstance(other, Mapping):
+            return self.to_dict() == {str(day): minutes for day, minutes in other.items() if minutes}
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f'DailyMinutes({self.to_dict()})'
+
+    def __getstate__(self):
+        return self.to_bytes()
+
+    def __setstate__(self, state):
+        self._values = DailyMinutes.from_bytes(state)._values
+
+
+def empty_daily_minutes() -> DailyMinutes:
+    """DailyMinutesFieldの既定値"""
+    return DailyMinutes()
+
+
+class DailyMinutesField(models.BinaryField):
+    """
+    DailyMinutes を62バイトのバイナリとして保存するフィールド
+
+    代入・更新時は DailyMinutes のほか、旧形式の辞書も受け付ける
+    """
+
+    description = '31日分の日別労働時間（分）'
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('default', empty_daily_minutes)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if kwargs.get('default') is empty_daily_minutes:
+            del kwargs['default']
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return DailyMinutes.from_bytes(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, DailyMinutes):
+            return value
+        if isinstance(value, Mapping):
+            return DailyMinutes.from_dict(value)
+        if isinstance(value, str):
+            # シリアライズ（dumpdata）時の base64 文字列
+            value = base64.b64decode(value.encode('ascii'))
+        try:
+            return DailyMinutes.from_bytes(value)
+        except ValueError as e:
+            raise ValidationError(str(e)) from e
+
+    def get_prep_value(self, value):
+        value = self.to_python(value)
+        if value is None:
+            return value
+        return value.to_bytes()
+
+    def value_to_string(self, obj):
+        value = self.value_from_object(obj)
+        return base64.b64encode(self.get_prep_value(value)).decode('ascii')
@@ -0,0 +1,91 @@
+"""
+月次ランキング締めコマンド
+"""
+
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.utils import timezone
+from zoneinfo import ZoneInfo
+import logging
+
+from leaderboard.services.leaderboard_service import LeaderboardService
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """終了した月のランキングをスナップショットとして凍結するコマンド"""
+    
+    help = '終了した月のランキングを締め、変更不可のスナップショットとして保存します'
+    
+    def add_arguments(self, parser):
+        """コマンド引数の定義"""
+        parser.add_argument(
+            '--year',
+            type=int,
+            help='処理対象年（未指定の場合は前月の年）',
+            default=None
+        )
+        parser.add_argument(
+            '--month',
+            type=int,
+            help='処理対象月（未指定の場合は前月）',
+            default=None
+        )
+        parser.add_argument(
+            '--no-recalculate',
+            action='store_true',
+            help='締める前の完全再計算を行わない',
+            default=False
+        )
+        parser.add_argument(
+            '--reopen',
+            action='store_true',
+            help='締めを解除して再計算できる状態に戻す',
+            default=False
+        )
+    
+    def handle(self, *args, **options):
+        """
+        実行内容:
+            1. 対象月の全エントリを完全再計算（--no-recalculate指定時は省略）
+            2. 順位と日別労働時間をスナップショットとして保存
+            3. 以降の再計算を拒否（--reopenで解除）
+        """
+        if options['year'] and options['month']:
+            target_year = options['year']
+            target_month = options['month']
+        else:
+            # JST基準で前月を取得
+            jst = ZoneInfo(settings.TIME_ZONE)
+            now = timezone.now().astimezone(jst)
+            if now.month == 1:
+                target_year, target_month = now.year - 1, 12
+            else:
+                target_year, target_month = now.year, now.month - 1
+            target_year = options['year'] or target_year
+            target_month = options['month'] or target_month
+        
+        if not (1 <= target_month <= 12):
+            self.stdout.write(
+                self.style.ERROR(f'無効な月です: {target_month} (1-12の範囲で指定してください)')
+            )
+            return
+        
+        service = LeaderboardService()
+        if options['reopen']:
+            result = service.reopen_month(target_year, target_month)
+        else:
+            self.stdout.write(f'ランキングの締め処理を開始します (対象: {target_year}年{target_month}月)')
+            result = service.close_month(
+                target_year, target_month,
+                recalculate=not options['no_recalculate']
+            )
+        
+        if result.get('success'):
+            self.stdout.write(self.style.SUCCESS(result['message']))
+            logger.info(result['message'])
+        else:
+            self.stdout.write(self.style.ERROR(result['error']))
+            logger.warning(result['error'])
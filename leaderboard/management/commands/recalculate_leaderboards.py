@@ -35,6 +35,18 @@ class Command(BaseCommand):
             help='処理対象月（未指定の場合は現在月）',
             default=None
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='並列ワーカー数（エントリをチャンクに分割して並列計算）',
+            default=1
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='1チャンクあたりのエントリ数（未指定の場合はワーカー数で均等分割）',
+            default=None
+        )
         parser.add_argument(
             '--dry-run',
             action='store_true',
@@ -67,6 +79,10 @@ class Command(BaseCommand):
             )
             return
         
+        if options['workers'] < 1:
+            self.stdout.write(self.style.ERROR('ワーカー数は1以上で指定してください'))
+            return
+        
         self.stdout.write(f'ランキングデータ完全再計算を開始します (対象: {target_year}年{target_month}月)')
         logger.info(f'ランキングデータ完全再計算を開始: 対象={target_year}年{target_month}月')
         
@@ -85,7 +101,10 @@ class Command(BaseCommand):
                 self._dry_run_check(entries, target_year, target_month)
             else:
                 # 実際の処理を実行
-                self._execute_recalculation(entries, target_year, target_month)
+                self._execute_recalculation(
+                    entries, target_year, target_month,
+                    options['workers'], options['chunk_size']
+                )
             
         except Exception as e:
             error_msg = f'処理中にエラーが発生しました: {e}'
@@ -105,64 +124,64 @@ class Command(BaseCommand):
         else:
             self.stdout.write(f'{target_year}年{target_month}月の参加者はいません')
     
-    def _execute_recalculation(self, entries, target_year, target_month):
+    def _execute_recalculation(self, entries, target_year, target_month, workers=1, chunk_size=None):
         """実際の再計算処理を実行"""
         if not entries:
             self.stdout.write(f'{target_year}年{target_month}月の参加者はいません')
             logger.info(f'再計算処理完了: 対象なし ({target_year}年{target_month}月)')
             return
         
-        self.stdout.write(f'再計算処理を実行中... (対象: {len(entries)}エントリ)')
+        self.stdout.write(
+            f'再計算処理を実行中... (対象: {len(entries)}エントリ, ワーカー数: {workers})'
+        )
         
-        success_count = 0
-        error_count = 0
+        service = LeaderboardService()
+        result = service.recalculate_month_from_scratch(
+            target_year, target_month,
+            workers=workers,
+            chunk_size=chunk_size,
+            entries=entries
+        )
         
-        # 各エントリを完全再計算
-        for entry in entries:
-            try:
-                service = LeaderboardService(entry.user)
-                result_entry, response = service.recalculate_user_stats_from_scratch(
-                    year=target_year,
-                    month=target_month
-                )
-                
-                if response and response.get('success'):
-                    success_count += 1
-                    self.stdout.write(
-                        f'  ✓ {entry.user.name}: {result_entry.total_hours_display} '
-                        f'(前回: {entry.total_hours_display})'
-                    )
-                else:
-                    error_count += 1
-                    error_msg = response.get('error', '不明なエラー') if response else '不明なエラー'
-                    self.stdout.write(
-                        self.style.ERROR(f'  ✗ {entry.user.name}: {error_msg}')
-                    )
-                    logger.error(f'ユーザー {entry.user.name} の再計算失敗: {error_msg}')
-                    
-            except Exception as e:
-                error_count += 1
-                self.stdout.write(
-                    self.style.ERROR(f'  ✗ {entry.user.name}: 処理エラー - {str(e)}')
-                )
-                logger.error(f'ユーザー {entry.user.name} の再計算エラー', exc_info=True)
+        # 締め済みの月などで再計算が拒否された場合
+        if not result['success']:
+            self.stdout.write(self.style.ERROR(result['error']))
+            logger.warning(f'ランキングデータ完全再計算を中止: {target_year}年{target_month}月 ({result["status"]})')
+            return
         
-        # ランキングを更新
-        if success_count > 0:
-            self.stdout.write('ランキングを更新中...')
-            service = LeaderboardService()
-            ranking_result = service.update_leaderboard(target_year, target_month)
-            
-            if ranking_result.get('success'):
-                self.stdout.write('ランキング更新完了')
-            else:
-                self.stdout.write(
-                    self.style.ERROR(f'ランキング更新エラー: {ranking_result.get("error", "不明なエラー")}')
-                )
-                logger.error(f'ランキング更新エラー: {ranking_result}')
+        success_count = result['success_count']
+        error_count = result['error_count']
+        
+        # 各エントリの結果
+        for entry in result['entries']:
+            previous_minutes = result['previous_totals'][entry.pk]
+            self.stdout.write(
+                f'  ✓ {entry.user.name}: {entry.total_hours_display} '
+                f'(前回: {previous_minutes // 60}時間{previous_minutes % 60}分)'
+            )
+        for error in result['errors']:
+            self.stdout.write(
+                self.style.ERROR(f'  ✗ {error["user"]}: 処理エラー - {error["error"]}')
+            )
+            logger.error(f'ユーザー {error["user"]} の再計算エラー: {error["error"]}')
+        
+        # チャンクごとの処理時間
+        for chunk in result['chunks']:
+            self.stdout.write(
+                f'  チャンク{chunk["index"] + 1}: {chunk["size"]}件 / {chunk["elapsed"]:.2f}秒'
+            )
+        
+        if result['ranking_updated']:
+            self.stdout.write('ランキング更新完了')
+        elif success_count > 0:
+            self.stdout.write(self.style.ERROR('ランキング更新エラー'))
+            logger.error(f'ランキング更新エラー: {target_year}年{target_month}月')
         
         # 結果サマリー
         self.stdout.write(f'再計算処理完了: 成功 {success_count}件, エラー {error_count}件')
+        self.stdout.write(
+            f'処理時間: {result["elapsed"]:.2f}秒 (スループット: {result["throughput"]:.1f}件/秒)'
+        )
         
         if error_count == 0:
             self.stdout.write(
@@ -180,4 +199,4 @@ class Command(BaseCommand):
             logger.warning(
                 f'ランキングデータ完全再計算完了（エラーあり）: {target_year}年{target_month}月, '
                 f'成功{success_count}件, エラー{error_count}件'
-            )
\ No newline at end of file
+            )
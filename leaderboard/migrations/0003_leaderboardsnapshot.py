@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0002_alter_leaderboardentry_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('month', models.PositiveIntegerField()),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+                ('participant_count', models.PositiveIntegerField(default=0)),
+                ('rows', models.JSONField(blank=True, default=list, help_text='[[user_id, user_name, rank, total_minutes, joined_at], ...] 形式（順位順）')),
+                ('daily_minutes', models.JSONField(blank=True, default=list, help_text='rowsと同じ順序で各参加者の31日分の労働時間（分）を保存')),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'ランキングスナップショット',
+                'verbose_name_plural': 'ランキングスナップショット',
+                'ordering': ['-year', '-month'],
+                'unique_together': {('year', 'month')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0004_leaderboardentry_rank_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('month', models.PositiveIntegerField()),
+                ('owner', models.CharField(max_length=32)),
+                ('acquired_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(help_text='保持者が異常終了した場合に、この時刻以降は他の処理が取得できる')),
+            ],
+            options={
+                'verbose_name': 'ランキング更新ロック',
+                'verbose_name_plural': 'ランキング更新ロック',
+                'unique_together': {('year', 'month')},
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# 日別労働時間を JSON 辞書から 31日分の uint16 配列（62バイト）へ変換する
+
+from django.db import migrations
+
+import leaderboard.fields
+
+
+def pack_daily_minutes(apps, schema_editor):
+    LeaderboardEntry = apps.get_model('leaderboard', 'LeaderboardEntry')
+    entries = []
+    for entry in LeaderboardEntry.objects.only('id', 'cached_daily_minutes').iterator(chunk_size=500):
+        entry.packed_daily_minutes = leaderboard.fields.DailyMinutes.from_dict(entry.cached_daily_minutes or {})
+        entries.append(entry)
+        if len(entries) >= 500:
+            LeaderboardEntry.objects.bulk_update(entries, ['packed_daily_minutes'])
+            entries = []
+    if entries:
+        LeaderboardEntry.objects.bulk_update(entries, ['packed_daily_minutes'])
+
+
+def unpack_daily_minutes(apps, schema_editor):
+    LeaderboardEntry = apps.get_model('leaderboard', 'LeaderboardEntry')
+    entries = []
+    for entry in LeaderboardEntry.objects.only('id', 'packed_daily_minutes').iterator(chunk_size=500):
+        entry.cached_daily_minutes = entry.packed_daily_minutes.to_dict()
+        entries.append(entry)
+        if len(entries) >= 500:
+            LeaderboardEntry.objects.bulk_update(entries, ['cached_daily_minutes'])
+            entries = []
+    if entries:
+        LeaderboardEntry.objects.bulk_update(entries, ['cached_daily_minutes'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0005_leaderboardlock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaderboardentry',
+            name='packed_daily_minutes',
+            field=leaderboard.fields.DailyMinutesField(blank=True),
+        ),
+        migrations.RunPython(pack_daily_minutes, unpack_daily_minutes),
+        migrations.RemoveField(
+            model_name='leaderboardentry',
+            name='cached_daily_minutes',
+        ),
+        migrations.RenameField(
+            model_name='leaderboardentry',
+            old_name='packed_daily_minutes',
+            new_name='cached_daily_minutes',
+        ),
+        migrations.AlterField(
+            model_name='leaderboardentry',
+            name='cached_daily_minutes',
+            field=leaderboard.fields.DailyMinutesField(blank=True, help_text='31日分の労働時間（分）をuint16配列（62バイト）で保存。entry.cached_daily_minutes[日] で参照・更新する'),
+        ),
+    ]
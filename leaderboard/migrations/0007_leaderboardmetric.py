@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0006_pack_cached_daily_minutes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('month', models.PositiveIntegerField()),
+                ('metric', models.CharField(help_text='指標名（services.ranking_metrics に登録された名前）', max_length=32)),
+                ('value', models.PositiveIntegerField(default=0)),
+                ('rank', models.PositiveIntegerField(blank=True, null=True)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metrics', to='leaderboard.leaderboardentry')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'ランキング指標',
+                'verbose_name_plural': 'ランキング指標',
+                'ordering': ['metric', 'rank'],
+                'indexes': [models.Index(fields=['year', 'month', 'metric', 'rank'], name='leaderboard_year_ce5922_idx')],
+                'unique_together': {('entry', 'metric')},
+            },
+        ),
+    ]
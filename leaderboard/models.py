@@ -1,6 +1,8 @@
 from django.db import models
 from django.core.exceptions import ValidationError
 
+from .fields import DailyMinutesField
+
 class LeaderboardEntry(models.Model):
     """
     リーダーボードへの参加記録と成績を管理
@@ -15,9 +17,9 @@ class LeaderboardEntry(models.Model):
     rank = models.PositiveIntegerField(null=True, blank=True)
     last_updated = models.DateTimeField(auto_now=True)
 
-    cached_daily_minutes = models.JSONField(
-        default=dict, blank=True,
-        help_text="{'1': 480, '2': 420, ...} 形式で保存"
+    cached_daily_minutes = DailyMinutesField(
+        blank=True,
+        help_text="31日分の労働時間（分）をuint16配列（62バイト）で保存。entry.cached_daily_minutes[日] で参照・更新する"
     )
 
     class Meta:
@@ -25,6 +27,8 @@ class LeaderboardEntry(models.Model):
         ordering = ['rank', '-total_minutes']
         indexes = [
             models.Index(fields=['user', 'year', 'month']),
+            # 上位N件・自分の前後・キーセットページングの範囲取得用
+            models.Index(fields=['year', 'month', 'rank']),
         ]
         verbose_name = 'ランキングエントリ'
         verbose_name_plural = 'ランキングエントリ'
@@ -41,4 +45,101 @@ class LeaderboardEntry(models.Model):
     def total_hours_display(self):
         hours = self.total_minutes // 60
         minutes = self.total_minutes % 60
-        return f"{hours}時間{minutes}分"
\ No newline at end of file
+        return f"{hours}時間{minutes}分"
+
+class LeaderboardMetric(models.Model):
+    """
+    参加者ごとの追加指標（出勤日数・最長連続出勤日数など）の値と、その指標での順位
+    合計労働時間の順位は LeaderboardEntry.rank で管理する
+    """
+    entry = models.ForeignKey(LeaderboardEntry, on_delete=models.CASCADE, related_name='metrics')
+    user = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='+')
+    year = models.PositiveIntegerField()
+    month = models.PositiveIntegerField()
+    metric = models.CharField(max_length=32, help_text="指標名（services.ranking_metrics に登録された名前）")
+    value = models.PositiveIntegerField(default=0)
+    rank = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('entry', 'metric')
+        ordering = ['metric', 'rank']
+        indexes = [
+            # 指標ごとの順位一覧の範囲取得用
+            models.Index(fields=['year', 'month', 'metric', 'rank']),
+        ]
+        verbose_name = 'ランキング指標'
+        verbose_name_plural = 'ランキング指標'
+
+    def __str__(self):
+        return f"{self.user.name} - {self.year}/{self.month} - {self.metric}: {self.value} - Rank: {self.rank}"
+
+class LeaderboardSnapshot(models.Model):
+    """
+    締め済みの月のランキングを凍結したスナップショット
+    最終順位と日別労働時間をコンパクトな形式で保持し、作成後は変更しない
+    """
+    year = models.PositiveIntegerField()
+    month = models.PositiveIntegerField()
+    closed_at = models.DateTimeField(auto_now_add=True)
+    closed_by = models.ForeignKey(
+        'accounts.User', on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='+'
+    )
+    participant_count = models.PositiveIntegerField(default=0)
+
+    rows = models.JSONField(
+        default=list, blank=True,
+        help_text="[[user_id, user_name, rank, total_minutes, joined_at], ...] 形式（順位順）"
+    )
+    daily_minutes = models.JSONField(
+        default=list, blank=True,
+        help_text="rowsと同じ順序で各参加者の31日分の労働時間（分）を保存"
+    )
+
+    class Meta:
+        unique_together = ('year', 'month')
+        ordering = ['-year', '-month']
+        verbose_name = 'ランキングスナップショット'
+        verbose_name_plural = 'ランキングスナップショット'
+
+    def __str__(self):
+        return f"{self.year}/{self.month} - {self.participant_count}人"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValidationError('締め済みのランキングスナップショットは変更できません。')
+        super().save(*args, **kwargs)
+
+    def as_ranked_rows(self):
+        """ランキング表示用の辞書リストに展開"""
+        return [
+            {
+                'user_id': user_id,
+                'user_name': user_name,
+                'rank': rank,
+                'total_minutes': total_minutes,
+                'total_hours_display': f"{total_minutes // 60}時間{total_minutes % 60}分",
+                'joined_at': joined_at,
+                'last_updated': self.closed_at.isoformat(),
+            }
+            for user_id, user_name, rank, total_minutes, joined_at in self.rows
+        ]
+
+class LeaderboardLock(models.Model):
+    """
+    年月単位のランキング更新ロック（PostgreSQL以外のデータベース用）
+    PostgreSQLではアドバイザリーロックを使うため、このテーブルは使用しない
+    """
+    year = models.PositiveIntegerField()
+    month = models.PositiveIntegerField()
+    owner = models.CharField(max_length=32)
+    acquired_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(help_text="保持者が異常終了した場合に、この時刻以降は他の処理が取得できる")
+
+    class Meta:
+        unique_together = ('year', 'month')
+        verbose_name = 'ランキング更新ロック'
+        verbose_name_plural = 'ランキング更新ロック'
+
+    def __str__(self):
+        return f"{self.year}/{self.month} - {self.owner}"
@@ -1,3 +1,37 @@
 from .leaderboard_service import LeaderboardService
+from .ranking_cache import (
+    bump_ranking_version,
+    get_rank_trajectory,
+    get_ranked_entries,
+    get_ranking_last_modified,
+    get_ranking_version,
+    is_past_month,
+)
+from .ranking_metrics import (
+    METRICS,
+    get_metric_ranking,
+    rank_metrics,
+)
+from .ranking_window import (
+    get_participant_count,
+    get_ranking_page,
+    get_ranking_window,
+    get_user_ranking_row,
+)
 
-__all__ = ['LeaderboardService']
\ No newline at end of file
+__all__ = [
+    'LeaderboardService',
+    'METRICS',
+    'bump_ranking_version',
+    'get_metric_ranking',
+    'get_participant_count',
+    'get_rank_trajectory',
+    'get_ranked_entries',
+    'get_ranking_last_modified',
+    'get_ranking_page',
+    'get_ranking_version',
+    'get_ranking_window',
+    'get_user_ranking_row',
+    'is_past_month',
+    'rank_metrics',
+]
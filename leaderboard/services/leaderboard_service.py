@@ -1,11 +1,20 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta, date
 import calendar
-from typing import Optional, Dict, Any
+import math
+import time
+from typing import Optional, Dict, Any, List
 from django.utils import timezone
 from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
 from zoneinfo import ZoneInfo
 
-from ..models import LeaderboardEntry
+from ..fields import DailyMinutes
+from ..models import LeaderboardEntry, LeaderboardSnapshot
+from .month_lock import MonthLockTimeout, month_lock, run_single_flight
+from .ranking_cache import bump_ranking_version, is_past_month
+from .ranking_metrics import rank_metrics
 from timeclock.services import WorkTimeService
 
 
@@ -41,6 +50,22 @@ class LeaderboardService:
         year = year or now.year
         month = month or now.month
         
+        if self.is_month_closed(year, month):
+            return None, self._month_closed_error(year, month)
+        
+        # 同じユーザー・月の同時更新は1回だけ計算し、待機していた呼び出しは結果を再利用する
+        try:
+            return run_single_flight(
+                f'update_user_stats:{user.pk}', year, month,
+                lambda: self._update_user_stats(user, year, month, today)
+            )
+        except MonthLockTimeout as e:
+            return None, self._month_busy_error(year, month, e)
+    
+    def _update_user_stats(self, user, year: int, month: int, today: date) -> tuple[Optional[LeaderboardEntry], Optional[Dict[str, Any]]]:
+        """
+        キャッシュ済みの翌日から今日までの労働時間を反映する（update_user_statsから呼び出す）
+        """
         # エントリの取得
         try:
             entry = LeaderboardEntry.objects.get(
@@ -67,10 +92,10 @@ class LeaderboardService:
         service = WorkTimeService(user)
         
         # キャッシュデータから最新の日付を取得して更新開始日を決定
-        cached_data = entry.cached_daily_minutes or {}
-        if cached_data:
+        daily_minutes = entry.cached_daily_minutes
+        latest_cached_day = daily_minutes.latest_day()
+        if latest_cached_day:
             # キャッシュデータの最新日の翌日を計算
-            latest_cached_day = max(int(day) for day in cached_data.keys())
             cache_next_date = date(year, month, latest_cached_day) + timedelta(days=1)
             
             # キャッシュの翌日と今日を比較して、より過去の方から開始
@@ -95,18 +120,13 @@ class LeaderboardService:
                 
             daily_summary = service.get_daily_summary(update_date)
             if daily_summary['work_hours'] > 0:
-                # 日付をキーとして分数を保存
-                minutes = int(daily_summary['work_time'].total_seconds() / 60)
-                cached_data[str(update_date.day)] = minutes
+                # 日付の枠に分数を保存
+                daily_minutes[update_date.day] = int(daily_summary['work_time'].total_seconds() / 60)
             
             update_date += timedelta(days=1)
         
-        # 合計時間を計算
-        total_minutes = sum(cached_data.values())
-        
         # エントリを更新
-        entry.cached_daily_minutes = cached_data
-        entry.total_minutes = total_minutes
+        entry.total_minutes = daily_minutes.total()
         entry.save()
         
         return entry, {
@@ -115,6 +135,225 @@ class LeaderboardService:
                 'message': '更新されました。'
             }
     
+    def apply_daily_minutes(self, target_date: date, user=None) -> tuple[Optional[LeaderboardEntry], Optional[Dict[str, Any]]]:
+        """
+        指定日の労働時間だけを再計算し、キャッシュ・合計・順位を差分更新する
+        
+        退勤打刻や過去日の打刻修正時に呼び出され、該当ユーザーの
+        cached_daily_minutes の該当日と total_minutes のみを更新した上で、
+        順位は影響を受けるエントリだけを移動させる
+        
+        Args:
+            target_date: 再計算対象日
+            user: ユーザーオブジェクト（Noneの場合はインスタンスのuserを使用）
+        
+        Returns:
+            (entry, response): 成功時は(entry, success_dict)、失敗時は(None, error_dict)
+        """
+        user = user or self.user
+        if not user:
+            return None, {
+                'success': False,
+                'status': 'error',
+                'error': 'ユーザーが指定されていません'
+            }
+        
+        year = target_date.year
+        month = target_date.month
+        
+        if self.is_month_closed(year, month):
+            return None, self._month_closed_error(year, month)
+        
+        # 未参加ユーザーの打刻では労働時間の計算自体を行わない
+        if not LeaderboardEntry.objects.filter(user=user, year=year, month=month).exists():
+            return None, {
+                'success': False,
+                'status': 'not_joined',
+                'error': 'ランキングに参加していません。',
+                'year': year,
+                'month': month,
+            }
+        
+        try:
+            # 順位の差分更新は同じ月の他の更新と競合するため、月単位のロック内で行う
+            with transaction.atomic(), month_lock(year, month):
+                entry = LeaderboardEntry.objects.select_for_update().get(
+                    user=user,
+                    year=year,
+                    month=month
+                )
+                
+                # 打刻はロックの取得後に読み込み、先に読んだ古い労働時間で後の更新を上書きしない
+                daily_summary = WorkTimeService(user).get_daily_summary(target_date)
+                minutes = 0
+                if daily_summary['work_hours'] > 0:
+                    minutes = int(daily_summary['work_time'].total_seconds() / 60)
+                
+                daily_minutes = entry.cached_daily_minutes
+                if daily_minutes[target_date.day] == minutes:
+                    return entry, {
+                        'success': True,
+                        'status': 'unchanged',
+                        'message': '変更はありません。'
+                    }
+                
+                previous_total = entry.total_minutes
+                daily_minutes[target_date.day] = minutes
+                entry.total_minutes = daily_minutes.total()
+                entry.save(update_fields=['cached_daily_minutes', 'total_minutes', 'last_updated'])
+                
+                self._reposition_entry(entry, previous_total)
+                rank_metrics(year, month, entries=[entry])
+        except MonthLockTimeout as e:
+            return None, self._month_busy_error(year, month, e)
+        
+        return entry, {
+            'success': True,
+            'status': 'applied_daily_minutes',
+            'message': '更新されました。'
+        }
+    
+    def _reposition_entry(self, entry: LeaderboardEntry, previous_total: int) -> None:
+        """
+        合計時間が変わった1エントリを並び順の中で移動させ、順位を差分更新する
+        
+        順位は「自分より合計時間が多い参加者数 + 1」（同時間は同順位）なので、
+        影響を受けるのは旧合計と新合計の間にいるエントリだけとなる
+        
+        Args:
+            entry: 合計時間を更新済みのエントリ
+            previous_total: 更新前の合計時間（分）
+        """
+        others = LeaderboardEntry.objects.filter(
+            year=entry.year,
+            month=entry.month
+        ).exclude(pk=entry.pk)
+        
+        # 未採番のエントリがある場合は差分更新できないため全体を再計算
+        if entry.rank is None or others.filter(rank__isnull=True).exists():
+            self.update_leaderboard(entry.year, entry.month)
+            entry.refresh_from_db(fields=['rank'])
+            return
+        
+        new_total = entry.total_minutes
+        if new_total > previous_total:
+            # 追い抜かれた参加者は1つ順位が下がる
+            others.filter(
+                total_minutes__gte=previous_total,
+                total_minutes__lt=new_total
+            ).update(rank=F('rank') + 1)
+        elif new_total < previous_total:
+            # 追い抜いた参加者は1つ順位が上がる
+            others.filter(
+                total_minutes__gte=new_total,
+                total_minutes__lt=previous_total
+            ).update(rank=F('rank') - 1)
+        
+        entry.rank = others.filter(total_minutes__gt=new_total).count() + 1
+        entry.save(update_fields=['rank'])
+    
+    def join_leaderboard(self, user=None, year: int = None, month: int = None) -> tuple[Optional[LeaderboardEntry], Optional[Dict[str, Any]]]:
+        """
+        ランキングに参加し、月初からの労働時間を計算した上で順位の位置に挿入する
+        
+        労働時間は月の打刻を1回のクエリで取得して計算し、
+        順位は新しいエントリより下位の参加者だけを1つずつ繰り下げる（全体の再計算は行わない）
+        
+        Args:
+            user: ユーザーオブジェクト（Noneの場合はインスタンスのuserを使用）
+            year: 年（Noneの場合は現在の年）
+            month: 月（Noneの場合は現在の月）
+        
+        Returns:
+            (entry, response): 成功時は(entry, success_dict)、失敗時は(entry or None, error_dict)
+        """
+        user = user or self.user
+        if not user:
+            return None, {
+                'success': False,
+                'status': 'error',
+                'error': 'ユーザーが指定されていません'
+            }
+        
+        now = timezone.now().astimezone(self.jst)
+        year = year or now.year
+        month = month or now.month
+        
+        if self.is_month_closed(year, month):
+            return None, self._month_closed_error(year, month)
+        
+        existing = LeaderboardEntry.objects.filter(user=user, year=year, month=month).first()
+        if existing is not None:
+            return existing, {
+                'success': False,
+                'status': 'already_joined',
+                'error': '既にランキングに参加済みです',
+            }
+        
+        # 労働時間の計算は読み取りのみのため、ロックの外で行う
+        try:
+            daily_minutes = self._calculate_daily_minutes(user, year, month, now.date())
+        except Exception as e:
+            return None, {
+                'success': False,
+                'status': 'error',
+                'error': str(e)
+            }
+        
+        try:
+            with transaction.atomic(), month_lock(year, month):
+                entry, created = LeaderboardEntry.objects.get_or_create(
+                    user=user,
+                    year=year,
+                    month=month,
+                    defaults={
+                        'cached_daily_minutes': daily_minutes,
+                        'total_minutes': daily_minutes.total(),
+                    }
+                )
+                if not created:
+                    return entry, {
+                        'success': False,
+                        'status': 'already_joined',
+                        'error': '既にランキングに参加済みです',
+                    }
+                
+                self._insert_entry(entry)
+                rank_metrics(year, month, entries=[entry])
+        except MonthLockTimeout as e:
+            return None, self._month_busy_error(year, month, e)
+        
+        return entry, {
+            'success': True,
+            'status': 'joined',
+            'message': 'ランキングに参加しました'
+        }
+    
+    def _insert_entry(self, entry: LeaderboardEntry) -> None:
+        """
+        新しいエントリを合計時間に応じた順位に挿入する
+        
+        順位は「自分より合計時間が多い参加者数 + 1」なので、
+        自分より合計時間が少ない参加者だけが1つ順位を下げる
+        
+        Args:
+            entry: 作成済みのエントリ
+        """
+        others = LeaderboardEntry.objects.filter(
+            year=entry.year,
+            month=entry.month
+        ).exclude(pk=entry.pk)
+        
+        # 未採番のエントリがある場合は差分更新できないため全体を再計算
+        if others.filter(rank__isnull=True).exists():
+            self._rank_entries(entry.year, entry.month)
+            entry.refresh_from_db(fields=['rank'])
+            return
+        
+        others.filter(total_minutes__lt=entry.total_minutes).update(rank=F('rank') + 1)
+        entry.rank = others.filter(total_minutes__gt=entry.total_minutes).count() + 1
+        entry.save(update_fields=['rank'])
+    
     def update_leaderboard(self, year: int, month: int) -> Dict[str,Any]:
         """
         指定された年月のランキングを更新する
@@ -123,6 +362,22 @@ class LeaderboardService:
             year: 年
             month: 月
         """
+        if self.is_month_closed(year, month):
+            return self._month_closed_error(year, month)
+        
+        # 同時に呼ばれた場合は1回だけ計算し、待機していた呼び出しは結果を再利用する
+        try:
+            return run_single_flight(
+                'update_leaderboard', year, month,
+                lambda: self._rank_entries(year, month)
+            )
+        except MonthLockTimeout as e:
+            return self._month_busy_error(year, month, e)
+    
+    def _rank_entries(self, year: int, month: int) -> Dict[str, Any]:
+        """
+        指定された年月の全エントリに順位を付け直す（update_leaderboardから呼び出す）
+        """
         try:
             # 指定年月の全エントリを労働時間の降順で取得
             all_entries = LeaderboardEntry.objects.filter(
@@ -133,8 +388,9 @@ class LeaderboardService:
             # 同順位処理を実装したランキング更新
             current_rank = 1
             previous_minutes = None
+            changed_entries = []
             
-            for index, entry in enumerate(all_entries):
+            for index, entry in enumerate(all_entries.only('id', 'total_minutes', 'rank')):
                 # 前の人と同じ労働時間の場合は同じ順位
                 if previous_minutes is not None and entry.total_minutes == previous_minutes:
                     # 同じ順位を保持
@@ -143,9 +399,19 @@ class LeaderboardService:
                     # 新しい順位を設定（現在のインデックス + 1）
                     current_rank = index + 1
                 
-                entry.rank = current_rank
-                entry.save(update_fields=['rank'])
+                if entry.rank != current_rank:
+                    entry.rank = current_rank
+                    changed_entries.append(entry)
                 previous_minutes = entry.total_minutes
+            
+            # 順位が変わったエントリのみ一括更新
+            LeaderboardEntry.objects.bulk_update(changed_entries, ['rank'], batch_size=500)
+            
+            # 合計労働時間以外の指標の値と順位も同じ走査結果から更新
+            rank_metrics(year, month)
+            
+            # 合計時間の一括更新後にも呼ばれるため、順位の変化有無にかかわらずキャッシュを無効化
+            transaction.on_commit(lambda: bump_ranking_version(year, month))
 
             return {
                 'success':True,
@@ -230,6 +496,9 @@ class LeaderboardService:
         year = year or now.year
         month = month or now.month
         
+        if self.is_month_closed(year, month):
+            return None, self._month_closed_error(year, month)
+        
         # エントリの取得
         try:
             entry = LeaderboardEntry.objects.get(
@@ -252,44 +521,309 @@ class LeaderboardService:
                 'error': str(e)
             }
         
-        # WorkTimeServiceを使用して労働時間データを取得
-        service = WorkTimeService(user)
-        
         # 月初から完全再計算
-        month_start = date(year, month, 1)
+        daily_minutes = self._calculate_daily_minutes(user, year, month, today)
         
-        # 月末日を計算
+        # エントリを更新（last_updatedも現在時刻で更新）
+        entry.cached_daily_minutes = daily_minutes
+        entry.total_minutes = daily_minutes.total()
+        entry.last_updated = now
+        entry.save()
+        
+        return entry, {
+            'success': True,
+            'status': 'recalculated_from_scratch',
+            'message': f'{user.name}の労働時間を完全再計算しました。'
+        }
+    
+    def recalculate_month_from_scratch(self, year: int, month: int, workers: int = 1, chunk_size: int = None, entries=None) -> Dict[str, Any]:
+        """
+        指定年月の全エントリをチャンクに分割して完全再計算する
+        
+        各チャンクはスレッドプールのワーカー（それぞれ独自のDB接続を持つ）で計算し、
+        結果はbulk_updateでまとめて書き戻した後、ランキングを1回だけ更新する
+        
+        Args:
+            year: 年
+            month: 月
+            workers: 並列ワーカー数（1の場合は呼び出し元スレッドで逐次実行）
+            chunk_size: 1チャンクあたりのエントリ数（Noneの場合はワーカー数で均等分割）
+            entries: 対象エントリのQuerySet（Noneの場合は指定年月の全エントリ）
+        
+        Returns:
+            処理結果の辞書（チャンクごとの処理時間とスループットを含む）
+        """
+        if self.is_month_closed(year, month):
+            return self._month_closed_error(year, month)
+        
+        started = time.perf_counter()
+        now = timezone.now().astimezone(self.jst)
+        workers = max(1, workers or 1)
+        
+        if entries is None:
+            entries = LeaderboardEntry.objects.filter(year=year, month=month)
+        entries = list(entries.select_related('user'))
+        
+        if not entries:
+            return {
+                'success': True,
+                'status': 'no_entries',
+                'message': f'{year}年{month}月の参加者はいません',
+                'processed_count': 0,
+                'success_count': 0,
+                'error_count': 0,
+                'errors': [],
+                'entries': [],
+                'previous_totals': {},
+                'chunks': [],
+                'elapsed': 0.0,
+                'throughput': 0.0,
+                'ranking_updated': False,
+            }
+        
+        chunk_size = chunk_size or math.ceil(len(entries) / workers)
+        chunks = [entries[i:i + chunk_size] for i in range(0, len(entries), chunk_size)]
+        previous_totals = {entry.pk: entry.total_minutes for entry in entries}
+        
+        if workers == 1:
+            chunk_results = [
+                self._recalculate_chunk(index, chunk, year, month, now)
+                for index, chunk in enumerate(chunks)
+            ]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(self._recalculate_chunk, index, chunk, year, month, now, True)
+                    for index, chunk in enumerate(chunks)
+                ]
+                chunk_results = [future.result() for future in futures]
+        
+        updated_entries = [entry for result in chunk_results for entry in result['entries']]
+        errors = [error for result in chunk_results for error in result['errors']]
+        
+        # 計算結果を一括で書き戻す
+        LeaderboardEntry.objects.bulk_update(
+            updated_entries,
+            ['cached_daily_minutes', 'total_minutes', 'last_updated'],
+            batch_size=500
+        )
+        
+        ranking_updated = False
+        if updated_entries:
+            ranking_result = self.update_leaderboard(year, month)
+            ranking_updated = ranking_result.get('success', False)
+        
+        elapsed = time.perf_counter() - started
+        return {
+            'success': True,
+            'status': 'recalculated_month',
+            'message': f'{year}年{month}月のランキングデータ完全再計算完了',
+            'processed_count': len(entries),
+            'success_count': len(updated_entries),
+            'error_count': len(errors),
+            'errors': errors,
+            'entries': updated_entries,
+            'previous_totals': previous_totals,
+            'chunks': [
+                {'index': r['index'], 'size': r['size'], 'elapsed': r['elapsed']}
+                for r in chunk_results
+            ],
+            'elapsed': elapsed,
+            'throughput': len(updated_entries) / elapsed if elapsed > 0 else 0.0,
+            'ranking_updated': ranking_updated,
+        }
+    
+    def _recalculate_chunk(self, index: int, entries: List[LeaderboardEntry], year: int, month: int, now, close_connections: bool = False) -> Dict[str, Any]:
+        """
+        1チャンク分のエントリの日別労働時間を計算する（保存は行わない）
+        
+        Args:
+            index: チャンク番号
+            entries: 計算対象のエントリ
+            year: 年
+            month: 月
+            now: 計算基準時刻（JST）
+            close_connections: ワーカースレッドで実行する場合True（終了時にDB接続を閉じる）
+        
+        Returns:
+            {'index', 'size', 'elapsed', 'entries', 'errors'}
+        """
+        started = time.perf_counter()
+        updated_entries = []
+        errors = []
+        try:
+            for entry in entries:
+                try:
+                    daily_minutes = self._calculate_daily_minutes(entry.user, year, month, now.date())
+                except Exception as e:
+                    errors.append({'user': entry.user.name, 'error': str(e)})
+                    continue
+                entry.cached_daily_minutes = daily_minutes
+                entry.total_minutes = daily_minutes.total()
+                entry.last_updated = now
+                updated_entries.append(entry)
+        finally:
+            if close_connections:
+                connections.close_all()
+        
+        return {
+            'index': index,
+            'size': len(entries),
+            'elapsed': time.perf_counter() - started,
+            'entries': updated_entries,
+            'errors': errors,
+        }
+    
+    def _calculate_daily_minutes(self, user, year: int, month: int, today: date) -> DailyMinutes:
+        """
+        月初から今日（または月末）までの日別労働時間を計算する
+        
+        Args:
+            user: ユーザーオブジェクト
+            year: 年
+            month: 月
+            today: 基準日（JST）
+        
+        Returns:
+            DailyMinutes: 日別労働時間（分）
+        """
+        month_start = date(year, month, 1)
         last_day_of_month = calendar.monthrange(year, month)[1]
         month_end = date(year, month, last_day_of_month)
         
         # 今日か月末のどちらか早い方まで計算
         end_date = min(today, month_end)
         
-        # キャッシュデータを初期化
-        cached_data = {}
+        daily_minutes = DailyMinutes()
+        if end_date < month_start:
+            return daily_minutes
         
-        # 月初から指定期間の日付を計算
-        current_date = month_start
-        while current_date <= end_date:
-            daily_summary = service.get_daily_summary(current_date)
-            if daily_summary['work_hours'] > 0:
-                # 日付をキーとして分数を保存
-                minutes = int(daily_summary['work_time'].total_seconds() / 60)
-                cached_data[str(current_date.day)] = minutes
-            
-            current_date += timedelta(days=1)
+        # 月初から終了日までの打刻を1回のクエリで取得して日別に集計
+        for work_date, minutes in WorkTimeService(user).get_daily_work_minutes(month_start, end_date).items():
+            daily_minutes[work_date.day] = minutes
         
-        # 合計時間を計算
-        total_minutes = sum(cached_data.values())
+        return daily_minutes
+    
+    def is_month_closed(self, year: int, month: int) -> bool:
+        """指定年月が締め済み（スナップショット作成済み）かどうか"""
+        # 締められるのは過去の月のみのため、当月はクエリを発行しない
+        if not is_past_month(year, month):
+            return False
+        return LeaderboardSnapshot.objects.filter(year=year, month=month).exists()
+    
+    def _month_busy_error(self, year: int, month: int, error: Exception) -> Dict[str, Any]:
+        """月単位のロックを取得できなかった場合のエラー"""
+        return {
+            'success': False,
+            'status': 'busy',
+            'error': str(error),
+            'year': year,
+            'month': month,
+        }
+    
+    def _month_closed_error(self, year: int, month: int) -> Dict[str, Any]:
+        """締め済みの月に対する再計算を拒否するエラーレスポンス"""
+        return {
+            'success': False,
+            'status': 'month_closed',
+            'error': f'{year}年{month}月のランキングは締め済みです。再計算するには締めを解除してください。',
+            'year': year,
+            'month': month,
+        }
+    
+    def close_month(self, year: int, month: int, closed_by=None, recalculate: bool = True) -> Dict[str, Any]:
+        """
+        終了した月のランキングを締め、変更不可のスナップショットとして凍結する
         
-        # エントリを更新（last_updatedも現在時刻で更新）
-        entry.cached_daily_minutes = cached_data
-        entry.total_minutes = total_minutes
-        entry.last_updated = now
-        entry.save()
+        Args:
+            year: 年
+            month: 月
+            closed_by: 締め処理を行ったユーザー
+            recalculate: Trueの場合、凍結前に全エントリを完全再計算する
         
-        return entry, {
+        Returns:
+            処理結果の辞書
+        """
+        if not is_past_month(year, month):
+            return {
+                'success': False,
+                'status': 'month_not_finished',
+                'error': f'{year}年{month}月はまだ終了していないため締められません。',
+            }
+        if self.is_month_closed(year, month):
+            return {
+                'success': False,
+                'status': 'already_closed',
+                'error': f'{year}年{month}月のランキングは既に締め済みです。',
+            }
+        
+        if recalculate:
+            recalculation = self.recalculate_month_from_scratch(year, month)
+            if not recalculation['success']:
+                return recalculation
+            if recalculation['error_count']:
+                return {
+                    'success': False,
+                    'status': 'recalculation_error',
+                    'error': f'再計算で{recalculation["error_count"]}件のエラーが発生したため締めを中止しました。',
+                }
+        
+        entries = LeaderboardEntry.objects.filter(
+            year=year,
+            month=month
+        ).select_related('user').order_by('rank', '-total_minutes')
+        
+        rows = []
+        daily_minutes = []
+        for entry in entries:
+            rows.append([
+                entry.user_id,
+                entry.user.name,
+                entry.rank,
+                entry.total_minutes,
+                entry.joined_at.astimezone(self.jst).isoformat(),
+            ])
+            daily_minutes.append(entry.cached_daily_minutes.as_list())
+        
+        with transaction.atomic():
+            snapshot = LeaderboardSnapshot.objects.create(
+                year=year,
+                month=month,
+                closed_by=closed_by,
+                participant_count=len(rows),
+                rows=rows,
+                daily_minutes=daily_minutes,
+            )
+            transaction.on_commit(lambda: bump_ranking_version(year, month))
+        
+        return {
             'success': True,
-            'status': 'recalculated_from_scratch',
-            'message': f'{user.name}の労働時間を完全再計算しました。'
-        }
\ No newline at end of file
+            'status': 'closed_month',
+            'message': f'{year}年{month}月のランキングを締めました（{snapshot.participant_count}人）。',
+        }
+    
+    def reopen_month(self, year: int, month: int) -> Dict[str, Any]:
+        """
+        締め済みの月のスナップショットを破棄し、再計算できる状態に戻す
+        
+        Args:
+            year: 年
+            month: 月
+        
+        Returns:
+            処理結果の辞書
+        """
+        deleted, _ = LeaderboardSnapshot.objects.filter(year=year, month=month).delete()
+        if not deleted:
+            return {
+                'success': False,
+                'status': 'not_closed',
+                'error': f'{year}年{month}月のランキングは締められていません。',
+            }
+        
+        transaction.on_commit(lambda: bump_ranking_version(year, month))
+        return {
+            'success': True,
+            'status': 'reopened_month',
+            'message': f'{year}年{month}月のランキングの締めを解除しました。',
+        }
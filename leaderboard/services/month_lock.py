@@ -0,0 +1,277 @@
+"""
+年月単位のランキング更新ロックとシングルフライト実行
+
+同じ年月の順位を書き換える処理（全体の順位付け・打刻による差分更新など）が
+同時に走ると、重複計算や rank の競合が起きるため、年月ごとに1つのロックで直列化する。
+
+ロック方式:
+- PostgreSQL: アドバイザリーロック（トランザクション内ではコミットまで保持）
+- その他: LeaderboardLock テーブルの行（期限付き。トランザクション内ではコミット後に解放）
+
+排他とシングルフライトが保証されるのは PostgreSQL のみ。
+ロックテーブル方式でトランザクション内から取得した場合、ロックの行は呼び出し元のトランザクション内で
+作成されるため、コミットまで他の接続からは見えない。その間の排他は、同じキーの行の作成を
+データベースが待たせること（SQLiteのデータベースロック、MySQLの一意インデックスのロック）に依存する。
+
+シングルフライト:
+- 最初の呼び出しだけが計算し、同時に待っていた呼び出しは、
+  自分の呼び出し以降に開始された計算の結果を再利用する
+"""
+
+from contextlib import contextmanager
+from datetime import timedelta
+import logging
+import threading
+import time
+from typing import Any, Callable
+import uuid
+
+from django.core.cache import cache
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.utils import timezone
+
+from ..models import LeaderboardLock
+
+logger = logging.getLogger(__name__)
+
+# アドバイザリーロックの名前空間（'LB'）
+ADVISORY_LOCK_NAMESPACE = 0x4C42
+
+# ロック待ちの上限（秒）
+LOCK_WAIT_SECONDS = 10
+
+# ロック取得を再試行する間隔（秒）
+POLL_INTERVAL = 0.05
+
+# ロックテーブル方式で、保持者が異常終了した場合に失効させるまでの時間（秒）
+LEASE_SECONDS = 300
+
+# シングルフライトの結果を待機者向けに保持する時間（秒）
+RESULT_TIMEOUT = 60
+
+RESULT_KEY = 'leaderboard:flight:{name}:{year}:{month}'
+
+# ロック待ちを表すデータベースのエラーコード
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+MYSQL_LOCK_ERRORS = (1205, 1213)  # ロック待ちのタイムアウト・デッドロック
+
+# スレッドごとに保持中のロック（同一スレッド内での再取得を許可する）
+_held = threading.local()
+
+
+class MonthLockTimeout(Exception):
+    """ロックを待機時間内に取得できなかった場合の例外"""
+
+
+class MonthLock:
+    """
+    年月単位の排他ロック
+
+    同一スレッド内では再入可能。
+    トランザクション内で取得した場合は、コミット（またはロールバック）まで保持する
+    """
+
+    def __init__(self, year: int, month: int):
+        self.year = year
+        self.month = month
+        self.owner = uuid.uuid4().hex
+        self._transactional = False
+
+    @property
+    def _key(self):
+        return (self.year, self.month)
+
+    def _held_locks(self) -> dict:
+        if not hasattr(_held, 'locks'):
+            _held.locks = {}
+        return _held.locks
+
+    @staticmethod
+    def _current_transaction():
+        """現在の最も外側のトランザクション（atomicブロック）。トランザクション外ではNone"""
+        return connection.atomic_blocks[0] if connection.in_atomic_block else None
+
+    def try_acquire(self) -> bool:
+        """
+        ロックの取得を1回試みる
+
+        Returns:
+            bool: 取得できた場合True
+        """
+        held = self._held_locks()
+        state = held.get(self._key)
+        if state is not None:
+            # 保持中、または同じトランザクション内で解放待ちのロックは再取得できる
+            if state['count'] > 0 or state['transaction'] is self._current_transaction():
+                state['count'] += 1
+                return True
+            # ロールバック等でコミット時の解放が実行されなかったもの
+            del held[self._key]
+
+        transaction_block = self._current_transaction()
+        self._transactional = transaction_block is not None
+        if connection.vendor == 'postgresql':
+            acquired = self._try_advisory_lock()
+        else:
+            acquired = self._try_lock_row()
+
+        if acquired:
+            held[self._key] = {'count': 1, 'transaction': transaction_block, 'owner': self.owner}
+        return acquired
+
+    def acquire(self, timeout: float = LOCK_WAIT_SECONDS) -> None:
+        """
+        ロックを取得するまで待機する
+
+        Raises:
+            MonthLockTimeout: 待機時間内に取得できなかった場合
+        """
+        deadline = time.monotonic() + timeout
+        while not self.try_acquire():
+            if time.monotonic() >= deadline:
+                raise MonthLockTimeout(f'{self.year}年{self.month}月のランキングは更新中です')
+            time.sleep(POLL_INTERVAL)
+
+    def release(self) -> None:
+        """ロックを解放する（トランザクション内で取得した場合は終了時に解放される）"""
+        held = self._held_locks()
+        state = held[self._key]
+        state['count'] -= 1
+        if state['count'] > 0:
+            return
+
+        if state['transaction'] is None:
+            del held[self._key]
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT pg_advisory_unlock(%s, %s)',
+                        [ADVISORY_LOCK_NAMESPACE, self._advisory_key()]
+                    )
+            else:
+                self._delete_lock_row(state['owner'])
+            return
+
+        # トランザクション内で取得したロックは、他の処理から変更が見えるコミット時まで保持する
+        # （アドバイザリーロックはトランザクション終了時に自動で解放される）
+        def release_on_commit():
+            held.pop(self._key, None)
+            if connection.vendor != 'postgresql':
+                self._delete_lock_row(state['owner'])
+
+        transaction.on_commit(release_on_commit)
+
+    def _advisory_key(self) -> int:
+        return self.year * 100 + self.month
+
+    def _try_advisory_lock(self) -> bool:
+        function = 'pg_try_advisory_xact_lock' if self._transactional else 'pg_try_advisory_lock'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT {function}(%s, %s)',
+                [ADVISORY_LOCK_NAMESPACE, self._advisory_key()]
+            )
+            return bool(cursor.fetchone()[0])
+
+    def _try_lock_row(self) -> bool:
+        now = timezone.now()
+        try:
+            # 失効したロック（保持者の異常終了）を取り除く
+            LeaderboardLock.objects.filter(
+                year=self.year,
+                month=self.month,
+                expires_at__lt=now
+            ).delete()
+            with transaction.atomic():
+                LeaderboardLock.objects.create(
+                    year=self.year,
+                    month=self.month,
+                    owner=self.owner,
+                    expires_at=now + timedelta(seconds=LEASE_SECONDS)
+                )
+        except IntegrityError:
+            return False
+        except OperationalError as e:
+            # 他の接続の書き込み中でロックの行を作成できない場合は、取得失敗として再試行する
+            if _is_lock_contention(e):
+                return False
+            raise
+        return True
+
+    def _delete_lock_row(self, owner: str) -> None:
+        LeaderboardLock.objects.filter(year=self.year, month=self.month, owner=owner).delete()
+
+
+def _is_lock_contention(error: OperationalError) -> bool:
+    """他の接続の書き込みと競合して待たされた（ロック待ちの）エラーかどうか"""
+    cause = error.__cause__
+    if connection.vendor == 'sqlite':
+        # 拡張エラーコードの下位8ビットが基本のエラーコード
+        return (getattr(cause, 'sqlite_errorcode', 0) & 0xFF) in (SQLITE_BUSY, SQLITE_LOCKED)
+    if connection.vendor == 'mysql':
+        return bool(getattr(cause, 'args', None)) and cause.args[0] in MYSQL_LOCK_ERRORS
+    return False
+
+
+@contextmanager
+def month_lock(year: int, month: int, timeout: float = LOCK_WAIT_SECONDS):
+    """
+    年月単位のロックを取得して処理を実行するコンテキストマネージャー
+
+    Raises:
+        MonthLockTimeout: 待機時間内に取得できなかった場合
+    """
+    lock = MonthLock(year, month)
+    lock.acquire(timeout)
+    try:
+        yield lock
+    finally:
+        lock.release()
+
+
+def run_single_flight(name: str, year: int, month: int, func: Callable[[], Any],
+                      timeout: float = LOCK_WAIT_SECONDS) -> Any:
+    """
+    年月ごとに同じ処理を1つだけ実行し、同時に待っていた呼び出しには結果を共有する
+
+    呼び出し時刻より後に開始された計算の結果があれば、それを再利用する
+    （呼び出し前に開始された計算は、呼び出し元の変更を含まない可能性があるため再利用しない）
+
+    Args:
+        name: 処理名（結果の共有単位）
+        year: 年
+        month: 月
+        func: 実行する処理
+        timeout: ロック待ちの上限（秒）
+
+    Raises:
+        MonthLockTimeout: 待機時間内に取得も結果の再利用もできなかった場合
+    """
+    key = RESULT_KEY.format(name=name, year=year, month=month)
+    requested_at = time.time()
+    deadline = time.monotonic() + timeout
+    lock = MonthLock(year, month)
+
+    while True:
+        if lock.try_acquire():
+            try:
+                shared = cache.get(key)
+                if shared is not None and shared['started_at'] >= requested_at:
+                    return shared['result']
+
+                started_at = time.time()
+                result = func()
+                cache.set(key, {'started_at': started_at, 'result': result}, RESULT_TIMEOUT)
+                return result
+            finally:
+                lock.release()
+
+        shared = cache.get(key)
+        if shared is not None and shared['started_at'] >= requested_at:
+            logger.debug(f"Single flight {name} {year}-{month}: reused concurrent result")
+            return shared['result']
+
+        if time.monotonic() >= deadline:
+            raise MonthLockTimeout(f'{year}年{month}月のランキングは更新中です')
+        time.sleep(POLL_INTERVAL)
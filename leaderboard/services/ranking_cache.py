@@ -0,0 +1,246 @@
+"""
+ランキングの読み取りキャッシュ
+
+年月ごとの順位一覧をバージョンキー付きでキャッシュする。
+順位・合計時間が変わるたびにバージョンを更新するため、古いキャッシュは参照されなくなる。
+バージョンは最終更新時刻（ミリ秒）を兼ねており、ETag / Last-Modified の生成に使用する。
+"""
+
+from bisect import bisect_right
+import calendar
+from datetime import datetime, timezone as dt_timezone
+from itertools import accumulate
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import Signal
+from django.utils import timezone
+from zoneinfo import ZoneInfo
+
+from core.cache_versions import bump_cache_version, get_cache_version
+
+from ..models import LeaderboardEntry, LeaderboardSnapshot
+
+
+VERSION_KEY = 'leaderboard:version:{year}:{month}'
+RANKING_KEY = 'leaderboard:ranking:{year}:{month}:{version}'
+TRAJECTORY_KEY = 'leaderboard:trajectory:{year}:{month}:{version}'
+SNAPSHOT_KEY = 'leaderboard:snapshot:{year}:{month}:{version}'
+
+# 当月のランキングはバージョン更新で無効化されるため、期限は掃除用の目安
+CURRENT_MONTH_TIMEOUT = 60 * 60 * 24
+
+# バージョン更新の通知（year, month, version を送る）
+ranking_version_changed = Signal()
+
+
+def is_past_month(year: int, month: int, now: Optional[datetime] = None) -> bool:
+    """
+    指定年月が過去の月（当月より前）かどうかを判定
+
+    Args:
+        year: 年
+        month: 月
+        now: 基準時刻（Noneの場合は現在時刻）
+
+    Returns:
+        bool: 過去の月の場合True
+    """
+    now = now or timezone.now().astimezone(ZoneInfo(settings.TIME_ZONE))
+    return (year, month) < (now.year, now.month)
+
+
+def get_ranking_version(year: int, month: int) -> int:
+    """
+    指定年月のランキングバージョンを取得（未設定の場合は現在時刻で初期化）
+
+    Returns:
+        int: バージョン（最終更新時刻のUNIXミリ秒）
+    """
+    return get_cache_version(VERSION_KEY.format(year=year, month=month))
+
+
+def bump_ranking_version(year: int, month: int) -> int:
+    """
+    指定年月のランキングバージョンを更新する
+
+    順位・合計時間・参加者が変わったときに呼び出す
+
+    Returns:
+        int: 更新後のバージョン
+    """
+    version = bump_cache_version(VERSION_KEY.format(year=year, month=month))
+    ranking_version_changed.send(sender=None, year=year, month=month, version=version)
+    return version
+
+
+def get_ranking_last_modified(year: int, month: int) -> datetime:
+    """
+    ランキングの最終更新時刻を取得（Last-Modifiedヘッダー用）
+    """
+    version = get_ranking_version(year, month)
+    return datetime.fromtimestamp(version / 1000, tz=dt_timezone.utc)
+
+
+def entry_to_row(entry: LeaderboardEntry, jst: ZoneInfo) -> Dict[str, Any]:
+    """エントリを順位一覧の行（辞書）に変換"""
+    return {
+        'user_id': entry.user_id,
+        'user_name': entry.user.name,
+        'rank': entry.rank,
+        'total_minutes': entry.total_minutes,
+        'total_hours_display': entry.total_hours_display,
+        'joined_at': entry.joined_at.astimezone(jst).isoformat(),
+        'last_updated': entry.last_updated.astimezone(jst).isoformat(),
+    }
+
+
+def get_snapshot_rows(year: int, month: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    締め済みの月の順位一覧をスナップショットから取得（キャッシュ優先）
+
+    Returns:
+        順位順の辞書リスト（締められていない月はNone）
+    """
+    # 当月以降は締められることがない
+    if not is_past_month(year, month):
+        return None
+
+    key = SNAPSHOT_KEY.format(year=year, month=month, version=get_ranking_version(year, month))
+    rows = cache.get(key)
+    if rows is not None:
+        return rows or None
+
+    snapshot = LeaderboardSnapshot.objects.filter(year=year, month=month).first()
+    rows = snapshot.as_ranked_rows() if snapshot is not None else []
+    # 締められていない月も「なし」として記録し、同じバージョンの間は再確認しない
+    cache.set(key, rows, None if snapshot is not None else CURRENT_MONTH_TIMEOUT)
+    return rows or None
+
+
+def get_ranked_entries(year: int, month: int) -> List[Dict[str, Any]]:
+    """
+    指定年月の順位一覧を取得（キャッシュ優先）
+
+    締め済みの月はスナップショットから、それ以外はエントリから作成する。
+    過去の月は変化しないため無期限でキャッシュする
+
+    Returns:
+        順位順のエントリ辞書のリスト
+    """
+    version = get_ranking_version(year, month)
+    key = RANKING_KEY.format(year=year, month=month, version=version)
+    rows = cache.get(key)
+    if rows is not None:
+        return rows
+
+    # 締め済みの月はスナップショットから提供する
+    rows = get_snapshot_rows(year, month)
+    if rows is not None:
+        return rows
+
+    jst = ZoneInfo(settings.TIME_ZONE)
+    entries = LeaderboardEntry.objects.filter(
+        year=year,
+        month=month
+    ).select_related('user').order_by('rank', '-total_minutes')
+
+    rows = [entry_to_row(entry, jst) for entry in entries]
+
+    timeout = None if is_past_month(year, month) else CURRENT_MONTH_TIMEOUT
+    cache.set(key, rows, timeout)
+    return rows
+
+
+def _competition_ranks(values: List[int]) -> List[int]:
+    """
+    値の降順で順位を付ける（同値は同順位、次の順位は人数分飛ばす: 1, 1, 3）
+    """
+    ascending = sorted(values)
+    count = len(values)
+    return [count - bisect_right(ascending, value) + 1 for value in values]
+
+
+def build_rank_trajectory(participants: List[Dict[str, Any]],
+                          daily_matrix: List[List[int]]) -> Dict[str, List]:
+    """
+    参加者×日の労働時間行列から、日ごとの累計時間と順位の推移を算出
+
+    Args:
+        participants: 参加者（行列の行と同じ順序）
+        daily_matrix: 参加者ごとの日別労働時間（分）のリスト
+
+    Returns:
+        {'participants', 'cumulative', 'ranks'} の辞書。
+        cumulative / ranks は参加者ごとの日別リスト
+    """
+    cumulative = [list(accumulate(row)) for row in daily_matrix]
+    day_count = len(daily_matrix[0]) if daily_matrix else 0
+
+    # 日（列）ごとに順位付けし、参加者（行）ごとに並べ直す
+    rank_columns = [
+        _competition_ranks([row[day] for row in cumulative])
+        for day in range(day_count)
+    ]
+    ranks = [list(row) for row in zip(*rank_columns)] if rank_columns else [[] for _ in cumulative]
+
+    return {
+        'participants': participants,
+        'cumulative': cumulative,
+        'ranks': ranks,
+    }
+
+
+def get_rank_trajectory(year: int, month: int) -> Dict[str, Any]:
+    """
+    指定年月の日別順位推移を取得（キャッシュ優先）
+
+    締め済みの月はスナップショットの日別労働時間から、
+    それ以外はエントリの cached_daily_minutes から作成する。
+    当月は今日までの日数分のみを返す
+
+    Returns:
+        参加者（最終順位順）と日別の累計時間・順位を持つ辞書
+    """
+    version = get_ranking_version(year, month)
+    key = TRAJECTORY_KEY.format(year=year, month=month, version=version)
+    trajectory = cache.get(key)
+    if trajectory is not None:
+        return trajectory
+
+    past_month = is_past_month(year, month)
+    if past_month:
+        day_count = calendar.monthrange(year, month)[1]
+    else:
+        day_count = timezone.now().astimezone(ZoneInfo(settings.TIME_ZONE)).day
+
+    snapshot = LeaderboardSnapshot.objects.filter(year=year, month=month).first()
+    if snapshot is not None:
+        participants = [
+            {'user_id': user_id, 'user_name': user_name}
+            for user_id, user_name, _rank, _total, _joined_at in snapshot.rows
+        ]
+        daily_matrix = [row[:day_count] for row in snapshot.daily_minutes]
+    else:
+        entries = LeaderboardEntry.objects.filter(
+            year=year,
+            month=month
+        ).select_related('user').order_by('rank', '-total_minutes')
+        participants = []
+        daily_matrix = []
+        for entry in entries:
+            participants.append({'user_id': entry.user_id, 'user_name': entry.user.name})
+            daily_matrix.append(entry.cached_daily_minutes.as_list(day_count))
+
+    trajectory = {
+        'year': year,
+        'month': month,
+        'version': version,
+        'days': list(range(1, day_count + 1)),
+        **build_rank_trajectory(participants, daily_matrix),
+    }
+
+    timeout = None if past_month else CURRENT_MONTH_TIMEOUT
+    cache.set(key, trajectory, timeout)
+    return trajectory
@@ -0,0 +1,355 @@
+"""
+ランキングの指標（合計労働時間以外の並び替え基準）
+
+指標は日別労働時間から算出する値として登録する。
+1か月分の集計（合計・出勤日数・最長連続出勤日数）は日別労働時間を1回走査して求め、
+各指標はその集計結果から値を取り出すだけにする。
+値と順位は LeaderboardMetric に指標ごとに保存し、順位付けはウィンドウ関数（RANK）で行う。
+合計労働時間は従来どおり LeaderboardEntry.total_minutes / rank を使う。
+締め済みの月は、どの指標もスナップショットの日別労働時間から算出する。
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import Rank
+
+from ..fields import DailyMinutes
+from ..models import LeaderboardEntry, LeaderboardMetric, LeaderboardSnapshot
+from .ranking_cache import (
+    CURRENT_MONTH_TIMEOUT,
+    get_ranked_entries,
+    get_ranking_version,
+    is_past_month,
+)
+
+METRIC_KEY = 'leaderboard:metric:{year}:{month}:{metric}:{version}'
+
+# LeaderboardEntry に保存している既定の指標
+DEFAULT_METRIC = 'total_minutes'
+
+
+@dataclass(frozen=True)
+class MonthSummary:
+    """日別労働時間を1回走査して得た1か月分の集計"""
+
+    total_minutes: int
+    worked_days: int
+    longest_streak: int
+
+
+def summarize_daily_minutes(daily_minutes: DailyMinutes) -> MonthSummary:
+    """
+    日別労働時間を1回走査して、合計・出勤日数・最長連続出勤日数を求める
+    """
+    total = 0
+    worked_days = 0
+    streak = 0
+    longest_streak = 0
+    for minutes in daily_minutes.as_list():
+        if minutes:
+            total += minutes
+            worked_days += 1
+            streak += 1
+            if streak > longest_streak:
+                longest_streak = streak
+        else:
+            streak = 0
+    return MonthSummary(total_minutes=total, worked_days=worked_days, longest_streak=longest_streak)
+
+
+def _format_minutes(value: int) -> str:
+    return f"{value // 60}時間{value % 60}分"
+
+
+def _format_days(value: int) -> str:
+    return f"{value}日"
+
+
+@dataclass(frozen=True)
+class RankingMetric:
+    """ランキングの指標（値が大きいほど上位）"""
+
+    name: str
+    label: str
+    value: Callable[[MonthSummary], int]
+    display: Callable[[int], str]
+
+
+METRICS: Dict[str, RankingMetric] = {}
+
+
+def register_metric(metric: RankingMetric) -> RankingMetric:
+    """指標を登録する（次回のランキング更新から値と順位が保存される）"""
+    METRICS[metric.name] = metric
+    return metric
+
+
+register_metric(RankingMetric(
+    name=DEFAULT_METRIC,
+    label='合計労働時間',
+    value=lambda summary: summary.total_minutes,
+    display=_format_minutes,
+))
+register_metric(RankingMetric(
+    name='worked_days',
+    label='出勤日数',
+    value=lambda summary: summary.worked_days,
+    display=_format_days,
+))
+register_metric(RankingMetric(
+    name='longest_streak',
+    label='最長連続出勤日数',
+    value=lambda summary: summary.longest_streak,
+    display=_format_days,
+))
+register_metric(RankingMetric(
+    name='average_daily_minutes',
+    label='1日あたりの平均労働時間',
+    value=lambda summary: summary.total_minutes // summary.worked_days if summary.worked_days else 0,
+    display=_format_minutes,
+))
+
+
+def get_metric(name: str) -> RankingMetric:
+    """
+    登録済みの指標を取得
+
+    Raises:
+        ValueError: 未登録の指標の場合
+    """
+    try:
+        return METRICS[name]
+    except KeyError:
+        raise ValueError(f'不明な指標です: {name}') from None
+
+
+def stored_metrics() -> List[RankingMetric]:
+    """LeaderboardMetric に保存する指標（合計労働時間以外）"""
+    return [metric for name, metric in METRICS.items() if name != DEFAULT_METRIC]
+
+
+def calculate_metric_values(daily_minutes: DailyMinutes) -> Dict[str, int]:
+    """1エントリ分の全指標の値を算出"""
+    summary = summarize_daily_minutes(daily_minutes)
+    return {metric.name: metric.value(summary) for metric in stored_metrics()}
+
+
+def rank_metrics(year: int, month: int, entries: Optional[Iterable[LeaderboardEntry]] = None) -> int:
+    """
+    指標の値を保存し、指標ごとの順位を付け直す
+
+    値は entries（Noneの場合は指定年月の全エントリ）について再計算する。
+    順位は、全エントリの場合は全指標をウィンドウ関数で算出し、
+    entries を指定した場合は値が変わった指標だけを更新する（1エントリなら差分更新）。
+    月単位のロック内（ランキング更新処理）から呼び出す
+
+    Args:
+        year: 年
+        month: 月
+        entries: 値を再計算するエントリ
+
+    Returns:
+        int: 値または順位が変わった行数
+    """
+    names = [metric.name for metric in stored_metrics()]
+    existing_rows = LeaderboardMetric.objects.filter(year=year, month=month, metric__in=names)
+    if entries is None:
+        entries = LeaderboardEntry.objects.filter(
+            year=year,
+            month=month
+        ).only('id', 'user_id', 'cached_daily_minutes')
+        incremental = False
+    else:
+        entries = list(entries)
+        existing_rows = existing_rows.filter(entry__in=[entry.pk for entry in entries])
+        incremental = True
+
+    existing = {
+        (row.entry_id, row.metric): row
+        for row in existing_rows.only('id', 'entry_id', 'metric', 'value', 'rank')
+    }
+
+    created = []
+    changed = []
+    previous_values = {}
+    for entry in entries:
+        for name, value in calculate_metric_values(entry.cached_daily_minutes).items():
+            row = existing.get((entry.pk, name))
+            if row is None:
+                created.append(LeaderboardMetric(
+                    entry_id=entry.pk, user_id=entry.user_id,
+                    year=year, month=month, metric=name, value=value
+                ))
+            elif row.value != value:
+                previous_values[row.pk] = row.value
+                row.value = value
+                changed.append(row)
+
+    created = LeaderboardMetric.objects.bulk_create(created, batch_size=500)
+    LeaderboardMetric.objects.bulk_update(changed, ['value'], batch_size=500)
+
+    if not incremental:
+        reranked = _rerank(year, month, names)
+    elif len(entries) == 1 and all(row.pk is not None for row in created):
+        reranked = sum(
+            _reposition_metric(row, previous_values.get(row.pk)) for row in created + changed
+        )
+    else:
+        reranked = _rerank(year, month, sorted({row.metric for row in created + changed}))
+
+    return len(created) + len(changed) + reranked
+
+
+def _rerank(year: int, month: int, names: List[str]) -> int:
+    """指定した指標の順位をウィンドウ関数で付け直し、変わった行数を返す"""
+    if not names:
+        return 0
+
+    # 指標ごと（metricで区切って）に値の降順で順位を付ける（同値は同順位: 1, 1, 3）
+    ranked = LeaderboardMetric.objects.filter(
+        year=year,
+        month=month,
+        metric__in=names
+    ).annotate(
+        new_rank=Window(
+            expression=Rank(),
+            partition_by=[F('metric')],
+            order_by=F('value').desc()
+        )
+    ).only('id', 'rank')
+
+    reranked = []
+    for row in ranked:
+        if row.rank != row.new_rank:
+            row.rank = row.new_rank
+            reranked.append(row)
+    LeaderboardMetric.objects.bulk_update(reranked, ['rank'], batch_size=500)
+    return len(reranked)
+
+
+def _reposition_metric(row: LeaderboardMetric, previous_value: Optional[int]) -> int:
+    """
+    値が変わった1行（または新しい行）をその指標の順位の中で移動させる
+
+    順位は「自分より値が大きい参加者数 + 1」なので、影響を受けるのは
+    旧値と新値の間にいる行だけとなる（LeaderboardService._reposition_entry と同じ考え方）
+
+    Args:
+        row: 値を保存済みの行
+        previous_value: 更新前の値（新しい行の場合はNone）
+
+    Returns:
+        int: 順位を更新した行数
+    """
+    others = LeaderboardMetric.objects.filter(
+        year=row.year,
+        month=row.month,
+        metric=row.metric
+    ).exclude(pk=row.pk)
+
+    # 未採番の行がある場合は差分更新できないため、この指標全体を付け直す
+    if (previous_value is not None and row.rank is None) or others.filter(rank__isnull=True).exists():
+        return _rerank(row.year, row.month, [row.metric])
+
+    shifted = 0
+    if previous_value is None:
+        # 追加された行より値が小さい参加者は1つ順位が下がる
+        shifted = others.filter(value__lt=row.value).update(rank=F('rank') + 1)
+    elif row.value > previous_value:
+        shifted = others.filter(value__gte=previous_value, value__lt=row.value).update(rank=F('rank') + 1)
+    elif row.value < previous_value:
+        shifted = others.filter(value__gte=row.value, value__lt=previous_value).update(rank=F('rank') - 1)
+
+    rank = others.filter(value__gt=row.value).count() + 1
+    if rank != row.rank:
+        row.rank = rank
+        row.save(update_fields=['rank'])
+        shifted += 1
+    return shifted
+
+
+def get_metric_ranking(year: int, month: int, metric: str) -> List[Dict[str, Any]]:
+    """
+    指定した指標での順位一覧を取得（キャッシュ優先）
+
+    合計労働時間は通常の順位一覧から、それ以外は LeaderboardMetric から
+    (year, month, metric, rank) インデックスで1回だけ読み込む。
+    締め済みの月は、締め後に変わり得る LeaderboardMetric ではなくスナップショットから算出する
+
+    Returns:
+        順位順の辞書リスト（user_id, user_name, rank, value, value_display）
+
+    Raises:
+        ValueError: 未登録の指標の場合
+    """
+    definition = get_metric(metric)
+    if metric == DEFAULT_METRIC:
+        return [
+            {
+                'user_id': row['user_id'],
+                'user_name': row['user_name'],
+                'rank': row['rank'],
+                'value': row['total_minutes'],
+                'value_display': row['total_hours_display'],
+            }
+            for row in get_ranked_entries(year, month)
+        ]
+
+    version = get_ranking_version(year, month)
+    key = METRIC_KEY.format(year=year, month=month, metric=metric, version=version)
+    rows = cache.get(key)
+    if rows is not None:
+        return rows
+
+    snapshot = None
+    if is_past_month(year, month):
+        snapshot = LeaderboardSnapshot.objects.filter(year=year, month=month).first()
+    if snapshot is not None:
+        rows = _snapshot_metric_rows(snapshot, definition)
+        cache.set(key, rows, None)
+        return rows
+
+    metrics = LeaderboardMetric.objects.filter(
+        year=year,
+        month=month,
+        metric=metric
+    ).select_related('user').order_by('rank', 'user_id')
+
+    rows = [
+        {
+            'user_id': row.user_id,
+            'user_name': row.user.name,
+            'rank': row.rank,
+            'value': row.value,
+            'value_display': definition.display(row.value),
+        }
+        for row in metrics
+    ]
+
+    timeout = None if is_past_month(year, month) else CURRENT_MONTH_TIMEOUT
+    cache.set(key, rows, timeout)
+    return rows
+
+
+def _snapshot_metric_rows(snapshot: LeaderboardSnapshot, definition: RankingMetric) -> List[Dict[str, Any]]:
+    """スナップショットの日別労働時間から指標の値を算出し、値の降順で順位を付ける（同値は同順位）"""
+    values = [
+        (user_id, user_name, definition.value(summarize_daily_minutes(DailyMinutes(daily_minutes))))
+        for (user_id, user_name, *_), daily_minutes in zip(snapshot.rows, snapshot.daily_minutes)
+    ]
+    values.sort(key=lambda item: (-item[2], item[0]))
+
+    rows = []
+    for index, (user_id, user_name, value) in enumerate(values):
+        rank = rows[-1]['rank'] if rows and rows[-1]['value'] == value else index + 1
+        rows.append({
+            'user_id': user_id,
+            'user_name': user_name,
+            'rank': rank,
+            'value': value,
+            'value_display': definition.display(value),
+        })
+    return rows
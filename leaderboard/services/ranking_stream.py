@@ -0,0 +1,261 @@
+"""
+ランキングのリアルタイム配信（Server-Sent Events用）
+
+プロセス内のブロードキャスターが年月ごとの購読者（SSE接続）へイベントを配信する。
+イベントIDにはランキングバージョン（共有キャッシュ上のミリ秒タイムスタンプ）を使うため、
+再接続時の Last-Event-ID はどのワーカーでも解釈できる。
+履歴から差分を再現できない場合は snapshot イベントで読み直しを促す。
+
+配信方式（settings.LEADERBOARD_STREAM_BACKEND）:
+- 'local': 同一プロセス内のバージョン更新のみを配信する（単一ワーカー向け）
+- 'cache': 上記に加え、共有キャッシュのバージョンをプロセスごとに1本のタスクで監視し、
+  他ワーカーでの更新も配信する（複数ワーカー環境でのPub/Subの代替）
+"""
+
+import asyncio
+from collections import deque
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .ranking_cache import get_ranked_entries, get_ranking_version
+
+logger = logging.getLogger(__name__)
+
+# 再接続時に再送できるよう保持するイベント数（年月ごと）
+HISTORY_SIZE = 200
+
+# 購読者ごとのキューの上限（超えた場合は差分を破棄して再同期させる）
+QUEUE_SIZE = 100
+
+# キューが溢れたことを示すマーカー
+RESYNC = None
+
+STREAM_FIELDS = ('user_id', 'user_name', 'rank', 'total_minutes', 'total_hours_display')
+
+
+def _compact_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """配信用に必要な項目だけを残す"""
+    return {field: row[field] for field in STREAM_FIELDS}
+
+
+def build_changes(previous_rows: List[Dict[str, Any]],
+                  rows: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    前回の順位一覧との差分を算出
+
+    Returns:
+        (順位・労働時間が変わった行のリスト, 一覧から外れたユーザーIDのリスト)
+    """
+    previous = {row['user_id']: row for row in previous_rows}
+    changes = []
+    for row in rows:
+        before = previous.pop(row['user_id'], None)
+        if (before is None
+                or before['rank'] != row['rank']
+                or before['total_minutes'] != row['total_minutes']):
+            changes.append(_compact_row(row))
+    return changes, list(previous.keys())
+
+
+class RankingBroadcaster:
+    """
+    年月ごとのランキング変更をSSE接続へ配信するプロセス内ブロードキャスター
+
+    購読・配信はイベントループ上のasyncio.Queueで行い、
+    同期コード（on_commitなど）からの配信はcall_soon_threadsafeで受け渡す。
+    """
+
+    def __init__(self, history_size: int = HISTORY_SIZE, queue_size: int = QUEUE_SIZE):
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers: Dict[Tuple[int, int], Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._rows: Dict[Tuple[int, int], Tuple[int, List[Dict[str, Any]]]] = {}
+        self._history: Dict[Tuple[int, int], deque] = {}
+        self._watcher: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # 購読
+    # ------------------------------------------------------------------
+
+    def subscribe(self, year: int, month: int) -> asyncio.Queue:
+        """
+        指定年月の購読を開始（イベントループ上で呼び出す）
+
+        Returns:
+            イベントを受け取るキュー
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault((year, month), set()).add((loop, queue))
+        self._ensure_watcher(loop)
+        return queue
+
+    def unsubscribe(self, year: int, month: int, queue: asyncio.Queue) -> None:
+        """購読を終了"""
+        with self._lock:
+            subscribers = self._subscribers.get((year, month), set())
+            for item in [item for item in subscribers if item[1] is queue]:
+                subscribers.discard(item)
+            if not subscribers:
+                self._subscribers.pop((year, month), None)
+
+    def has_subscribers(self, year: int, month: int) -> bool:
+        with self._lock:
+            return bool(self._subscribers.get((year, month)))
+
+    def subscribed_months(self) -> List[Tuple[int, int]]:
+        with self._lock:
+            return [key for key, subscribers in self._subscribers.items() if subscribers]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    # ------------------------------------------------------------------
+    # 配信
+    # ------------------------------------------------------------------
+
+    def publish_version(self, year: int, month: int, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        ランキングバージョンの更新を購読者へ配信（同期コンテキストから呼び出す）
+
+        前回配信時の順位一覧との差分を1回だけ計算し、全購読者へ同じイベントを配信する。
+        既に配信済みのバージョン以下の場合は何もしない。
+
+        Returns:
+            配信したイベント（配信しなかった場合はNone）
+        """
+        key = (year, month)
+        if not self.has_subscribers(year, month):
+            return None
+
+        if version is None:
+            version = get_ranking_version(year, month)
+
+        with self._lock:
+            last_version, previous_rows = self._rows.get(key, (0, None))
+        if version <= last_version:
+            return None
+
+        rows = get_ranked_entries(year, month)
+        if previous_rows is None:
+            changes, removed = [_compact_row(row) for row in rows], []
+        else:
+            changes, removed = build_changes(previous_rows, rows)
+
+        event = {
+            'id': version,
+            'event': 'ranking',
+            'data': {
+                'year': year,
+                'month': month,
+                'version': version,
+                'participant_count': len(rows),
+                'changes': changes,
+                'removed': removed,
+            },
+        }
+
+        with self._lock:
+            # 別スレッドで新しいバージョンが先に配信された場合は破棄する
+            if version <= self._rows.get(key, (0, None))[0]:
+                return None
+            self._rows[key] = (version, rows)
+            self._history.setdefault(key, deque(maxlen=self.history_size)).append(event)
+            subscribers = list(self._subscribers.get(key, ()))
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # イベントループが終了済み
+                self.unsubscribe(year, month, queue)
+        return event
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Dict[str, Any]) -> None:
+        """キューへイベントを追加（溢れた場合は再同期を要求する）"""
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC)
+
+    # ------------------------------------------------------------------
+    # 再接続・初期表示
+    # ------------------------------------------------------------------
+
+    def replay(self, year: int, month: int, last_event_id: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Last-Event-ID以降のイベントを取得
+
+        Returns:
+            再送するイベントのリスト。履歴から再現できない場合はNone（再同期が必要）
+        """
+        with self._lock:
+            history = list(self._history.get((year, month), ()))
+            last_version = self._rows.get((year, month), (0, None))[0]
+
+        if last_event_id == last_version:
+            return []
+        for index, event in enumerate(history):
+            if event['id'] == last_event_id:
+                return history[index + 1:]
+        return None
+
+    def snapshot_event(self, year: int, month: int) -> Dict[str, Any]:
+        """
+        差分を再現できない購読者に送る再同期イベントを作成（同期コンテキストから呼び出す）
+
+        一覧全体は送らず、クライアントは部分取得APIで表示範囲を読み直す。
+        差分の基準がない購読者が現れた時点で、配信側の基準も現在の一覧に揃える
+        """
+        version = get_ranking_version(year, month)
+        rows = get_ranked_entries(year, month)
+        with self._lock:
+            if version > self._rows.get((year, month), (0, None))[0]:
+                self._rows[(year, month)] = (version, rows)
+        return {
+            'id': version,
+            'event': 'snapshot',
+            'data': {
+                'year': year,
+                'month': month,
+                'version': version,
+                'participant_count': len(rows),
+            },
+        }
+
+    # ------------------------------------------------------------------
+    # 他ワーカーの更新監視
+    # ------------------------------------------------------------------
+
+    def _ensure_watcher(self, loop: asyncio.AbstractEventLoop) -> None:
+        """共有キャッシュ監視タスクを起動（'cache'方式の場合のみ、プロセスごとに1本）"""
+        if getattr(settings, 'LEADERBOARD_STREAM_BACKEND', 'local') != 'cache':
+            return
+        if self._watcher is not None and not self._watcher.done():
+            return
+        self._watcher = loop.create_task(self._watch_versions())
+
+    async def _watch_versions(self) -> None:
+        """購読者がいる年月のバージョンを定期的に確認し、変化があれば配信する"""
+        interval = getattr(settings, 'LEADERBOARD_STREAM_POLL_SECONDS', 2.0)
+        while self.subscriber_count():
+            for year, month in self.subscribed_months():
+                try:
+                    version = await sync_to_async(get_ranking_version)(year, month)
+                    await sync_to_async(self.publish_version)(year, month, version)
+                except Exception as e:
+                    logger.error(f"Ranking stream watcher error: {year}-{month}, error={str(e)}", exc_info=True)
+            await asyncio.sleep(interval)
+
+
+broadcaster = RankingBroadcaster()
@@ -0,0 +1,211 @@
+"""
+ランキングの部分取得（上位N件・自分の前後K件・キーセットページング）
+
+参加者が多い場合でも一覧全体を読み込まないよう、
+(year, month, rank) インデックスを使って必要な範囲だけを取得する。
+並び順は (rank, user_id) で一意に定め、ページングのカーソルにも使う。
+締め済みの月はキャッシュ済みのスナップショットから切り出す。
+"""
+
+import base64
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from zoneinfo import ZoneInfo
+
+from ..models import LeaderboardEntry
+from .ranking_cache import (
+    CURRENT_MONTH_TIMEOUT,
+    entry_to_row,
+    get_ranking_version,
+    get_snapshot_rows,
+)
+
+PAGE_KEY = 'leaderboard:page:{year}:{month}:{version}:{cursor}:{limit}'
+COUNT_KEY = 'leaderboard:count:{year}:{month}:{version}'
+
+DEFAULT_TOP = 10
+DEFAULT_AROUND = 5
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MAX_AROUND = 50
+
+
+def encode_cursor(rank: int, user_id: int) -> str:
+    """(rank, user_id) をページング用の不透明なカーソル文字列に変換"""
+    return base64.urlsafe_b64encode(f'{rank}:{user_id}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """
+    カーソル文字列を (rank, user_id) に戻す
+
+    Raises:
+        ValueError: 不正なカーソルの場合
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        rank, user_id = base64.urlsafe_b64decode(padded.encode()).decode().split(':')
+        return int(rank), int(user_id)
+    except ValueError as e:
+        raise ValueError('不正なカーソルです') from e
+
+
+def _sort_key(row: Dict[str, Any]) -> Tuple[int, int]:
+    return row['rank'], row['user_id']
+
+
+def _ranked_queryset(year: int, month: int):
+    return LeaderboardEntry.objects.filter(
+        year=year,
+        month=month,
+        rank__isnull=False
+    ).select_related('user').order_by('rank', 'user_id')
+
+
+def _after(rank: int, user_id: int) -> Q:
+    """(rank, user_id) より後ろの行"""
+    return Q(rank__gt=rank) | Q(rank=rank, user_id__gt=user_id)
+
+
+def _before(rank: int, user_id: int) -> Q:
+    """(rank, user_id) より前の行"""
+    return Q(rank__lt=rank) | Q(rank=rank, user_id__lt=user_id)
+
+
+def _snapshot_sorted_rows(year: int, month: int) -> Optional[List[Dict[str, Any]]]:
+    rows = get_snapshot_rows(year, month)
+    if rows is None:
+        return None
+    return sorted(rows, key=_sort_key)
+
+
+def get_participant_count(year: int, month: int) -> int:
+    """指定年月の参加者数（バージョンごとにキャッシュ）"""
+    rows = get_snapshot_rows(year, month)
+    if rows is not None:
+        return len(rows)
+
+    key = COUNT_KEY.format(year=year, month=month, version=get_ranking_version(year, month))
+    count = cache.get(key)
+    if count is None:
+        count = LeaderboardEntry.objects.filter(year=year, month=month).count()
+        cache.set(key, count, CURRENT_MONTH_TIMEOUT)
+    return count
+
+
+def get_ranking_page(year: int, month: int, cursor: Optional[str] = None,
+                     limit: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    順位順の一覧をキーセットページングで取得
+
+    Args:
+        cursor: 前ページの next_cursor（Noneの場合は1位から）
+        limit: 取得件数
+
+    Returns:
+        {'entries': 行のリスト, 'next_cursor': 次ページのカーソル（最終ページはNone）}
+
+    Raises:
+        ValueError: 不正なカーソルの場合
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    position = decode_cursor(cursor) if cursor else None
+
+    rows = _snapshot_sorted_rows(year, month)
+    if rows is not None:
+        start = bisect_right([_sort_key(row) for row in rows], position) if position else 0
+        page = rows[start:start + limit + 1]
+    else:
+        version = get_ranking_version(year, month)
+        key = PAGE_KEY.format(year=year, month=month, version=version, cursor=cursor or '', limit=limit)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+        queryset = _ranked_queryset(year, month)
+        if position:
+            queryset = queryset.filter(_after(*position))
+        jst = ZoneInfo(settings.TIME_ZONE)
+        page = [entry_to_row(entry, jst) for entry in queryset[:limit + 1]]
+
+    has_next = len(page) > limit
+    page = page[:limit]
+    result = {
+        'entries': page,
+        'next_cursor': encode_cursor(*_sort_key(page[-1])) if has_next else None,
+    }
+
+    if rows is None:
+        cache.set(key, result, CURRENT_MONTH_TIMEOUT)
+    return result
+
+
+def get_user_ranking_row(year: int, month: int, user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    指定ユーザーの順位行を取得（参加していない場合はNone）
+    """
+    rows = get_snapshot_rows(year, month)
+    if rows is not None:
+        return next((row for row in rows if row['user_id'] == user_id), None)
+
+    entry = LeaderboardEntry.objects.filter(
+        year=year,
+        month=month,
+        user_id=user_id
+    ).select_related('user').first()
+    if entry is None:
+        return None
+    return entry_to_row(entry, ZoneInfo(settings.TIME_ZONE))
+
+
+def get_ranking_window(year: int, month: int, user_id: int,
+                       top: int = DEFAULT_TOP, around: int = DEFAULT_AROUND) -> Dict[str, Any]:
+    """
+    上位N件と、指定ユーザーの前後K件を取得
+
+    自分が上位N件に含まれる場合、around は空になる
+
+    Returns:
+        {
+            'top': 上位の行リスト,
+            'top_next_cursor': 上位の続きを取得するカーソル,
+            'me': 自分の行（不参加の場合はNone）,
+            'around': 自分の前後の行リスト（自分を含む）,
+            'participant_count': 参加者数,
+        }
+    """
+    around = max(0, min(around, MAX_AROUND))
+    top_page = get_ranking_page(year, month, limit=top)
+    me = get_user_ranking_row(year, month, user_id)
+
+    around_rows = []
+    in_top = me is not None and any(row['user_id'] == user_id for row in top_page['entries'])
+    if me is not None and me['rank'] is not None and not in_top:
+        position = _sort_key(me)
+        rows = _snapshot_sorted_rows(year, month)
+        if rows is not None:
+            index = bisect_right([_sort_key(row) for row in rows], position) - 1
+            around_rows = rows[max(0, index - around):index + around + 1]
+        else:
+            jst = ZoneInfo(settings.TIME_ZONE)
+            before = _ranked_queryset(year, month).filter(
+                _before(*position)
+            ).order_by('-rank', '-user_id')[:around]
+            after = _ranked_queryset(year, month).filter(_after(*position))[:around]
+            around_rows = (
+                [entry_to_row(entry, jst) for entry in reversed(list(before))]
+                + [me]
+                + [entry_to_row(entry, jst) for entry in after]
+            )
+
+    return {
+        'top': top_page['entries'],
+        'top_next_cursor': top_page['next_cursor'],
+        'me': me,
+        'around': around_rows,
+        'participant_count': get_participant_count(year, month),
+    }
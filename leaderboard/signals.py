@@ -0,0 +1,171 @@
+"""
+ランキング関連シグナル処理
+
+TimeRecordの変更を検知し、該当ユーザー・該当日のランキングデータだけを差分更新する。
+また、LeaderboardEntryの変更時にランキングキャッシュのバージョンを更新し、
+バージョン更新をSSE接続中のクライアントへ配信する。
+
+設計方針:
+- 当日の出勤・休憩打刻では労働時間が確定しないため更新しない
+- 退勤打刻、および過去日の打刻追加・修正・削除で更新する
+- エラー発生時も打刻処理が止まらないよう、例外を握りつぶす
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.conf import settings
+from django.utils import timezone
+from zoneinfo import ZoneInfo
+import logging
+
+from core.models import previous_value, track_stored_values
+from timeclock.models import TimeRecord
+from .models import LeaderboardEntry
+from .services.ranking_cache import bump_ranking_version, ranking_version_changed
+from .services.ranking_stream import broadcaster
+
+logger = logging.getLogger(__name__)
+
+
+def _should_skip_signal(func_name: str) -> bool:
+    """
+    シグナル処理をスキップすべきか判定
+
+    Args:
+        func_name: チェック対象の関数名
+
+    Returns:
+        bool: スキップする場合True
+    """
+    if not getattr(settings, 'LEADERBOARD_SIGNALS_ENABLED', True):
+        logger.debug(f"Signal {func_name} skipped: LEADERBOARD_SIGNALS_ENABLED is False")
+        return True
+
+    func = globals().get(func_name)
+    if func and getattr(func, '_disabled', False):
+        logger.debug(f"Signal {func_name} skipped: function._disabled is True")
+        return True
+
+    return False
+
+
+def _apply_time_record_change(instance, change_type: str) -> None:
+    """
+    打刻の変更をランキングに反映する
+
+    Args:
+        instance: 変更されたTimeRecordインスタンス
+        change_type: 'create', 'update', 'delete'
+    """
+    from .services.leaderboard_service import LeaderboardService
+
+    jst = ZoneInfo(settings.TIME_ZONE)
+    record_date = instance.timestamp.astimezone(jst).date()
+    today = timezone.now().astimezone(jst).date()
+
+    # 当日の退勤以外の新規打刻では労働時間が変わらない
+    if change_type == 'create' and record_date == today and instance.clock_type != 'clock_out':
+        return
+
+    record_dates = [record_date]
+    if change_type == 'update':
+        # 打刻日時を別の日に修正した場合は、修正前の日の労働時間も計算し直す
+        previous_timestamp = previous_value(instance, 'timestamp')
+        if previous_timestamp is not None:
+            previous_date = previous_timestamp.astimezone(jst).date()
+            if previous_date != record_date:
+                record_dates.insert(0, previous_date)
+
+    service = LeaderboardService(instance.user)
+    for target_date in record_dates:
+        entry, response = service.apply_daily_minutes(target_date)
+
+        if response and response.get('success'):
+            logger.debug(
+                f"TimeRecord {change_type} applied to leaderboard: "
+                f"user_name={instance.user.name}, date={target_date}, status={response.get('status')}"
+            )
+
+
+# 打刻日時の修正で日付が変わったことを判定できるよう、データベース上の打刻日時を保持する
+track_stored_values(TimeRecord, 'timestamp')
+
+
+@receiver(post_save, sender=TimeRecord)
+def update_leaderboard_on_time_record_save(sender, instance, created, **kwargs):
+    """
+    TimeRecord保存時のランキング差分更新
+
+    Args:
+        sender: シグナル送信元のモデルクラス
+        instance: 保存されたTimeRecordインスタンス
+        created: 新規作成の場合True
+        **kwargs: その他のシグナル引数
+    """
+    if _should_skip_signal('update_leaderboard_on_time_record_save'):
+        return
+
+    try:
+        _apply_time_record_change(instance, 'create' if created else 'update')
+    except Exception as e:
+        logger.error(
+            f"Error in update_leaderboard_on_time_record_save: user_name={instance.user.name}, "
+            f"error={str(e)}",
+            exc_info=True
+        )
+
+
+@receiver(post_delete, sender=TimeRecord)
+def update_leaderboard_on_time_record_delete(sender, instance, **kwargs):
+    """
+    TimeRecord削除時のランキング差分更新
+
+    Args:
+        sender: シグナル送信元のモデルクラス
+        instance: 削除されたTimeRecordインスタンス
+        **kwargs: その他のシグナル引数
+    """
+    if _should_skip_signal('update_leaderboard_on_time_record_delete'):
+        return
+
+    try:
+        _apply_time_record_change(instance, 'delete')
+    except Exception as e:
+        logger.error(
+            f"Error in update_leaderboard_on_time_record_delete: user_name={instance.user.name}, "
+            f"error={str(e)}",
+            exc_info=True
+        )
+
+
+@receiver(post_save, sender=LeaderboardEntry)
+@receiver(post_delete, sender=LeaderboardEntry)
+def bump_ranking_version_on_entry_change(sender, instance, **kwargs):
+    """
+    LeaderboardEntry保存・削除時にランキングキャッシュのバージョンを更新
+
+    bulk_update / update による一括更新はシグナルが発火しないため、
+    LeaderboardService.update_leaderboard 側で明示的に更新している
+    """
+    year, month = instance.year, instance.month
+    transaction.on_commit(lambda: bump_ranking_version(year, month))
+
+
+@receiver(ranking_version_changed)
+def publish_ranking_change(sender, year, month, version, **kwargs):
+    """
+    ランキングバージョン更新時に、同一プロセス内のSSE購読者へ差分を配信
+
+    購読者がいない場合は何もしない
+    """
+    if not broadcaster.has_subscribers(year, month):
+        return
+
+    try:
+        broadcaster.publish_version(year, month, version)
+    except Exception as e:
+        logger.error(
+            f"Error in publish_ranking_change: year={year}, month={month}, error={str(e)}",
+            exc_info=True
+        )
@@ -1,3 +1,909 @@
-from django.test import TestCase
+"""
+ランキング機能テスト
+"""
 
-# Create your tests here.
+import asyncio
+from datetime import date, datetime, time, timedelta
+import threading
+import time as time_module
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from leaderboard.fields import DailyMinutes
+from leaderboard.models import LeaderboardEntry, LeaderboardLock, LeaderboardMetric, LeaderboardSnapshot
+from leaderboard.services import (
+    LeaderboardService,
+    bump_ranking_version,
+    get_metric_ranking,
+    get_rank_trajectory,
+    get_ranked_entries,
+    get_ranking_page,
+    get_ranking_version,
+    get_ranking_window,
+    rank_metrics,
+)
+from leaderboard.services.month_lock import MonthLock, month_lock, run_single_flight
+from leaderboard.services.ranking_cache import build_rank_trajectory
+from leaderboard.services.ranking_metrics import summarize_daily_minutes
+from leaderboard.services.ranking_stream import RankingBroadcaster, build_changes
+from leaderboard.utils import get_jst_now
+from timeclock.models import TimeRecord
+from timeclock.services import WorkTimeService
+
+User = get_user_model()
+
+
+@override_settings(PAID_LEAVE_SIGNALS_ENABLED=False)
+class IncrementalLeaderboardUpdateTest(TestCase):
+    """打刻イベントによるランキング差分更新のテスト"""
+
+    def setUp(self):
+        self.year, self.month = 2025, 9
+        self.alice = User.objects.create_user(email='alice@example.com', name='Alice')
+        self.bob = User.objects.create_user(email='bob@example.com', name='Bob')
+        self.carol = User.objects.create_user(email='carol@example.com', name='Carol')
+
+        self._create_entry(self.alice, {'1': 600})
+        self._create_entry(self.bob, {'1': 480})
+        self._create_entry(self.carol, {'1': 300})
+        LeaderboardService().update_leaderboard(self.year, self.month)
+
+    def _create_entry(self, user, cached_daily_minutes):
+        return LeaderboardEntry.objects.create(
+            user=user,
+            year=self.year,
+            month=self.month,
+            cached_daily_minutes=cached_daily_minutes,
+            total_minutes=sum(cached_daily_minutes.values()),
+        )
+
+    def _work(self, user, day, start_hour, end_hour):
+        """指定日に出勤・退勤の打刻を作成し、退勤レコードを返す"""
+        target_date = date(self.year, self.month, day)
+        TimeRecord.objects.create(
+            user=user,
+            clock_type='clock_in',
+            timestamp=timezone.make_aware(datetime.combine(target_date, time(start_hour, 0))),
+        )
+        return TimeRecord.objects.create(
+            user=user,
+            clock_type='clock_out',
+            timestamp=timezone.make_aware(datetime.combine(target_date, time(end_hour, 0))),
+        )
+
+    def _ranks(self):
+        return dict(
+            LeaderboardEntry.objects.filter(year=self.year, month=self.month)
+            .values_list('user__name', 'rank')
+        )
+
+    def test_clock_out_updates_only_that_day(self):
+        """退勤打刻で該当日のキャッシュと合計時間のみ更新される"""
+        self._work(self.carol, 2, 9, 14)
+
+        entry = LeaderboardEntry.objects.get(user=self.carol)
+        self.assertEqual(entry.cached_daily_minutes, {'1': 300, '2': 300})
+        self.assertEqual(entry.total_minutes, 600)
+
+    def test_overtaking_moves_entry_and_shifts_passed_entries(self):
+        """追い抜いたエントリの順位が上がり、追い抜かれたエントリが1つ下がる"""
+        self._work(self.carol, 2, 9, 17)
+
+        self.assertEqual(self._ranks(), {'Carol': 1, 'Alice': 2, 'Bob': 3})
+
+    def test_equal_totals_share_rank(self):
+        """同じ合計時間は同順位になる"""
+        self._work(self.carol, 2, 9, 14)
+
+        self.assertEqual(self._ranks(), {'Alice': 1, 'Carol': 1, 'Bob': 3})
+
+    def test_deleting_past_record_moves_entry_down(self):
+        """過去日の打刻削除で労働時間が減り、順位が下がる"""
+        clock_out = self._work(self.alice, 2, 9, 12)
+        self.assertEqual(LeaderboardEntry.objects.get(user=self.alice).total_minutes, 780)
+
+        clock_out.delete()
+
+        entry = LeaderboardEntry.objects.get(user=self.alice)
+        self.assertEqual(entry.cached_daily_minutes, {'1': 600})
+        self.assertEqual(self._ranks(), {'Alice': 1, 'Bob': 2, 'Carol': 3})
+
+    def test_moving_record_to_another_day_updates_both_days(self):
+        """打刻日時を別の日に修正すると、修正前の日と修正後の日の両方を更新する"""
+        clock_out = self._work(self.carol, 2, 9, 12)
+        clock_in = TimeRecord.objects.get(user=self.carol, clock_type='clock_in')
+
+        for record in (clock_in, clock_out):
+            record.timestamp += timedelta(days=1)
+            record.save()
+
+        entry = LeaderboardEntry.objects.get(user=self.carol)
+        self.assertEqual(entry.cached_daily_minutes, {'1': 300, '3': 180})
+        self.assertEqual(entry.total_minutes, 480)
+
+    def test_ranks_match_full_recalculation(self):
+        """差分更新後の順位が全体再計算の結果と一致する"""
+        self._work(self.bob, 3, 9, 12)
+        self._work(self.carol, 3, 9, 18)
+        self._work(self.alice, 4, 9, 10)
+        incremental = self._ranks()
+
+        LeaderboardService().update_leaderboard(self.year, self.month)
+
+        self.assertEqual(incremental, self._ranks())
+
+    def test_non_participant_is_ignored(self):
+        """未参加ユーザーの打刻ではランキングは変化しない"""
+        dave = User.objects.create_user(email='dave@example.com', name='Dave')
+        self._work(dave, 2, 9, 18)
+
+        self.assertFalse(LeaderboardEntry.objects.filter(user=dave).exists())
+        self.assertEqual(self._ranks(), {'Alice': 1, 'Bob': 2, 'Carol': 3})
+
+
+@override_settings(PAID_LEAVE_SIGNALS_ENABLED=False, LEADERBOARD_SIGNALS_ENABLED=False)
+class ChunkedRecalculationTest(TransactionTestCase):
+    """チャンク分割による完全再計算のテスト"""
+
+    def setUp(self):
+        self.year, self.month = 2025, 9
+        self.users = []
+        for index, hours in enumerate([3, 8, 5, 8]):
+            user = User.objects.create_user(email=f'user{index}@example.com', name=f'User{index}')
+            self.users.append(user)
+            LeaderboardEntry.objects.create(user=user, year=self.year, month=self.month)
+            for day in (1, 2):
+                target_date = date(self.year, self.month, day)
+                TimeRecord.objects.create(
+                    user=user,
+                    clock_type='clock_in',
+                    timestamp=timezone.make_aware(datetime.combine(target_date, time(9, 0))),
+                )
+                TimeRecord.objects.create(
+                    user=user,
+                    clock_type='clock_out',
+                    timestamp=timezone.make_aware(datetime.combine(target_date, time(9 + hours, 0))),
+                )
+
+    def _assert_recalculated(self):
+        totals = dict(
+            LeaderboardEntry.objects.values_list('user__name', 'total_minutes')
+        )
+        ranks = dict(LeaderboardEntry.objects.values_list('user__name', 'rank'))
+        self.assertEqual(totals, {'User0': 360, 'User1': 960, 'User2': 600, 'User3': 960})
+        self.assertEqual(ranks, {'User0': 4, 'User1': 1, 'User2': 3, 'User3': 1})
+
+    def test_serial_chunks(self):
+        """1ワーカーでもチャンクごとに計算・一括更新される"""
+        result = LeaderboardService().recalculate_month_from_scratch(
+            self.year, self.month, workers=1, chunk_size=3
+        )
+
+        self.assertEqual(result['success_count'], 4)
+        self.assertEqual([chunk['size'] for chunk in result['chunks']], [3, 1])
+        self._assert_recalculated()
+
+    def test_parallel_workers(self):
+        """複数ワーカーで並列計算しても結果が一致する"""
+        result = LeaderboardService().recalculate_month_from_scratch(
+            self.year, self.month, workers=2
+        )
+
+        self.assertEqual(result['error_count'], 0)
+        self.assertEqual(len(result['chunks']), 2)
+        self._assert_recalculated()
+
+    def test_command_reports_chunks_and_throughput(self):
+        """管理コマンドがチャンクごとの処理時間とスループットを出力する"""
+        out = StringIO()
+        call_command(
+            'recalculate_leaderboards',
+            year=self.year, month=self.month, workers=2, stdout=out
+        )
+
+        output = out.getvalue()
+        self.assertIn('チャンク1', output)
+        self.assertIn('チャンク2', output)
+        self.assertIn('件/秒', output)
+        self._assert_recalculated()
+
+
+@override_settings(PAID_LEAVE_SIGNALS_ENABLED=False)
+class RankingCacheTest(TestCase):
+    """バージョンキー付きランキングキャッシュと条件付きGETのテスト"""
+
+    def setUp(self):
+        now = get_jst_now()
+        self.year, self.month = now.year, now.month
+        self.user = User.objects.create_user(email='alice@example.com', name='Alice', password='pass')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.entry = LeaderboardEntry.objects.create(
+                user=self.user, year=self.year, month=self.month, total_minutes=300, rank=1
+            )
+        self.client.force_login(self.user)
+        self.status_url = reverse('leaderboard:status')
+        self.entries_url = reverse('leaderboard:entries')
+
+    def test_ranking_is_served_from_cache_until_version_bump(self):
+        """バージョン更新まではキャッシュを返し、更新後は最新値を返す"""
+        self.assertEqual(self.client.get(self.entries_url).json()['entries'][0]['total_minutes'], 300)
+
+        # シグナルを経由しない更新はキャッシュに反映されない
+        LeaderboardEntry.objects.filter(pk=self.entry.pk).update(total_minutes=600)
+        self.assertEqual(self.client.get(self.entries_url).json()['entries'][0]['total_minutes'], 300)
+
+        bump_ranking_version(self.year, self.month)
+        self.assertEqual(self.client.get(self.entries_url).json()['entries'][0]['total_minutes'], 600)
+
+    def test_entry_save_bumps_version(self):
+        """エントリ保存時にバージョンが更新される"""
+        version = get_ranking_version(self.year, self.month)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.entry.total_minutes = 420
+            self.entry.save()
+
+        self.assertGreater(get_ranking_version(self.year, self.month), version)
+
+    def test_conditional_get_returns_not_modified(self):
+        """ETagが一致すれば304を返す"""
+        response = self.client.get(self.status_url)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(self.status_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_current_month_must_revalidate(self):
+        """当月のランキングは毎回再検証させる"""
+        response = self.client.get(self.status_url)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_closed_month_is_cached_long_term(self):
+        """終了済みの月は長期キャッシュを許可する"""
+        response = self.client.get(self.status_url, {'year': 2020, 'month': 1})
+        self.assertIn('max-age=86400', response['Cache-Control'])
+
+    def test_page_is_not_served_from_http_cache(self):
+        """CSRFトークンを含むランキング画面は条件付きGETで304を返さない"""
+        response = self.client.get(reverse('leaderboard:leaderboard'))
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('max-age', response.get('Cache-Control', ''))
+
+
+@override_settings(PAID_LEAVE_SIGNALS_ENABLED=False)
+class MonthCloseTest(TestCase):
+    """月次ランキング締め（スナップショット）のテスト"""
+
+    def setUp(self):
+        self.year, self.month = 2025, 9
+        self.alice = User.objects.create_user(email='alice@example.com', name='Alice')
+        self.bob = User.objects.create_user(email='bob@example.com', name='Bob')
+        LeaderboardEntry.objects.create(
+            user=self.alice, year=self.year, month=self.month,
+            cached_daily_minutes={'1': 300, '30': 120}, total_minutes=420
+        )
+        LeaderboardEntry.objects.create(
+            user=self.bob, year=self.year, month=self.month,
+            cached_daily_minutes={'2': 600}, total_minutes=600
+        )
+        self.service = LeaderboardService()
+        self.service.update_leaderboard(self.year, self.month)
+
+    def test_close_month_freezes_ranked_rows(self):
+        """締め処理で順位と日別労働時間がスナップショットに保存される"""
+        result = self.service.close_month(self.year, self.month, recalculate=False)
+        self.assertTrue(result['success'])
+
+        snapshot = LeaderboardSnapshot.objects.get(year=self.year, month=self.month)
+        self.assertEqual(snapshot.participant_count, 2)
+        self.assertEqual([row[1] for row in snapshot.rows], ['Bob', 'Alice'])
+        self.assertEqual(len(snapshot.daily_minutes[1]), 31)
+        self.assertEqual(snapshot.daily_minutes[1][0], 300)
+        self.assertEqual(snapshot.daily_minutes[1][29], 120)
+
+    def test_closed_month_refuses_recalculation(self):
+        """締め済みの月は再計算を拒否し、締め解除後は再計算できる"""
+        self.service.close_month(self.year, self.month, recalculate=False)
+
+        self.assertEqual(self.service.update_leaderboard(self.year, self.month)['status'], 'month_closed')
+        _, response = self.service.recalculate_user_stats_from_scratch(self.alice, self.year, self.month)
+        self.assertEqual(response['status'], 'month_closed')
+
+        self.service.reopen_month(self.year, self.month)
+        self.assertTrue(self.service.update_leaderboard(self.year, self.month)['success'])
+
+    def test_command_refuses_closed_month(self):
+        """管理コマンドでも締め済みの月は再計算せず、エントリを変更しない"""
+        self.service.close_month(self.year, self.month, recalculate=False)
+
+        out = StringIO()
+        call_command('recalculate_leaderboards', year=self.year, month=self.month, stdout=out)
+
+        self.assertIn('締め済み', out.getvalue())
+        self.assertEqual(LeaderboardEntry.objects.get(user=self.alice).total_minutes, 420)
+
+    def test_snapshot_is_immutable(self):
+        """スナップショットは保存後に変更できない"""
+        self.service.close_month(self.year, self.month, recalculate=False)
+        snapshot = LeaderboardSnapshot.objects.get(year=self.year, month=self.month)
+
+        snapshot.participant_count = 0
+        with self.assertRaises(ValidationError):
+            snapshot.save()
+
+    def test_history_is_served_from_snapshot(self):
+        """締め済みの月の表示はスナップショットから行われる"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.close_month(self.year, self.month, recalculate=False)
+        # エントリ側を変更してもスナップショットの内容が表示される
+        LeaderboardEntry.objects.filter(user=self.alice).update(total_minutes=9999)
+
+        rows = get_ranked_entries(self.year, self.month)
+        self.assertEqual(
+            [(row['user_name'], row['rank'], row['total_minutes']) for row in rows],
+            [('Bob', 1, 600), ('Alice', 2, 420)]
+        )
+
+    def test_metric_board_is_served_from_snapshot(self):
+        """締め済みの月の指標ランキングもスナップショットから算出される"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.close_month(self.year, self.month, recalculate=False)
+        LeaderboardMetric.objects.filter(year=self.year, month=self.month).update(value=99, rank=1)
+        bump_ranking_version(self.year, self.month)
+
+        rows = get_metric_ranking(self.year, self.month, 'worked_days')
+        self.assertEqual(
+            [(row['user_name'], row['rank'], row['value']) for row in rows],
+            [('Alice', 1, 2), ('Bob', 2, 1)]
+        )
+
+    def test_current_month_cannot_be_closed(self):
+        """当月は締められない"""
+        now = get_jst_now()
+        result = self.service.close_month(now.year, now.month)
+        self.assertEqual(result['status'], 'month_not_finished')
+
+
+@override_settings(PAID_LEAVE_SIGNALS_ENABLED=False, LEADERBOARD_STREAM_BACKEND='local')
+class RankingStreamTest(TestCase):
+    """ランキングのSSE配信のテスト"""
+
+    def setUp(self):
+        now = get_jst_now()
+        self.year, self.month = now.year, now.month
+        self.alice = User.objects.create_user(email='alice@example.com', name='Alice', password='pass')
+        self.bob = User.objects.create_user(email='bob@example.com', name='Bob', password='pass')
+        self.alice_entry = LeaderboardEntry.objects.create(
+            user=self.alice, year=self.year, month=self.month, total_minutes=600, rank=1
+        )
+        LeaderboardEntry.objects.create(
+            user=self.bob, year=self.year, month=self.month, total_minutes=300, rank=2
+        )
+        bump_ranking_version(self.year, self.month)
+
+    def _rows(self):
+        return [{'user_id': 1, 'user_name': 'A', 'rank': 1, 'total_minutes': 600, 'total_hours_display': '10時間'},
+                {'user_id': 2, 'user_name': 'B', 'rank': 2, 'total_minutes': 300, 'total_hours_display': '5時間'}]
+
+    def test_build_changes_returns_only_changed_rows(self):
+        """順位・労働時間が変わった行と離脱したユーザーだけを差分とする"""
+        previous = self._rows()
+        rows = [dict(previous[0], rank=2, total_minutes=600), dict(previous[1], rank=1, total_minutes=700)]
+        changes, removed = build_changes(previous, rows)
+        self.assertEqual([row['user_id'] for row in changes], [1, 2])
+
+        changes, removed = build_changes(previous, previous[:1])
+        self.assertEqual(changes, [])
+        self.assertEqual(removed, [2])
+
+    async def test_publish_fans_out_diff_to_subscribers(self):
+        """バージョン更新時に差分イベントが全購読者へ配信される"""
+        broadcaster = RankingBroadcaster()
+        first = broadcaster.subscribe(self.year, self.month)
+        second = broadcaster.subscribe(self.year, self.month)
+        snapshot = await sync_to_async(broadcaster.snapshot_event)(self.year, self.month)
+        self.assertEqual(snapshot['data']['participant_count'], 2)
+
+        await LeaderboardEntry.objects.filter(user=self.bob).aupdate(total_minutes=900, rank=1)
+        await LeaderboardEntry.objects.filter(user=self.alice).aupdate(rank=2)
+        version = await sync_to_async(bump_ranking_version)(self.year, self.month)
+        await sync_to_async(broadcaster.publish_version)(self.year, self.month, version)
+        await asyncio.sleep(0)
+
+        for queue in (first, second):
+            event = queue.get_nowait()
+            self.assertEqual(event['id'], version)
+            self.assertEqual(
+                sorted((row['user_id'], row['rank']) for row in event['data']['changes']),
+                [(self.alice.pk, 2), (self.bob.pk, 1)]
+            )
+
+        # 配信済みのバージョンは再配信しない
+        self.assertIsNone(await sync_to_async(broadcaster.publish_version)(self.year, self.month, version))
+
+    async def test_replay_from_last_event_id(self):
+        """Last-Event-ID以降の履歴を再送し、履歴にないIDはNoneを返す"""
+        broadcaster = RankingBroadcaster()
+        broadcaster.subscribe(self.year, self.month)
+        snapshot = await sync_to_async(broadcaster.snapshot_event)(self.year, self.month)
+
+        await LeaderboardEntry.objects.filter(user=self.bob).aupdate(total_minutes=400)
+        first = await sync_to_async(broadcaster.publish_version)(
+            self.year, self.month, await sync_to_async(bump_ranking_version)(self.year, self.month)
+        )
+        await LeaderboardEntry.objects.filter(user=self.bob).aupdate(total_minutes=500)
+        second = await sync_to_async(broadcaster.publish_version)(
+            self.year, self.month, await sync_to_async(bump_ranking_version)(self.year, self.month)
+        )
+
+        self.assertEqual(broadcaster.replay(self.year, self.month, first['id']), [second])
+        self.assertEqual(broadcaster.replay(self.year, self.month, second['id']), [])
+        self.assertIsNone(broadcaster.replay(self.year, self.month, snapshot['id'] - 1))
+
+    async def test_stream_sends_snapshot_first(self):
+        """SSE接続時に再接続間隔と再同期イベントが送られる"""
+        await self.async_client.aforce_login(self.alice)
+        response = await self.async_client.get(reverse('leaderboard:stream'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        content = response.streaming_content
+        chunks = [await anext(content), await anext(content)]
+        await content.aclose()
+
+        self.assertTrue(chunks[0].startswith(b'retry:'))
+        self.assertIn(b'event: snapshot', chunks[1])
+        self.assertIn(b'"participant_count": 2', chunks[1])
+
+    async def test_stream_requires_participation(self):
+        """不参加のユーザーは購読できない"""
+        carol = await User.objects.acreate(email='carol@example.com', name='Carol')
+        await self.async_client.aforce_login(carol)
+        response = await self.async_client.get(reverse('leaderboard:stream'))
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(PAID_LEAVE_SIGNALS_ENABLED=False)
+class RankTrajectoryTest(TestCase):
+    """日別順位推移のテスト"""
+
+    def setUp(self):
+        self.year, self.month = 2025, 9
+        self.alice = User.objects.create_user(email='alice@example.com', name='Alice', password='pass')
+        self.bob = User.objects.create_user(email='bob@example.com', name='Bob', password='pass')
+        LeaderboardEntry.objects.create(
+            user=self.alice, year=self.year, month=self.month,
+            cached_daily_minutes={'1': 300, '3': 300}, total_minutes=600, rank=1
+        )
+        LeaderboardEntry.objects.create(
+            user=self.bob, year=self.year, month=self.month,
+            cached_daily_minutes={'1': 480}, total_minutes=480, rank=2
+        )
+
+    def test_build_rank_trajectory(self):
+        """累計時間と日ごとの順位（同値は同順位）を算出する"""
+        result = build_rank_trajectory(['a', 'b', 'c'], [[60, 0, 60], [120, 0, 0], [60, 60, 0]])
+        self.assertEqual(result['cumulative'], [[60, 60, 120], [120, 120, 120], [60, 120, 120]])
+        self.assertEqual(result['ranks'], [[2, 3, 1], [1, 1, 1], [2, 1, 1]])
+
+    def test_trajectory_from_entries(self):
+        """エントリの日別労働時間から月全体の推移を作成する"""
+        trajectory = get_rank_trajectory(self.year, self.month)
+        self.assertEqual(len(trajectory['days']), 30)
+        self.assertEqual([p['user_name'] for p in trajectory['participants']], ['Alice', 'Bob'])
+        self.assertEqual(trajectory['cumulative'][0][:3], [300, 300, 600])
+        self.assertEqual([row[0] for row in trajectory['ranks']], [2, 1])
+        self.assertEqual([row[2] for row in trajectory['ranks']], [1, 2])
+
+    def test_trajectory_is_cached_per_version(self):
+        """同じバージョンの間は再計算せず、バージョン更新で作り直す"""
+        get_rank_trajectory(self.year, self.month)
+        with CaptureQueriesContext(connection) as queries:
+            get_rank_trajectory(self.year, self.month)
+        # キャッシュ（DBキャッシュ）の読み取りのみでエントリは参照しない
+        self.assertFalse(any('leaderboard_' in query['sql'] for query in queries.captured_queries))
+
+        LeaderboardEntry.objects.filter(user=self.bob).update(cached_daily_minutes={'1': 900})
+        bump_ranking_version(self.year, self.month)
+        self.assertEqual(get_rank_trajectory(self.year, self.month)['ranks'][1][0], 1)
+
+    def test_trajectory_from_snapshot(self):
+        """締め済みの月はスナップショットから作成する"""
+        LeaderboardService().close_month(self.year, self.month, recalculate=False)
+        LeaderboardEntry.objects.all().delete()
+        bump_ranking_version(self.year, self.month)
+
+        trajectory = get_rank_trajectory(self.year, self.month)
+        self.assertEqual(trajectory['cumulative'][1][-1], 480)
+
+    def test_endpoint_requires_participation(self):
+        """参加者は取得でき、不参加のユーザーは取得できない"""
+        url = reverse('leaderboard:trajectory')
+        self.client.force_login(self.alice)
+        data = self.client.get(url, {'year': self.year, 'month': self.month}).json()
+        self.assertTrue(data['success'])
+        self.assertEqual(len(data['trajectory']['ranks']), 2)
+
+        carol = User.objects.create_user(email='carol@example.com', name='Carol')
+        self.client.force_login(carol)
+        data = self.client.get(url, {'year': self.year, 'month': self.month}).json()
+        self.assertEqual(data['status'], 'not_joined')
+
+
+@override_settings(PAID_LEAVE_SIGNALS_ENABLED=False, LEADERBOARD_SIGNALS_ENABLED=False)
+class RankingWindowTest(TestCase):
+    """上位N件・自分の前後K件・キーセットページングのテスト"""
+
+    def setUp(self):
+        now = get_jst_now()
+        self.year, self.month = now.year, now.month
+        self.users = []
+        # 20人: 順位は 1..20（10位と11位は同点で10位）
+        for index in range(20):
+            user = User.objects.create_user(email=f'user{index}@example.com', name=f'User{index}', password='pass')
+            rank = 10 if index == 10 else index + 1
+            LeaderboardEntry.objects.create(
+                user=user, year=self.year, month=self.month,
+                total_minutes=10000 - rank * 10, rank=rank
+            )
+            self.users.append(user)
+
+    def test_window_returns_top_and_around(self):
+        """上位N件と自分の前後K件を返す"""
+        window = get_ranking_window(self.year, self.month, self.users[15].pk, top=3, around=2)
+        self.assertEqual([row['rank'] for row in window['top']], [1, 2, 3])
+        self.assertEqual([row['rank'] for row in window['around']], [14, 15, 16, 17, 18])
+        self.assertEqual(window['me']['user_id'], self.users[15].pk)
+        self.assertEqual(window['participant_count'], 20)
+
+    def test_window_around_is_empty_when_in_top(self):
+        """自分が上位に含まれる場合は周辺を返さない"""
+        window = get_ranking_window(self.year, self.month, self.users[1].pk, top=3, around=2)
+        self.assertEqual(window['around'], [])
+
+    def test_keyset_pages_cover_all_rows_once(self):
+        """同順位を含めても全員を重複・欠落なく辿れる"""
+        seen = []
+        cursor = None
+        while True:
+            page = get_ranking_page(self.year, self.month, cursor=cursor, limit=7)
+            seen.extend(row['user_id'] for row in page['entries'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(sorted(seen), sorted(user.pk for user in self.users))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_window_reads_only_the_requested_range(self):
+        """一覧全体を読み込まず、必要な範囲だけを取得する"""
+        bump_ranking_version(self.year, self.month)
+        with CaptureQueriesContext(connection) as queries:
+            get_ranking_window(self.year, self.month, self.users[15].pk, top=3, around=2)
+        entry_queries = [q['sql'] for q in queries.captured_queries if 'leaderboard_leaderboardentry' in q['sql']]
+        self.assertTrue(all('LIMIT' in sql for sql in entry_queries if 'COUNT' not in sql))
+
+    def test_window_endpoint(self):
+        """APIで取得でき、不正なカーソルはエラーを返す"""
+        self.client.force_login(self.users[15])
+        data = self.client.get(reverse('leaderboard:window'), {'top': 3, 'around': 1}).json()
+        self.assertTrue(data['success'])
+        self.assertEqual(len(data['around']), 3)
+
+        data = self.client.get(reverse('leaderboard:entries'), {'cursor': 'invalid'}).json()
+        self.assertEqual(data['status'], 'invalid_params')
+
+        data = self.client.get(reverse('leaderboard:entries'), {'cursor': data.get('next_cursor') or '', 'limit': 5}).json()
+        self.assertEqual(len(data['entries']), 5)
+        self.assertIsNotNone(data['next_cursor'])
+
+
+class RankingMetricTest(TestCase):
+    """合計労働時間以外の指標でのランキングのテスト"""
+
+    def setUp(self):
+        now = get_jst_now()
+        self.year, self.month = now.year, now.month
+        self.alice = User.objects.create_user(email='alice@example.com', name='Alice', password='pass')
+        self.bob = User.objects.create_user(email='bob@example.com', name='Bob', password='pass')
+        self.carol = User.objects.create_user(email='carol@example.com', name='Carol', password='pass')
+        # Alice: 3日連続・計3日, Bob: 2日連続＋1日・計3日, Carol: 1日のみ（長時間）
+        self._create_entry(self.alice, {'1': 300, '2': 300, '3': 300})
+        self._create_entry(self.bob, {'1': 480, '2': 480, '5': 480})
+        self._create_entry(self.carol, {'4': 1000})
+        LeaderboardService().update_leaderboard(self.year, self.month)
+
+    def _create_entry(self, user, cached_daily_minutes):
+        return LeaderboardEntry.objects.create(
+            user=user, year=self.year, month=self.month,
+            cached_daily_minutes=cached_daily_minutes,
+            total_minutes=sum(cached_daily_minutes.values()),
+        )
+
+    def _ranks(self, metric):
+        return {row['user_name']: (row['rank'], row['value']) for row in get_metric_ranking(self.year, self.month, metric)}
+
+    def test_summary_is_computed_in_one_pass(self):
+        summary = summarize_daily_minutes(DailyMinutes.from_dict({'1': 60, '2': 60, '4': 60, '5': 60, '6': 30}))
+        self.assertEqual(summary.total_minutes, 270)
+        self.assertEqual(summary.worked_days, 5)
+        self.assertEqual(summary.longest_streak, 3)
+
+    def test_each_metric_is_ranked_with_ties(self):
+        """指標ごとに順位が付き、同値は同順位になる"""
+        self.assertEqual(self._ranks('worked_days'), {'Alice': (1, 3), 'Bob': (1, 3), 'Carol': (3, 1)})
+        self.assertEqual(self._ranks('longest_streak'), {'Alice': (1, 3), 'Bob': (2, 2), 'Carol': (3, 1)})
+        self.assertEqual(self._ranks('average_daily_minutes'), {'Carol': (1, 1000), 'Bob': (2, 480), 'Alice': (3, 300)})
+        self.assertEqual(self._ranks('total_minutes'), {'Bob': (1, 1440), 'Carol': (2, 1000), 'Alice': (3, 900)})
+
+    def test_rerank_writes_only_changed_rows(self):
+        """値も順位も変わらない場合は書き込まない"""
+        self.assertEqual(rank_metrics(self.year, self.month), 0)
+        self.assertEqual(LeaderboardMetric.objects.filter(year=self.year, month=self.month).count(), 9)
+
+    def test_incremental_update_reranks_metrics(self):
+        """打刻による差分更新でも指標の順位が更新される"""
+        entry = LeaderboardEntry.objects.get(user=self.carol, year=self.year, month=self.month)
+        entry.cached_daily_minutes[5] = 60
+        entry.cached_daily_minutes[6] = 60
+        entry.save()
+        with CaptureQueriesContext(connection) as queries:
+            rank_metrics(self.year, self.month, entries=[entry])
+        bump_ranking_version(self.year, self.month)
+
+        self.assertEqual(self._ranks('longest_streak')['Carol'], (1, 3))
+        self.assertEqual(self._ranks('worked_days')['Carol'], (1, 3))
+        # 月全体をウィンドウ関数で付け直さず、値が変わった行の前後だけを更新する
+        self.assertFalse(any('RANK()' in query['sql'].upper() for query in queries.captured_queries))
+        self.assertEqual(rank_metrics(self.year, self.month), 0)
+
+    def test_metric_board_is_a_single_read(self):
+        bump_ranking_version(self.year, self.month)
+        with CaptureQueriesContext(connection) as queries:
+            get_metric_ranking(self.year, self.month, 'longest_streak')
+        metric_queries = [q['sql'] for q in queries.captured_queries if 'leaderboard_' in q['sql']]
+        self.assertEqual(len(metric_queries), 1)
+
+    def test_metric_endpoint(self):
+        self.client.force_login(self.carol)
+        data = self.client.get(reverse('leaderboard:metric'), {'metric': 'average_daily_minutes', 'limit': 2}).json()
+        self.assertTrue(data['success'])
+        self.assertEqual([row['user_name'] for row in data['entries']], ['Carol', 'Bob'])
+        self.assertEqual(data['my_entry']['value_display'], '16時間40分')
+        self.assertEqual(data['participant_count'], 3)
+
+        data = self.client.get(reverse('leaderboard:metric'), {'metric': 'unknown'}).json()
+        self.assertEqual(data['status'], 'invalid_params')
+
+
+class JoinLeaderboardTest(TestCase):
+    """月途中の参加（1回の集計と順位位置への挿入）のテスト"""
+
+    def setUp(self):
+        now = get_jst_now()
+        self.year, self.month = now.year, now.month
+        self.today = now.date()
+        self.alice = User.objects.create_user(email='alice@example.com', name='Alice', password='pass')
+        self.bob = User.objects.create_user(email='bob@example.com', name='Bob', password='pass')
+        self.newcomer = User.objects.create_user(email='new@example.com', name='New', password='pass')
+        LeaderboardEntry.objects.create(user=self.alice, year=self.year, month=self.month, total_minutes=600, rank=1)
+        LeaderboardEntry.objects.create(user=self.bob, year=self.year, month=self.month, total_minutes=300, rank=2)
+
+    def _work(self, user, day, start_hour, end_hour, clock_out=True):
+        target_date = date(self.year, self.month, day)
+        TimeRecord.objects.create(
+            user=user, clock_type='clock_in',
+            timestamp=timezone.make_aware(datetime.combine(target_date, time(start_hour, 0))),
+        )
+        if clock_out:
+            TimeRecord.objects.create(
+                user=user, clock_type='clock_out',
+                timestamp=timezone.make_aware(datetime.combine(target_date, time(end_hour, 0))),
+            )
+
+    def _ranks(self):
+        return dict(
+            LeaderboardEntry.objects.filter(year=self.year, month=self.month).values_list('user__name', 'rank')
+        )
+
+    def test_month_range_matches_daily_summaries(self):
+        """1回のクエリでの日別集計が、日ごとの集計と一致する"""
+        self._work(self.newcomer, 1, 9, 17)
+        service = WorkTimeService(self.newcomer)
+
+        with CaptureQueriesContext(connection) as queries:
+            minutes = service.get_daily_work_minutes(date(self.year, self.month, 1), self.today)
+        record_queries = [q for q in queries.captured_queries if 'timeclock_timerecord' in q['sql']]
+        self.assertEqual(len(record_queries), 1)
+
+        summary = service.get_daily_summary(date(self.year, self.month, 1))
+        self.assertEqual(minutes, {date(self.year, self.month, 1): int(summary['work_time'].total_seconds() / 60)})
+
+    def test_join_inserts_entry_at_its_rank(self):
+        """下位の参加者だけが繰り下がり、全体の再計算は行わない"""
+        self._work(self.newcomer, 1, 9, 16)
+
+        entry, response = LeaderboardService().join_leaderboard(self.newcomer, self.year, self.month)
+
+        self.assertEqual(response['status'], 'joined')
+        self.assertEqual(entry.total_minutes, 420)
+        self.assertEqual(entry.cached_daily_minutes, {'1': 420})
+        self.assertEqual(self._ranks(), {'Alice': 1, 'New': 2, 'Bob': 3})
+
+    def test_join_without_records_ranks_last(self):
+        """退勤打刻のない日は0分として扱い、最下位に挿入する"""
+        self._work(self.newcomer, 1, 9, 17, clock_out=False)
+
+        entry, response = LeaderboardService().join_leaderboard(self.newcomer, self.year, self.month)
+
+        self.assertEqual(entry.total_minutes, 0)
+        self.assertEqual(self._ranks(), {'Alice': 1, 'Bob': 2, 'New': 3})
+
+    def test_join_endpoint(self):
+        self.client.force_login(self.newcomer)
+        data = self.client.post(reverse('leaderboard:join')).json()
+        self.assertEqual(data['status'], 'joined')
+        self.assertEqual(self._ranks()['New'], 3)
+
+        data = self.client.post(reverse('leaderboard:join')).json()
+        self.assertEqual(data['status'], 'already_joined')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class MonthLockTest(TransactionTestCase):
+    """年月単位のロックとシングルフライト実行のテスト"""
+
+    def _in_thread(self, func):
+        """別スレッド（別接続）で処理を実行して結果を返す"""
+        result = {}
+
+        def target():
+            try:
+                result['value'] = func()
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+        return result.get('value')
+
+    def _try_and_release(self):
+        lock = MonthLock(2025, 9)
+        acquired = lock.try_acquire()
+        if acquired:
+            lock.release()
+        return acquired
+
+    def test_lock_excludes_other_threads(self):
+        """保持中は他のスレッドが取得できず、解放後は取得できる"""
+        lock = MonthLock(2025, 9)
+        self.assertTrue(lock.try_acquire())
+        self.assertFalse(self._in_thread(self._try_and_release))
+
+        lock.release()
+        self.assertTrue(self._in_thread(self._try_and_release))
+
+    def test_lock_in_transaction_is_held_until_commit(self):
+        """トランザクション内では再取得でき、コミット時に解放される"""
+        with transaction.atomic():
+            with month_lock(2025, 9):
+                with month_lock(2025, 9):
+                    pass
+            # 解放後もコミットまでは同じトランザクションから再取得できる
+            with month_lock(2025, 9):
+                pass
+            self.assertTrue(LeaderboardLock.objects.filter(year=2025, month=9).exists())
+
+        self.assertFalse(LeaderboardLock.objects.filter(year=2025, month=9).exists())
+
+    def test_expired_lock_is_taken_over(self):
+        """保持者が異常終了して失効したロックは取得できる"""
+        LeaderboardLock.objects.create(
+            year=2025, month=9, owner='crashed',
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertTrue(self._try_and_release())
+
+    def test_concurrent_callers_share_one_computation(self):
+        """ロック解放待ちの呼び出しは、1回の計算結果を共有する"""
+        calls = []
+        results = []
+        holder = MonthLock(2025, 9)
+        self.assertTrue(holder.try_acquire())
+
+        def compute():
+            calls.append(1)
+            time_module.sleep(0.3)
+            return {'success': True, 'calls': len(calls)}
+
+        def caller():
+            try:
+                results.append(run_single_flight('test', 2025, 9, compute))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=caller) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time_module.sleep(0.2)
+        holder.release()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'success': True, 'calls': 1}] * 3)
+
+
+class DailyMinutesFieldTest(TestCase):
+    """日別労働時間（uint16配列）フィールドのテスト"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='packed@example.com', name='Packed')
+
+    def test_values_are_packed_into_62_bytes(self):
+        """31日分が62バイトのリトルエンディアン配列として保存される"""
+        minutes = DailyMinutes()
+        minutes[1] = 480
+        minutes[31] = 0xFFFF
+        data = minutes.to_bytes()
+
+        self.assertEqual(len(data), 62)
+        self.assertEqual(data[:2], (480).to_bytes(2, 'little'))
+        self.assertEqual(DailyMinutes.from_bytes(data), minutes)
+
+    def test_day_access_and_aggregates(self):
+        minutes = DailyMinutes.from_dict({'3': 300, '10': 420})
+        minutes[5] = 60
+
+        self.assertEqual(minutes[10], 420)
+        self.assertEqual(minutes[4], 0)
+        self.assertEqual(minutes.total(), 780)
+        self.assertEqual(minutes.worked_days(), 3)
+        self.assertEqual(minutes.latest_day(), 10)
+        self.assertEqual(minutes.to_dict(), {'3': 300, '5': 60, '10': 420})
+        self.assertEqual(minutes.as_list(5), [0, 0, 300, 0, 60])
+
+    def test_out_of_range_values_are_rejected(self):
+        minutes = DailyMinutes()
+        with self.assertRaises(IndexError):
+            minutes[0] = 10
+        with self.assertRaises(IndexError):
+            minutes[32] = 10
+        with self.assertRaises(ValueError):
+            minutes[1] = 0x10000
+        with self.assertRaises(ValueError):
+            minutes[1] = -1
+
+    def test_round_trip_through_database(self):
+        """辞書で作成したエントリも DailyMinutes として読み出せる"""
+        entry = LeaderboardEntry.objects.create(
+            user=self.user, year=2025, month=9,
+            cached_daily_minutes={'1': 480, '15': 300},
+        )
+        entry.refresh_from_db()
+
+        self.assertIsInstance(entry.cached_daily_minutes, DailyMinutes)
+        self.assertEqual(entry.cached_daily_minutes[15], 300)
+
+        entry.cached_daily_minutes[15] = 360
+        entry.save(update_fields=['cached_daily_minutes'])
+        entry.refresh_from_db()
+        self.assertEqual(entry.cached_daily_minutes, {'1': 480, '15': 360})
+
+    def test_new_entry_defaults_to_empty_month(self):
+        entry = LeaderboardEntry.objects.create(user=self.user, year=2025, month=9)
+        entry.refresh_from_db()
+
+        self.assertFalse(entry.cached_daily_minutes)
+        self.assertEqual(entry.cached_daily_minutes.total(), 0)
@@ -5,8 +5,13 @@ app_name = 'leaderboard'
 
 urlpatterns = [
     path('', views.leaderboard, name='leaderboard'),
+    path('stream/', views.stream, name='stream'),
     path('api/join/', views.join, name='join'),
     path('api/status/',views.get_status, name='status'),
+    path('api/trajectory/', views.get_trajectory, name='trajectory'),
+    path('api/window/', views.get_window, name='window'),
+    path('api/entries/', views.get_entries, name='entries'),
+    path('api/metric/', views.get_metric, name='metric'),
     path('api/update/',views.update, name='update'),
     path('api/recalculate-from-scratch/', views.recalculate_from_scratch, name='recalculate_from_scratch'),
 ]
\ No newline at end of file
@@ -1,9 +1,29 @@
+import asyncio
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.http import require_POST
-from django.http import JsonResponse
+from django.views.decorators.http import condition, require_GET, require_POST
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
 from .models import LeaderboardEntry
-from .services import LeaderboardService
+from .services import (
+    METRICS,
+    LeaderboardService,
+    get_metric_ranking,
+    get_participant_count,
+    get_rank_trajectory,
+    get_ranking_last_modified,
+    get_ranking_page,
+    get_ranking_version,
+    get_ranking_window,
+    get_user_ranking_row,
+    is_past_month,
+)
+from .services.ranking_window import DEFAULT_AROUND, DEFAULT_PAGE_SIZE, DEFAULT_TOP, MAX_PAGE_SIZE
+from .services.ranking_stream import RESYNC, broadcaster
 from .utils import (
     get_year_month_from_request,
     check_join_period,
@@ -13,8 +33,157 @@ from .utils import (
     format_leaderboard_success
 )
 
+# 終了済みの月のランキングは変化しないため長期キャッシュを許可する
+CLOSED_MONTH_MAX_AGE = 60 * 60 * 24
+
+# SSE接続のキープアライブ間隔（秒）
+STREAM_HEARTBEAT_SECONDS = 15
+
+# SSE接続を張り直させるまでの時間（秒）。ワーカー間の接続数を平準化する
+STREAM_MAX_SECONDS = 60 * 30
+
+# 切断時にブラウザが再接続するまでの待ち時間（ミリ秒）
+STREAM_RETRY_MS = 3000
+
+
+def _get_requested_year_month(request):
+    """ETag / Last-Modified算出用に年月パラメーターを取得（不正な場合はNone）"""
+    year, month, error_response = get_year_month_from_request(request, get_jst_now(), 'GET')
+    if error_response:
+        return None
+    return year, month
+
+
+def _ranking_etag(request, *args, **kwargs):
+    """ランキングのバージョン・閲覧ユーザー・日付からETagを生成"""
+    year_month = _get_requested_year_month(request)
+    if year_month is None or not request.user.is_authenticated:
+        return None
+    year, month = year_month
+    version = get_ranking_version(year, month)
+    # 参加期間や「今日」の表示が日付で変わるため日付も含める
+    # ページング等のパラメーターごとに内容が異なるためクエリ文字列も含める
+    raw = (
+        f'{year}:{month}:{version}:{request.user.pk}:'
+        f'{request.user.is_staff or request.user.is_superuser}:{get_jst_now().date()}:'
+        f'{request.GET.urlencode()}'
+    )
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def _ranking_last_modified(request, *args, **kwargs):
+    """ランキングの最終更新時刻"""
+    year_month = _get_requested_year_month(request)
+    if year_month is None or not request.user.is_authenticated:
+        return None
+    return get_ranking_last_modified(*year_month)
+
+
+def _set_ranking_cache_headers(response, year, month):
+    """終了済みの月は長期キャッシュ、当月は毎回再検証させる"""
+    if is_past_month(year, month):
+        patch_cache_control(response, private=True, max_age=CLOSED_MONTH_MAX_AGE)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _get_int_param(request, name, default, minimum, maximum):
+    """整数のクエリパラメーターを範囲内に丸めて取得（不正な場合は既定値）"""
+    try:
+        value = int(request.GET.get(name, default))
+    except (TypeError, ValueError):
+        value = default
+    return max(minimum, min(value, maximum))
+
+
+def _can_view_ranking(user, year, month):
+    """
+    ランキングを閲覧できるか判定（参加者と管理者のみ）
+
+    Returns:
+        tuple: (閲覧可否, 自分の順位行（不参加の場合はNone）)
+    """
+    entry = get_user_ranking_row(year, month, user.pk)
+    return bool(entry or user.is_staff or user.is_superuser), entry
+
+
+def _not_joined_response(year, month):
+    response = JsonResponse(format_leaderboard_error(
+        'not_joined',
+        'ランキングに参加していません',
+        year=year,
+        month=month
+    ))
+    return _set_ranking_cache_headers(response, year, month)
+
+
+def _format_sse(event):
+    """イベント辞書をSSEの書式に変換"""
+    data = json.dumps(event['data'], ensure_ascii=False)
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n"
+
+
+def _parse_last_event_id(request):
+    """Last-Event-IDヘッダー（またはクエリ）を取得（不正な場合はNone）"""
+    raw = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+async def _ranking_event_stream(year, month, last_event_id):
+    """
+    ランキング変更イベントを送り続ける非同期ジェネレーター
+
+    再接続時は Last-Event-ID 以降のイベントを再送し、
+    履歴から再現できない場合は再同期イベント（snapshot）を送る
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_MAX_SECONDS
+    queue = broadcaster.subscribe(year, month)
+    last_sent = 0
+    try:
+        yield f'retry: {STREAM_RETRY_MS}\n\n'
+
+        replayed = None
+        if last_event_id is not None:
+            replayed = broadcaster.replay(year, month, last_event_id)
+            last_sent = last_event_id
+        if replayed is None:
+            replayed = [await sync_to_async(broadcaster.snapshot_event)(year, month)]
+
+        for event in replayed:
+            last_sent = event['id']
+            yield _format_sse(event)
+
+        while loop.time() < deadline:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+
+            if event is RESYNC:
+                event = await sync_to_async(broadcaster.snapshot_event)(year, month)
+            elif event['id'] <= last_sent:
+                # 購読開始直後に再送分と重複したイベント
+                continue
+            last_sent = event['id']
+            yield _format_sse(event)
+    finally:
+        broadcaster.unsubscribe(year, month, queue)
+
+
 @login_required
 def leaderboard(request):
+    """
+    ランキング画面
+
+    ページにはCSRFトークンや承認待ち件数を含むため、条件付きGET・長期キャッシュの対象にしない
+    （ETag・Cache-Control は順位を返すJSONのAPIにのみ付ける）
+    """
     now = get_jst_now()
     
     # 年月パラメーターを取得
@@ -25,18 +194,8 @@ def leaderboard(request):
     # 参加期間かどうかを判定（毎月1日〜10日）
     is_current_month, is_join_period = check_join_period(year, month, now)
     
-    # ユーザーのエントリを取得
-    entry = LeaderboardEntry.objects.filter(
-        user=request.user,
-        year=year,
-        month=month
-    ).first()
-    
-    # 同じ年月の全エントリを取得してランキング表示
-    all_entries = LeaderboardEntry.objects.filter(
-        year=year,
-        month=month
-    ).order_by('rank', '-total_minutes')
+    # ユーザーのエントリと参加者数のみ取得し、一覧は部分取得APIから読み込む
+    entry = get_user_ranking_row(year, month, request.user.pk)
     
     context = {
         'year': year,
@@ -45,7 +204,9 @@ def leaderboard(request):
         'is_current_month': is_current_month,
         'is_join_period': is_join_period,
         'entry': entry,
-        'all_entries': all_entries,
+        'participant_count': get_participant_count(year, month),
+        'ranking_top': DEFAULT_TOP,
+        'ranking_around': DEFAULT_AROUND,
         'current_day': now.day,
     }
     
@@ -75,46 +236,34 @@ def join(request):
             '参加期間ではありません（毎月1日〜10日）'
         ))
 
-    try:
-        entry, created = LeaderboardEntry.objects.get_or_create(
-            user=user,
+    # 月の打刻を1回で集計し、全体を再計算せずに順位の位置へ挿入する
+    entry, response = LeaderboardService(user).join_leaderboard(year=year, month=month)
+    if response['success']:
+        return JsonResponse(format_leaderboard_success(
+            'joined',
+            'ランキングに参加しました',
             year=year,
             month=month
-        )
-    except Exception as e:
-        return JsonResponse(format_leaderboard_error(
-            'error',
-            str(e)
         ))
     
-    if created:
-        service = LeaderboardService(user)
-        # 参加時に初回の完全計算を実行
-        updated_entry, response = service.recalculate_user_stats_from_scratch(year=year, month=month)
-        if not response or not response.get('success'):
-            # 参加は成功したが計算でエラーが発生した場合
-            return JsonResponse(format_leaderboard_error(
-                'calculation_error',
-                f'参加は完了しましたが、労働時間の計算でエラーが発生しました: {response.get("error", "不明なエラー")}'
-            ))
-        
-        service.update_leaderboard(year=year, month=month)
-        
-        return JsonResponse(format_leaderboard_success(
-            'joined',
-            'ランキングに参加しました',
+    if response['status'] == 'already_joined':
+        return JsonResponse(format_leaderboard_error(
+            'already_joined',
+            '既にランキングに参加済みです',
             year=year,
             month=month
         ))
     
-    return JsonResponse(format_leaderboard_error(
-        'already_joined',
-        '既にランキングに参加済みです',
-        year=year,
-        month=month
-    ))    
+    if response['status'] == 'error':
+        return JsonResponse(format_leaderboard_error(
+            'calculation_error',
+            f'労働時間の計算でエラーが発生したため参加できませんでした: {response.get("error", "不明なエラー")}'
+        ))
+    
+    return JsonResponse(response)
 
 @login_required
+@condition(etag_func=_ranking_etag, last_modified_func=_ranking_last_modified)
 def get_status(request):
     user = request.user
     now = get_jst_now()
@@ -124,78 +273,235 @@ def get_status(request):
     if error_response:
         return error_response
     try:
-        entry = LeaderboardEntry.objects.get(
-            user=user,
-            year=year,
-            month=month
-        )
-    except LeaderboardEntry.DoesNotExist:
-        return JsonResponse(format_leaderboard_error(
-            'not_joined',
-            'ランキングに参加していません',
-            year=year,
-            month=month
-        ))
+        entry = get_user_ranking_row(year, month, user.pk)
     except Exception as e:
         return JsonResponse(format_leaderboard_error(
             'error',
             str(e)
         ))
+    
+    if entry is None:
+        return _not_joined_response(year, month)
 
-    return JsonResponse(format_leaderboard_success(
+    response = JsonResponse(format_leaderboard_success(
         'got_status',
         entry={
-            'user': entry.user.name,
-            'year': entry.year,
-            'month': entry.month,
-            'total_minutes': entry.total_minutes,
-            'total_hours_display': entry.total_hours_display,
-            'rank': entry.rank,
-            'joined_at': entry.joined_at.astimezone(now.tzinfo).isoformat(),
-            'last_updated': entry.last_updated.astimezone(now.tzinfo).isoformat(),
+            'user': entry['user_name'],
+            'year': year,
+            'month': month,
+            'total_minutes': entry['total_minutes'],
+            'total_hours_display': entry['total_hours_display'],
+            'rank': entry['rank'],
+            'joined_at': entry['joined_at'],
+            'last_updated': entry['last_updated'],
         }
     ))
+    return _set_ranking_cache_headers(response, year, month)
+
+@login_required
+@condition(etag_func=_ranking_etag, last_modified_func=_ranking_last_modified)
+def get_trajectory(request):
+    """
+    日別の順位推移（グラフ用）を返す
+
+    参加者×日の累計労働時間と順位を列指向の配列で返す。
+    ランキングバージョンごとにキャッシュされる
+    """
+    user = request.user
+    now = get_jst_now()
+
+    # 年月パラメーターを取得
+    year, month, error_response = get_year_month_from_request(request, now, 'GET')
+    if error_response:
+        return error_response
+
+    can_view, _ = _can_view_ranking(user, year, month)
+    if not can_view:
+        return _not_joined_response(year, month)
+
+    try:
+        trajectory = get_rank_trajectory(year, month)
+    except Exception as e:
+        return JsonResponse(format_leaderboard_error(
+            'error',
+            str(e)
+        ))
+
+    response = JsonResponse(format_leaderboard_success(
+        'got_trajectory',
+        trajectory=trajectory
+    ))
+    return _set_ranking_cache_headers(response, year, month)
+
+@login_required
+@condition(etag_func=_ranking_etag, last_modified_func=_ranking_last_modified)
+def get_window(request):
+    """
+    上位N件と自分の前後K件を返す（ランキング画面の初期表示用）
+
+    クエリパラメーター: year, month, top, around
+    """
+    now = get_jst_now()
+
+    # 年月パラメーターを取得
+    year, month, error_response = get_year_month_from_request(request, now, 'GET')
+    if error_response:
+        return error_response
+
+    can_view, _ = _can_view_ranking(request.user, year, month)
+    if not can_view:
+        return _not_joined_response(year, month)
+
+    top = _get_int_param(request, 'top', DEFAULT_TOP, 1, MAX_PAGE_SIZE)
+    around = _get_int_param(request, 'around', DEFAULT_AROUND, 0, MAX_PAGE_SIZE)
+    window = get_ranking_window(year, month, request.user.pk, top=top, around=around)
+
+    response = JsonResponse(format_leaderboard_success(
+        'got_window',
+        year=year,
+        month=month,
+        version=get_ranking_version(year, month),
+        **window
+    ))
+    return _set_ranking_cache_headers(response, year, month)
+
+@login_required
+@condition(etag_func=_ranking_etag, last_modified_func=_ranking_last_modified)
+def get_entries(request):
+    """
+    順位順の一覧をキーセットページングで返す
+
+    クエリパラメーター: year, month, cursor（前ページの next_cursor）, limit
+    """
+    now = get_jst_now()
+
+    # 年月パラメーターを取得
+    year, month, error_response = get_year_month_from_request(request, now, 'GET')
+    if error_response:
+        return error_response
+
+    can_view, _ = _can_view_ranking(request.user, year, month)
+    if not can_view:
+        return _not_joined_response(year, month)
+
+    limit = _get_int_param(request, 'limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    try:
+        page = get_ranking_page(year, month, cursor=request.GET.get('cursor') or None, limit=limit)
+    except ValueError as e:
+        return JsonResponse(format_leaderboard_error(
+            'invalid_params',
+            str(e)
+        ))
+
+    response = JsonResponse(format_leaderboard_success(
+        'got_entries',
+        year=year,
+        month=month,
+        **page
+    ))
+    return _set_ranking_cache_headers(response, year, month)
+
+@login_required
+@condition(etag_func=_ranking_etag, last_modified_func=_ranking_last_modified)
+def get_metric(request):
+    """
+    指定した指標（出勤日数・最長連続出勤日数など）での上位N件と自分の順位を返す
+
+    クエリパラメーター: year, month, metric, limit
+    """
+    now = get_jst_now()
+
+    # 年月パラメーターを取得
+    year, month, error_response = get_year_month_from_request(request, now, 'GET')
+    if error_response:
+        return error_response
+
+    can_view, _ = _can_view_ranking(request.user, year, month)
+    if not can_view:
+        return _not_joined_response(year, month)
+
+    metric = request.GET.get('metric') or 'total_minutes'
+    limit = _get_int_param(request, 'limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    try:
+        rows = get_metric_ranking(year, month, metric)
+    except ValueError as e:
+        return JsonResponse(format_leaderboard_error(
+            'invalid_params',
+            str(e)
+        ))
+
+    my_entry = next((row for row in rows if row['user_id'] == request.user.pk), None)
+    response = JsonResponse(format_leaderboard_success(
+        'got_metric',
+        year=year,
+        month=month,
+        metric=metric,
+        label=METRICS[metric].label,
+        metrics=[{'name': name, 'label': definition.label} for name, definition in METRICS.items()],
+        participant_count=len(rows),
+        entries=rows[:limit],
+        my_entry=my_entry,
+    ))
+    return _set_ranking_cache_headers(response, year, month)
+
+@login_required
+@require_GET
+async def stream(request):
+    """
+    当月のランキング変更をServer-Sent Eventsで配信
+
+    参加者と管理者のみ購読できる。イベントIDはランキングバージョン
+    """
+    user = await request.auser()
+    now = get_jst_now()
+    year = int(now.year)
+    month = int(now.month)
+
+    if not (user.is_staff or user.is_superuser):
+        joined = await LeaderboardEntry.objects.filter(user=user, year=year, month=month).aexists()
+        if not joined:
+            return JsonResponse(format_leaderboard_error(
+                'not_joined',
+                'ランキングに参加していません',
+                year=year,
+                month=month
+            ), status=403)
+
+    response = StreamingHttpResponse(
+        _ranking_event_stream(year, month, _parse_last_event_id(request)),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # リバースプロキシでのバッファリングを無効化
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 @login_required
 @require_POST
 def update(request):
+    """
+    最新のランキング情報を返す
+    
+    労働時間と順位は打刻イベント（leaderboard.signals）で差分更新されるため、
+    ここでは再計算を行わず読み取りのみ行う
+    """
     user = request.user
     now = get_jst_now()
     year = int(now.year)
     month = int(now.month)
     
-    # LeaderboardServiceを使用して統計情報を更新
-    entries = LeaderboardEntry.objects.filter(year=year, month=month)
-    for leaderboard_entry in entries:
-        current_user = leaderboard_entry.user
-        service = LeaderboardService(current_user)
-        updated_entry, response = service.update_user_stats(year=year, month=month)
-        # エラーチェック（成功時もresponseが返るため、successフラグで判定）
-        if not response or not response.get('success'):
-            return JsonResponse(response or {'success': False, 'error': '不明なエラー'})
-        print(f'{current_user.name}の労働時間計算成功')
-    
-    # ランキングを更新
-    service = LeaderboardService()
-    ranking_result = service.update_leaderboard(year, month)
-    if not ranking_result.get('success'):
-        return JsonResponse(ranking_result)
-    
     # リクエストユーザーのエントリ情報を取得（参加していない場合の処理も含む）
     try:
         user_entry = LeaderboardEntry.objects.get(user=user, year=year, month=month)
-        user_entry.refresh_from_db()
-        total_minutes = user_entry.total_minutes
-        rank = user_entry.rank
         
         return JsonResponse(format_leaderboard_success(
             'updated',
             '更新されました',
-            total_minutes=total_minutes,
-            rank=rank
+            total_minutes=user_entry.total_minutes,
+            rank=user_entry.rank
         ))
     except LeaderboardEntry.DoesNotExist:
-        # 管理者が参加していない場合でもランキング更新は成功
+        # 管理者が参加していない場合でもランキング取得は成功
         return JsonResponse(format_leaderboard_success(
             'updated',
             'ランキングを更新しました（管理者権限）'
@@ -99,6 +99,14 @@ DATABASES = {
 }
 
 
+# Cache
+# ランキング等の読み取りキャッシュはバージョンキーで無効化するため、
+# 複数ワーカー間で共有できるDBキャッシュを既定とする（CACHE_URLで変更可能）
+CACHES = {
+    'default': env.cache_url('CACHE_URL', default='dbcache://django_cache'),
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -188,4 +196,11 @@ SUPERUSER_NAME = env("SUPERUSER_NAME")
 SUPERUSER_PASSWORD = env("SUPERUSER_PASSWORD")
 
 # Cron API用のセキュリティキー
-CRON_API_SECRET = env("CRON_API_SECRET")
\ No newline at end of file
+CRON_API_SECRET = env("CRON_API_SECRET")
+
+# ランキング完全再計算の並列ワーカー数（Cron API用）
+LEADERBOARD_RECALC_WORKERS = env.int("LEADERBOARD_RECALC_WORKERS", default=1)
+
+# ランキングのSSE配信方式（'local': プロセス内のみ / 'cache': 共有キャッシュを監視して他ワーカーの更新も配信）
+LEADERBOARD_STREAM_BACKEND = env("LEADERBOARD_STREAM_BACKEND", default="cache")
+LEADERBOARD_STREAM_POLL_SECONDS = env.float("LEADERBOARD_STREAM_POLL_SECONDS", default=2.0)
@@ -1,16 +1,29 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import TemplateView, ListView, CreateView, UpdateView, DetailView, View
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.contrib.auth import get_user_model
 from django.db.models import Count, Q
-from django.db import models
 from django.contrib import messages
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.db import transaction
+import hashlib
 import json
 
 from .decorators import AdminRequiredMixin, admin_required_api, log_admin_action
 from .models import Skill, SalaryGrade, UserSkill, SkillApplication, UserSalaryGrade, AdminActionLog
+from .services.activity_feed import DEFAULT_LIMIT, MAX_LIMIT, get_activities, get_latest_activity_id, serialize_activity
+from .services.grade_catalog import get_grade_catalog
+from .services.labor_cost_report import get_labor_cost_report, write_labor_cost_csv
+from .services.pending_counter import get_pending_application_count
+from .services.promotion_paths import find_promotion_cycles
+from .services.skill_matrix import SkillMatrix
+from .services.promotion_eligibility_service import PromotionEligibilityService
+from .services.skill_application_service import (
+    RESULT_ALREADY_ACQUIRED, RESULT_APPROVED, RESULT_NOT_FOUND, RESULT_REJECTED, SkillApplicationBulkService
+)
 
 User = get_user_model()
 
@@ -27,28 +40,87 @@ class AdminDashboardView(AdminRequiredMixin, TemplateView):
             'total_users': User.objects.count(),
             'total_skills': Skill.objects.count(),
             'total_grades': SalaryGrade.objects.count(),
-            'pending_applications': SkillApplication.objects.filter(status='pending').count(),
+            'pending_applications': get_pending_application_count(),
             
-            # スキル別習得者マップ
-            'skills_map': Skill.objects.prefetch_related(
-                'userskill_set__user'
-            ).annotate(
-                holders_count=Count('userskill')
-            )[:10],
-            
-            # グレード別所属者マップ
-            'grades_map': SalaryGrade.objects.prefetch_related(
-                'usersalarygrade_set__user'
-            ).annotate(
-                members_count=Count('usersalarygrade__id')
-            ).order_by('level'),
+            # スキル別習得者マップ・グレード別所属者マップ（習得状況マトリクスから集計）
+            **self._build_maps(),
             
             # 最近の活動ログ
-            'recent_actions': AdminActionLog.objects.select_related(
-                'admin_user', 'target_user'
-            ).order_by('-timestamp')[:10],
+            'recent_actions': get_activities()['activities'],
         })
         return context
+    
+    def _build_maps(self, skills_limit=10, avatars_limit=6):
+        """スキル別習得者・グレード別所属者（現在のグレード）のマップを作成"""
+        matrix = SkillMatrix.load()
+        catalog = get_grade_catalog()
+        
+        skills = sorted(catalog.skills.values(), key=lambda skill: (skill.category, skill.name, skill.pk))
+        skills_map = [
+            {
+                'id': skill.pk,
+                'name': skill.name,
+                'category_display': skill.get_category_display(),
+                'holders_count': matrix.holders_count(skill.pk),
+                'holder_names': [
+                    matrix.user_names[user_id]
+                    for user_id in matrix.user_ids_of(matrix.holders(skill.pk), limit=avatars_limit)
+                ],
+            }
+            for skill in skills[:skills_limit]
+        ]
+        grades_map = [
+            {
+                'id': grade.pk,
+                'name': grade.name,
+                'level': grade.level,
+                'hourly_wage': grade.hourly_wage,
+                'members_count': matrix.grade_members(grade.pk).bit_count(),
+                'member_names': [
+                    matrix.user_names[user_id]
+                    for user_id in matrix.user_ids_of(matrix.grade_members(grade.pk), limit=avatars_limit)
+                ],
+            }
+            for grade in catalog.grades.values()
+        ]
+        return {'skills_map': skills_map, 'grades_map': grades_map}
+
+
+def _recent_activities_etag(request, *args, **kwargs):
+    """最新のログIDとクエリ文字列からETagを生成（新しいログがなければ304）"""
+    raw = f'{get_latest_activity_id()}:{request.GET.urlencode()}'
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+class AdminRecentActivitiesAPI(AdminRequiredMixin, View):
+    """
+    活動ログの差分取得API
+
+    since_id（前回レスポンスの cursor）を指定すると、それより新しいログのみを返す
+    """
+
+    @method_decorator(condition(etag_func=_recent_activities_etag))
+    @admin_required_api
+    def get(self, request):
+        try:
+            since_id = int(request.GET['since_id'])
+        except (KeyError, TypeError, ValueError):
+            since_id = None
+        try:
+            limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+        except (TypeError, ValueError):
+            limit = DEFAULT_LIMIT
+        limit = max(1, min(limit, MAX_LIMIT))
+
+        feed = get_activities(since_id, limit)
+        response = JsonResponse({
+            'status': 'success',
+            'activities': [serialize_activity(log) for log in feed['activities']],
+            'cursor': feed['cursor'],
+            'has_more': feed['has_more'],
+        })
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
 
 
 # ======= スキル管理 =======
@@ -253,10 +325,10 @@ class AdminGradeListView(AdminRequiredMixin, ListView):
     context_object_name = 'grades'
     
     def get_queryset(self):
-        # 現在のグレード所属者数をアノテーション（UserSalaryGrade経由）
+        # 現在のグレード所属者数をアノテーション（User.current_salary_grade経由）
         return SalaryGrade.objects.annotate(
-            members_count=Count('usersalarygrade', distinct=True)
-        ).order_by('level')
+            members_count=Count('current_members', distinct=True)
+        ).prefetch_related('required_skills').order_by('level')
 
 
 class AdminGradeCreateView(AdminRequiredMixin, CreateView):
@@ -310,7 +382,9 @@ class AdminGradeCreateView(AdminRequiredMixin, CreateView):
     
     @log_admin_action('grade_create')
     def form_valid(self, form):
-        response = super().form_valid(form)
+        # グレード本体と必要スキル・昇進先の保存をまとめ、昇進経路の再構築をコミット後の1回にする
+        with transaction.atomic():
+            response = super().form_valid(form)
         messages.success(self.request, f'グレード「{self.object.name}」を作成しました。')
         return response
 
@@ -323,10 +397,11 @@ class AdminGradeDetailView(DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # 現在の所属者数（UserSalaryGradeの最新レコードから）
+        # 現在の所属者（現在のグレードがこのグレードのユーザーの履歴）
         current_members = UserSalaryGrade.objects.filter(
-            salary_grade=self.object
-        ).select_related('user', 'changed_by').order_by('-effective_date')
+            salary_grade=self.object,
+            user__current_salary_grade=self.object
+        ).select_related('user', 'changed_by').order_by('-effective_date', '-id')
         
         # 重複ユーザーを除去（最新レコードのみ）
         seen_users = set()
@@ -339,45 +414,27 @@ class AdminGradeDetailView(DetailView):
         context['current_members'] = unique_members
         context['members_count'] = len(unique_members)
         
+        catalog = get_grade_catalog()
+        
         # 必要スキル
-        context['required_skills'] = self.object.required_skills.all().order_by('name')
+        context['required_skills'] = sorted(
+            catalog.required_skills(self.object.id), key=lambda skill: skill.name
+        )
         
         # 昇進先グレード
-        context['next_grades'] = self.object.next_possible_grades.all().order_by('level')
+        context['next_grades'] = catalog.next_grades(self.object.id)
         
         # このグレードから昇進可能なグレード（逆方向）
-        context['promotion_from_grades'] = SalaryGrade.objects.filter(
-            next_possible_grades=self.object
-        ).order_by('level')
+        context['promotion_from_grades'] = catalog.previous_grades(self.object.id)
         
         # 統計情報
         total_users = User.objects.count()
         context['occupation_rate'] = (context['members_count'] / total_users * 100) if total_users > 0 else 0
         
         # 昇進条件達成者（このグレードへの昇進条件を満たし、現在のグレードから昇進可能なユーザー）
-        if context['required_skills']:
-            required_skill_ids = set(self.object.required_skills.values_list('id', flat=True))
-            eligible_users_list = []
-            for user in User.objects.prefetch_related('userskill_set'):
-                # 必要スキルをすべて持っているかチェック
-                user_skill_ids = set(user.userskill_set.values_list('skill_id', flat=True))
-                if required_skill_ids.issubset(user_skill_ids):
-                    # ユーザーの現在の給与グレードを取得
-                    current_grade = user.current_salary_grade
-                    if current_grade and current_grade.next_possible_grades.filter(id=self.object.id).exists():
-                        # 現在のグレードの昇進先にこのグレードが含まれている場合のみ追加
-                        eligible_users_list.append(user)
-            context['eligible_users'] = eligible_users_list
-            context['eligible_users_count'] = len(eligible_users_list)
-        else:
-            # 必要スキルがない場合でも昇進経路をチェック
-            eligible_users_list = []
-            for user in User.objects.all():
-                current_grade = user.current_salary_grade
-                if current_grade and current_grade.next_possible_grades.filter(id=self.object.id).exists():
-                    eligible_users_list.append(user)
-            context['eligible_users'] = eligible_users_list
-            context['eligible_users_count'] = len(eligible_users_list)
+        eligible_users_list = list(PromotionEligibilityService().eligible_users(self.object))
+        context['eligible_users'] = eligible_users_list
+        context['eligible_users_count'] = len(eligible_users_list)
             
         return context
 
@@ -427,14 +484,8 @@ class AdminGradeEditView(AdminRequiredMixin, UpdateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # 現在のグレード所属者数を取得 - UserSalaryGradeから最新のレコードで判定
-        from salary.models import UserSalaryGrade
-        latest_grade_users = UserSalaryGrade.objects.filter(
-            salary_grade=self.object
-        ).values('user').annotate(
-            latest_date=models.Max('effective_date')
-        )
-        members_count = latest_grade_users.count()
+        # 現在のグレード所属者数を取得
+        members_count = self.object.current_members.count()
         context['members_count'] = members_count
         # gradeオブジェクトにmembers_countを追加（テンプレートで使用）
         context['grade'] = self.object
@@ -447,8 +498,14 @@ class AdminGradeEditView(AdminRequiredMixin, UpdateView):
     
     @log_admin_action('grade_edit')
     def form_valid(self, form):
-        response = super().form_valid(form)
+        # グレード本体と必要スキル・昇進先の保存をまとめ、昇進経路の再構築をコミット後の1回にする
+        with transaction.atomic():
+            response = super().form_valid(form)
         messages.success(self.request, f'グレード「{self.object.name}」を更新しました。')
+        
+        # 昇進経路が循環している場合は警告する
+        for cycle in find_promotion_cycles():
+            messages.warning(self.request, f'昇進経路が循環しています: {" → ".join(cycle)}')
         return response
 
 class AdminGradeDeleteAPI(AdminRequiredMixin, View):
@@ -458,15 +515,8 @@ class AdminGradeDeleteAPI(AdminRequiredMixin, View):
             grade = get_object_or_404(SalaryGrade, pk=pk)
             grade_name = grade.name
             
-            # 所属者数をチェック
-            # 現在のグレード所属者数をチェック（UserSalaryGradeの最新レコードで判定）
-            from salary.models import UserSalaryGrade
-            latest_grade_users = UserSalaryGrade.objects.filter(
-                salary_grade=grade
-            ).values('user').annotate(
-                latest_date=models.Max('effective_date')
-            )
-            members_count = latest_grade_users.count()
+            # 現在のグレード所属者数をチェック
+            members_count = grade.current_members.count()
             
             if members_count > 0:
                 return JsonResponse({
@@ -506,8 +556,10 @@ class AdminUserManagementView(AdminRequiredMixin, ListView):
     paginate_by = 50
     
     def get_queryset(self):
-        queryset = User.objects.prefetch_related(
-            'userskill_set__skill', 'salary_history__salary_grade'
+        queryset = User.objects.select_related(
+            'current_salary_grade'
+        ).prefetch_related(
+            'userskill_set'
         ).order_by('name')
         
         # 検索フィルタ
@@ -518,18 +570,14 @@ class AdminUserManagementView(AdminRequiredMixin, ListView):
                 Q(email__icontains=search)
             )
         
-        # グレードフィルタ - UserSalaryGradeの最新レコードで判定
+        # グレードフィルタ - 現在のグレードで判定
         grade_id = self.request.GET.get('grade')
         if grade_id == 'none':
             # グレード未設定のユーザーを取得
-            users_with_grades = UserSalaryGrade.objects.values('user').distinct()
-            queryset = queryset.exclude(id__in=users_with_grades)
+            queryset = queryset.filter(current_salary_grade__isnull=True)
         elif grade_id:
             # 指定されたグレードに所属するユーザーを取得
-            latest_grade_users = UserSalaryGrade.objects.filter(
-                salary_grade_id=grade_id
-            ).values('user')
-            queryset = queryset.filter(id__in=latest_grade_users)
+            queryset = queryset.filter(current_salary_grade_id=grade_id)
         
         # スキルフィルタ
         skill_id = self.request.GET.get('skill')
@@ -543,36 +591,35 @@ class AdminUserManagementView(AdminRequiredMixin, ListView):
         context['salary_grades'] = SalaryGrade.objects.order_by('level')
         context['skills'] = Skill.objects.order_by('name')
         
-        # 各ユーザーに昇進条件情報を追加
-        users = context['users']
-        for user in users:
-            user.promotion_conditions = self._get_promotion_conditions(user)
+        # 各ユーザーに昇進条件情報を追加（ページ全体をまとめて判定）
+        self._attach_promotion_conditions(context['users'])
         
         return context
     
-    def _get_current_salary_grade(self, user):
-        """ユーザーの現在の給与グレードを取得"""
-        latest_grade = UserSalaryGrade.objects.filter(
-            user=user
-        ).select_related('salary_grade').order_by('-effective_date').first()
-        return latest_grade.salary_grade if latest_grade else None
+    def _attach_promotion_conditions(self, users):
+        """
+        ページ内のユーザーの昇進条件をまとめてチェック
+
+        昇進先・必要スキルはグレードカタログ、習得済みスキルはプリフェッチ済みの
+        userskill_set から取得し、ユーザーごとのクエリを発行しない
+        """
+        catalog = get_grade_catalog()
+        for user in users:
+            user.promotion_conditions = self._get_promotion_conditions(user, catalog)
     
-    def _get_promotion_conditions(self, user):
+    def _get_promotion_conditions(self, user, catalog):
         """ユーザーの昇進条件をチェック"""
-        current_grade = user.current_salary_grade
-        if not current_grade:
+        if not user.current_salary_grade_id:
             return []
         
-        # 現在のグレードから昇進可能な次のグレードを取得
-        next_grades = current_grade.next_possible_grades.prefetch_related('required_skills').all()
-        
-        # ユーザーが習得済みのスキルを取得
-        user_skills = set(user.userskill_set.values_list('skill_id', flat=True))
+        # ユーザーが習得済みのスキル（プリフェッチ済み）
+        user_skills = {user_skill.skill_id for user_skill in user.userskill_set.all()}
         
         promotion_conditions = []
-        for next_grade in next_grades:
+        # 現在のグレードから昇進可能な次のグレード
+        for next_grade in catalog.next_grades(user.current_salary_grade_id):
             # 必要スキルを取得
-            required_skills = set(next_grade.required_skills.values_list('id', flat=True))
+            required_skills = catalog.required_skill_ids.get(next_grade.pk, frozenset())
             
             # 習得済みスキルと必要スキルを比較
             missing_skills = required_skills - user_skills
@@ -581,8 +628,8 @@ class AdminUserManagementView(AdminRequiredMixin, ListView):
             promotion_conditions.append({
                 'grade': next_grade,
                 'can_promote': can_promote,
-                'required_skills': required_skills,
-                'missing_skills': missing_skills,
+                'required_skills': set(required_skills),
+                'missing_skills': set(missing_skills),
                 'missing_skills_count': len(missing_skills)
             })
         
@@ -616,10 +663,10 @@ class AdminUserDetailView(AdminRequiredMixin, DetailView):
         # 現在のグレード所属情報（最新のUserSalaryGradeレコード）
         current_grade_member = UserSalaryGrade.objects.filter(
             user=user
-        ).select_related('salary_grade').order_by('-effective_date').first()
+        ).select_related('salary_grade').order_by('-effective_date', '-id').first()
 
         context['current_grade_member'] = current_grade_member
-        context['current_salary_grade'] = current_grade_member.salary_grade if current_grade_member else None
+        context['current_salary_grade'] = user.current_salary_grade
 
         # グレード変更履歴
         context['grade_history'] = UserSalaryGrade.objects.filter(
@@ -632,12 +679,12 @@ class AdminUserDetailView(AdminRequiredMixin, DetailView):
         ineligible_grade_entries = []  # ← 追加: 未達成グレードと不足スキル
 
         if context['current_salary_grade']:
-            # 必要スキルをまとめてprefetch
-            next_possible_grades = context['current_salary_grade']\
-                .next_possible_grades.prefetch_related('required_skills')
+            # 昇進先と必要スキルはグレードカタログから取得
+            catalog = get_grade_catalog()
+            next_possible_grades = catalog.next_grades(context['current_salary_grade'].id)
 
             for grade in next_possible_grades:
-                required_skill_ids = set(grade.required_skills.values_list('id', flat=True))
+                required_skill_ids = catalog.required_skill_ids.get(grade.id, frozenset())
 
                 total_required_skills = len(required_skill_ids)
                 acquired_skills_for_grade = len(required_skill_ids & user_skill_ids)
@@ -652,11 +699,13 @@ class AdminUserDetailView(AdminRequiredMixin, DetailView):
                 else:
                     # 未達成 → 不足スキルを抽出してcontextに渡す
                     missing_ids = required_skill_ids - user_skill_ids
-                    # 必要に応じてSkillオブジェクトを渡したいのでQuerySetで取得
-                    missing_skills_qs = grade.required_skills.filter(id__in=missing_ids).order_by('name')
+                    missing_skills = sorted(
+                        (catalog.skills[skill_id] for skill_id in missing_ids),
+                        key=lambda skill: skill.name
+                    )
                     ineligible_grade_entries.append({
                         'grade': grade,
-                        'missing_skills': list(missing_skills_qs),
+                        'missing_skills': missing_skills,
                         'acquired_count': acquired_skills_for_grade,
                         'required_count': total_required_skills,
                     })
@@ -822,11 +871,7 @@ class AdminChangeGradeAPI(AdminRequiredMixin, View):
             new_grade = get_object_or_404(SalaryGrade, pk=grade_id)
             
             # 現在のグレードと同じかチェック
-            current_grade_member = UserSalaryGrade.objects.filter(
-                user=user
-            ).order_by('-effective_date').first()
-            
-            if current_grade_member and current_grade_member.salary_grade.id == new_grade.id:
+            if user.current_salary_grade_id == new_grade.id:
                 return JsonResponse({
                     'status': 'error',
                     'message': f'{user.name}さんは既に「{new_grade.name}」グレードです。'
@@ -843,8 +888,7 @@ class AdminChangeGradeAPI(AdminRequiredMixin, View):
                     changed_by=request.user
                 )
                 
-                # UserモデルにはSalaryGradeとのリレーションがpropertyなので、何もしない
-                # current_salary_gradeはUserSalaryGradeの最新レコードから計算される
+                # User.current_salary_gradeは履歴の保存時にシグナルで更新される
                 
                 # 管理者操作ログを記録
                 AdminActionLog.objects.create(
@@ -920,75 +964,14 @@ class AdminBulkApproveAPI(AdminRequiredMixin, View):
                     'message': '申告IDが指定されていません。'
                 })
             
-            approved_count = 0
-            failed_applications = []
-            
-            with transaction.atomic():
-                for app_id in application_ids:
-                    try:
-                        application = SkillApplication.objects.select_for_update().get(
-                            id=app_id, status='pending'
-                        )
-                        
-                        # 承認処理を実行
-                        if self._approve_application(application, request.user):
-                            approved_count += 1
-                        else:
-                            failed_applications.append(f"ID:{app_id}")
-                            
-                    except SkillApplication.DoesNotExist:
-                        failed_applications.append(f"ID:{app_id}(見つからない)")
-            
-            if failed_applications:
-                return JsonResponse({
-                    'status': 'error',
-                    'message': f'一部の処理に失敗しました: {", ".join(failed_applications)}'
-                })
-            
-            return JsonResponse({
-                'status': 'success',
-                'message': f'{approved_count}件の申告を承認しました。'
-            })
+            results = SkillApplicationBulkService(request.user).approve(application_ids)
+            return _bulk_response(results, RESULT_APPROVED, '承認')
             
         except Exception as e:
             return JsonResponse({
                 'status': 'error',
                 'message': f'処理中にエラーが発生しました: {str(e)}'
             })
-    
-    def _approve_application(self, application, admin_user, comment=''):
-        """申告を承認する共通処理"""
-        try:
-            # 既にスキルを習得していないかチェック
-            if UserSkill.objects.filter(user=application.user, skill=application.skill).exists():
-                return False
-            
-            # 申告のステータスを更新
-            application.status = 'approved'
-            application.processed_by = admin_user
-            application.processed_date = timezone.now()
-            application.save()
-            
-            # UserSkillレコードを作成
-            UserSkill.objects.create(
-                user=application.user,
-                skill=application.skill,
-                acquired_date=timezone.now().date(),
-                approved_by=admin_user
-            )
-            
-            # ログを記録
-            AdminActionLog.objects.create(
-                admin_user=admin_user,
-                action='application_approve',
-                target_user=application.user,
-                description=f'スキル「{application.skill.name}」の申告を承認'
-            )
-            
-            return True
-            
-        except Exception:
-            return False
 
 
 class AdminBulkRejectAPI(AdminRequiredMixin, View):
@@ -1004,63 +987,42 @@ class AdminBulkRejectAPI(AdminRequiredMixin, View):
                     'message': '申告IDが指定されていません。'
                 })
             
-            rejected_count = 0
-            failed_applications = []
-            
-            with transaction.atomic():
-                for app_id in application_ids:
-                    try:
-                        application = SkillApplication.objects.select_for_update().get(
-                            id=app_id, status='pending'
-                        )
-                        
-                        # 却下処理を実行
-                        if self._reject_application(application, request.user):
-                            rejected_count += 1
-                        else:
-                            failed_applications.append(f"ID:{app_id}")
-                            
-                    except SkillApplication.DoesNotExist:
-                        failed_applications.append(f"ID:{app_id}(見つからない)")
-            
-            if failed_applications:
-                return JsonResponse({
-                    'status': 'error',
-                    'message': f'一部の処理に失敗しました: {", ".join(failed_applications)}'
-                })
-            
-            return JsonResponse({
-                'status': 'success',
-                'message': f'{rejected_count}件の申告を却下しました。'
-            })
+            results = SkillApplicationBulkService(request.user).reject(application_ids)
+            return _bulk_response(results, RESULT_REJECTED, '却下')
             
         except Exception as e:
             return JsonResponse({
                 'status': 'error',
                 'message': f'処理中にエラーが発生しました: {str(e)}'
             })
+
+
+def _bulk_response(results, success_result, verb):
+    """一括承認・却下の申告IDごとの結果をレスポンスにまとめる"""
+    failure_labels = {
+        RESULT_NOT_FOUND: '見つからない',
+        RESULT_ALREADY_ACQUIRED: '習得済み',
+    }
+    processed_count = sum(1 for result in results if result['result'] == success_result)
+    failed_applications = [
+        f"ID:{result['id']}({failure_labels[result['result']]})"
+        for result in results if result['result'] != success_result
+    ]
     
-    def _reject_application(self, application, admin_user, comment=''):
-        """申告を却下する共通処理"""
-        try:
-            # 申告のステータスを更新
-            application.status = 'rejected'
-            application.processed_by = admin_user
-            application.processed_date = timezone.now()
-            application.save()
-            
-            # ログを記録
-            AdminActionLog.objects.create(
-                admin_user=admin_user,
-                action='application_reject',
-                target_user=application.user,
-                description=f'スキル「{application.skill.name}」の申告を却下'
-            )
-            
-            return True
-            
-        except Exception:
-            return False
+    if failed_applications:
+        return JsonResponse({
+            'status': 'error',
+            'message': f'一部の処理に失敗しました: {", ".join(failed_applications)}',
+            'processed_count': processed_count,
+            'results': results
+        })
+    
+    return JsonResponse({
+        'status': 'success',
+        'message': f'{processed_count}件の申告を{verb}しました。',
+        'processed_count': processed_count,
+        'results': results
+    })
 
 
 class AdminApproveApplicationAPI(AdminRequiredMixin, View):
@@ -1159,4 +1121,50 @@ class AdminRejectApplicationAPI(AdminRequiredMixin, View):
             return JsonResponse({
                 'status': 'error',
                 'message': f'却下処理中にエラーが発生しました: {str(e)}'
-            })
\ No newline at end of file
+            })
+
+
+# ======= レポート =======
+class AdminLaborCostReportView(AdminRequiredMixin, TemplateView):
+    """グレード別の月次人件費レポート（?format=csv でCSV出力）"""
+    template_name = 'salary/admin/reports/labor_cost.html'
+    
+    def get(self, request, *args, **kwargs):
+        self.year, self.month = self._get_year_month()
+        self.report = get_labor_cost_report(self.year, self.month)
+        
+        if request.GET.get('format') == 'csv':
+            response = HttpResponse(content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = (
+                f'attachment; filename="labor_cost_{self.year}{self.month:02d}.csv"'
+            )
+            # Excelで文字化けしないようBOMを付ける
+            response.write('\ufeff')
+            write_labor_cost_csv(self.report, response)
+            return response
+        
+        return super().get(request, *args, **kwargs)
+    
+    def _get_year_month(self):
+        """年月パラメーターを取得（不正な場合は当月）"""
+        now = timezone.localtime()
+        try:
+            year = int(self.request.GET.get('year', now.year))
+            month = int(self.request.GET.get('month', now.month))
+            if not (1 <= month <= 12 and 2000 <= year <= 2100):
+                raise ValueError
+        except (TypeError, ValueError):
+            year, month = now.year, now.month
+        return year, month
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['report'] = self.report
+        context['year'] = self.year
+        context['month'] = self.month
+        
+        prev_year, prev_month = (self.year - 1, 12) if self.month == 1 else (self.year, self.month - 1)
+        next_year, next_month = (self.year + 1, 1) if self.month == 12 else (self.year, self.month + 1)
+        context['prev_month'] = {'year': prev_year, 'month': prev_month}
+        context['next_month'] = {'year': next_year, 'month': next_month}
+        return context
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SalaryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'salary'
+    
+    def ready(self):
+        # 給与グレード履歴の変更をユーザーの現在のグレードに反映
+        import salary.signals
@@ -1,4 +1,6 @@
-from .models import SkillApplication
+from django.utils.functional import SimpleLazyObject
+
+from .services.pending_counter import get_pending_application_count
 
 
 def admin_menu_context(request):
@@ -9,9 +11,9 @@ def admin_menu_context(request):
     if not (request.user.is_staff or request.user.is_superuser):
         return {}
     
-    # 承認待ち申告数を取得
-    pending_count = SkillApplication.objects.filter(status='pending').count()
+    # 承認待ち申告数（カウンターから取得。テンプレートで参照された場合のみ読み込む）
+    pending_count = SimpleLazyObject(get_pending_application_count)
     
     return {
         'pending_applications_count': pending_count,
-    }
\ No newline at end of file
+    }
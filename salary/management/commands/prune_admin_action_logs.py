@@ -0,0 +1,64 @@
+"""
+管理者操作ログ整理コマンド
+"""
+
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from salary.services.activity_feed import PRUNE_BATCH_SIZE, prune_activities
+
+
+class Command(BaseCommand):
+    """保存期間を過ぎた管理者操作ログを削除（必要に応じてアーカイブ）するコマンド"""
+
+    help = '指定した月数より古い管理者操作ログを削除します'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=12,
+            help='保存期間（月数）。これより古いログを削除（既定: 12）',
+        )
+        parser.add_argument(
+            '--archive',
+            help='削除前にログを1行1件のJSONで追記するファイルのパス',
+            default=None
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=PRUNE_BATCH_SIZE,
+            help=f'1回に削除する件数（既定: {PRUNE_BATCH_SIZE}）',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='実際の処理は行わず、対象となる件数を表示するのみ',
+        )
+
+    def handle(self, *args, **options):
+        if options['months'] < 1:
+            raise CommandError('--months には1以上を指定してください。')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size には1以上を指定してください。')
+
+        before = timezone.now() - relativedelta(months=options['months'])
+
+        if options['dry_run']:
+            count = prune_activities(before, dry_run=True)
+            self.stdout.write(
+                self.style.WARNING(f'[DRY RUN] {before:%Y-%m-%d %H:%M} より前のログ {count}件が削除対象です。')
+            )
+            return
+
+        if options['archive']:
+            with open(options['archive'], 'a', encoding='utf-8') as archive:
+                deleted = prune_activities(before, archive=archive, batch_size=options['batch_size'])
+        else:
+            deleted = prune_activities(before, batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'成功: {before:%Y-%m-%d %H:%M} より前のログ {deleted}件を削除しました。')
+        )
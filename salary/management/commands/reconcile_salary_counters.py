@@ -0,0 +1,22 @@
+"""
+集計カウンター補正コマンド
+"""
+
+from django.core.management.base import BaseCommand
+
+from salary.services.pending_counter import reconcile_pending_application_count
+
+
+class Command(BaseCommand):
+    """シグナルで増減している集計カウンターを実際の件数で補正するコマンド（定期実行用）"""
+
+    help = '承認待ち申告数などの集計カウンターを実際の件数で補正します'
+
+    def handle(self, *args, **options):
+        previous, value = reconcile_pending_application_count()
+        if previous is not None and previous != value:
+            self.stdout.write(
+                self.style.WARNING(f'承認待ち申告数を補正しました: {previous} → {value}')
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(f'承認待ち申告数: {value}'))
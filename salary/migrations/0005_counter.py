@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salary', '0004_salarygrade_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='カウンター名')),
+                ('value', models.IntegerField(default=0, verbose_name='値')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': '集計カウンター',
+                'verbose_name_plural': '集計カウンター',
+            },
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def compute_promotion_paths(grade_ids, next_grade_ids, required_skill_ids):
+    """
+    全グレードの組について最短の昇進経路を求める（作成時点の salary.services.promotion_paths の写し）
+
+    最短段数の経路が複数ある場合は、必要スキルの和集合が最も小さい経路を選ぶ
+    """
+    required = {grade_id: frozenset(ids) for grade_id, ids in required_skill_ids.items()}
+    paths = {}
+    for source_id in grade_ids:
+        reached = {source_id}
+        frontier = {source_id: ((source_id,), frozenset())}
+        while frontier:
+            next_frontier = {}
+            for route, skills in frontier.values():
+                for next_id in next_grade_ids.get(route[-1], ()):
+                    if next_id in reached:
+                        continue
+                    candidate = (route + (next_id,), skills | required.get(next_id, frozenset()))
+                    current = next_frontier.get(next_id)
+                    if current is None or len(candidate[1]) < len(current[1]):
+                        next_frontier[next_id] = candidate
+            reached.update(next_frontier)
+            for target_id, path in next_frontier.items():
+                paths[(source_id, target_id)] = path
+            frontier = next_frontier
+    return paths
+
+
+def build_promotion_paths(apps, schema_editor):
+    """既存のグレード・昇進経路・必要スキルから昇進経路テーブルを作成"""
+    SalaryGrade = apps.get_model('salary', 'SalaryGrade')
+    GradePromotionPath = apps.get_model('salary', 'GradePromotionPath')
+
+    grade_ids = list(SalaryGrade.objects.order_by('level', 'name', 'pk').values_list('pk', flat=True))
+    order = {grade_id: index for index, grade_id in enumerate(grade_ids)}
+    next_ids = {}
+    for from_id, to_id in SalaryGrade.next_possible_grades.through.objects.values_list(
+        'from_salarygrade_id', 'to_salarygrade_id'
+    ):
+        next_ids.setdefault(from_id, []).append(to_id)
+    for ids in next_ids.values():
+        ids.sort(key=order.get)
+    required = {}
+    for grade_id, skill_id in SalaryGrade.required_skills.through.objects.values_list('salarygrade_id', 'skill_id'):
+        required.setdefault(grade_id, set()).add(skill_id)
+
+    GradePromotionPath.objects.bulk_create([
+        GradePromotionPath(
+            from_grade_id=from_id,
+            to_grade_id=to_id,
+            min_steps=len(route) - 1,
+            route=list(route),
+            required_skill_ids=sorted(skills),
+        )
+        for (from_id, to_id), (route, skills) in compute_promotion_paths(grade_ids, next_ids, required).items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salary', '0005_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradePromotionPath',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_steps', models.PositiveIntegerField(verbose_name='最短段数')),
+                ('route', models.JSONField(default=list, verbose_name='経路（グレードIDのリスト）')),
+                ('required_skill_ids', models.JSONField(default=list, verbose_name='必要スキル（スキルIDのリスト）')),
+                ('from_grade', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='promotion_paths', to='salary.salarygrade', verbose_name='昇進元グレード')),
+                ('to_grade', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='promotion_paths_to', to='salary.salarygrade', verbose_name='昇進先グレード')),
+            ],
+            options={
+                'verbose_name': 'グレード昇進経路',
+                'verbose_name_plural': 'グレード昇進経路',
+                'unique_together': {('from_grade', 'to_grade')},
+            },
+        ),
+        migrations.RunPython(build_promotion_paths, migrations.RunPython.noop),
+    ]
@@ -63,6 +63,33 @@ class SalaryGrade(models.Model):
             })
 
 
+class GradePromotionPath(models.Model):
+    """
+    グレード間の昇進経路（推移閉包）
+
+    next_possible_grades をたどって到達できるグレードの組ごとに、最短の段数と経路、
+    経路上のグレード（昇進元を除く）の必要スキルの和集合を保持する。
+    グレード・昇進経路・必要スキルの変更時にシグナルで再構築される
+    """
+    from_grade = models.ForeignKey(
+        SalaryGrade, on_delete=models.CASCADE, related_name='promotion_paths', verbose_name='昇進元グレード'
+    )
+    to_grade = models.ForeignKey(
+        SalaryGrade, on_delete=models.CASCADE, related_name='promotion_paths_to', verbose_name='昇進先グレード'
+    )
+    min_steps = models.PositiveIntegerField(verbose_name='最短段数')
+    route = models.JSONField(default=list, verbose_name='経路（グレードIDのリスト）')
+    required_skill_ids = models.JSONField(default=list, verbose_name='必要スキル（スキルIDのリスト）')
+
+    class Meta:
+        verbose_name = 'グレード昇進経路'
+        verbose_name_plural = 'グレード昇進経路'
+        unique_together = ['from_grade', 'to_grade']
+
+    def __str__(self):
+        return f"{self.from_grade_id} → {self.to_grade_id} ({self.min_steps}段)"
+
+
 class UserSkill(models.Model):
     """ユーザー習得スキル"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='ユーザー')
@@ -192,3 +219,22 @@ class AdminActionLog(models.Model):
 
     def __str__(self):
         return f"{self.admin_user.name} - {self.get_action_display()} ({self.timestamp.strftime('%Y-%m-%d %H:%M')})"
+
+
+class Counter(models.Model):
+    """
+    集計カウンター
+
+    件数をCOUNTクエリで都度集計せず、シグナルで増減して保持する
+    （承認待ち申告数など）。ずれは reconcile_salary_counters コマンドで補正する
+    """
+    name = models.CharField(max_length=50, primary_key=True, verbose_name='カウンター名')
+    value = models.IntegerField(default=0, verbose_name='値')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = '集計カウンター'
+        verbose_name_plural = '集計カウンター'
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
@@ -0,0 +1,110 @@
+"""
+管理者操作ログの活動フィード
+
+ダッシュボードの活動ログは前回取得した最新のログIDをカーソルとして、
+それより新しいログのみを差分で取得する（ログIDは作成順に増加する）。
+"""
+
+import json
+from typing import Dict, List, Optional
+
+from django.urls import reverse
+
+from ..models import AdminActionLog
+
+# 差分取得で返す最大件数。これを超えた場合は has_more で全件の再取得を促す
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+# 古いログの削除を1回のDELETEで行う件数
+PRUNE_BATCH_SIZE = 1000
+
+
+def get_latest_activity_id() -> Optional[int]:
+    """最新のログIDを取得（ログがない場合はNone）"""
+    return AdminActionLog.objects.order_by('-id').values_list('id', flat=True).first()
+
+
+def get_activities(since_id: Optional[int] = None, limit: int = DEFAULT_LIMIT) -> Dict:
+    """
+    活動ログを新しい順に取得する
+
+    Args:
+        since_id: 取得済みの最新ログID（指定時はこれより新しいログのみ）
+        limit: 最大件数
+
+    Returns:
+        {
+            'activities': 新しい順のログ,
+            'cursor': 次回の since_id（新しいログがない場合は since_id のまま）,
+            'has_more': limit件を超える新しいログがあるか
+        }
+    """
+    logs = AdminActionLog.objects.select_related('admin_user', 'target_user').order_by('-id')
+    if since_id is not None:
+        logs = logs.filter(id__gt=since_id)
+
+    # 1件多く取得して続きの有無を判定する
+    rows = list(logs[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        'activities': rows,
+        'cursor': rows[0].id if rows else since_id,
+        'has_more': has_more,
+    }
+
+
+def serialize_activity(log: AdminActionLog) -> Dict:
+    """活動ログをJSONレスポンス用の辞書に変換"""
+    target_user = None
+    if log.target_user_id:
+        target_user = {
+            'id': log.target_user_id,
+            'name': log.target_user.name,
+            'url': reverse('salary:admin_user_detail', args=[log.target_user_id]),
+        }
+    return {
+        'id': log.id,
+        'action': log.action,
+        'action_display': log.get_action_display(),
+        'description': log.description,
+        'admin_user': log.admin_user.name,
+        'target_user': target_user,
+        'timestamp': log.timestamp.isoformat(),
+    }
+
+
+def prune_activities(before, archive=None, batch_size: int = PRUNE_BATCH_SIZE, dry_run: bool = False) -> int:
+    """
+    指定日時より前のログを削除する
+
+    (-timestamp) インデックスで対象を絞り込み、batch_size 件ずつ削除して
+    1回のトランザクションが長くならないようにする
+
+    Args:
+        before: この日時より前のログを削除
+        archive: 指定時は削除前にログを1行1件のJSONで書き出すファイルオブジェクト
+        batch_size: 1回に削除する件数
+        dry_run: Trueの場合は削除せず対象件数のみを返す
+
+    Returns:
+        int: 削除した（dry_run時は対象の）件数
+    """
+    targets = AdminActionLog.objects.filter(timestamp__lt=before)
+    if dry_run:
+        return targets.count()
+
+    deleted = 0
+    while True:
+        batch: List[AdminActionLog] = list(
+            targets.select_related('admin_user', 'target_user').order_by('-timestamp')[:batch_size]
+        )
+        if not batch:
+            return deleted
+        if archive is not None:
+            for log in batch:
+                archive.write(json.dumps(serialize_activity(log), ensure_ascii=False) + '\n')
+        AdminActionLog.objects.filter(id__in=[log.id for log in batch]).delete()
+        deleted += len(batch)
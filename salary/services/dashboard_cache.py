@@ -0,0 +1,34 @@
+"""
+ダッシュボードの給与・スキル欄のキャッシュバージョン
+
+給与・スキル欄は管理者の操作（スキル付与・申告の承認・グレード変更など）でしか変わらないため、
+描画結果をユーザーごとにキャッシュする。キャッシュキーには次のバージョンを含める。
+- ユーザーごとのバージョン（User.salary_dashboard_version）:
+  UserSkill・SkillApplication・UserSalaryGrade の変更時に同じトランザクション内で更新
+- グレードカタログのバージョン: グレード・スキル・昇進経路の変更時に更新
+"""
+
+from typing import Iterable
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+
+from .grade_catalog import get_grade_catalog
+
+# 給与・スキル欄のキャッシュ保持期間（秒）。変更時はバージョンで無効化される
+SECTION_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_dashboard_cache_version(user) -> str:
+    """給与・スキル欄のキャッシュキーに含めるバージョンを取得（読み込み済みのユーザーから算出）"""
+    return f'{user.salary_dashboard_version}:{get_grade_catalog().version}'
+
+
+def bump_dashboard_cache_version(user_ids: Iterable[int]) -> None:
+    """指定ユーザーの給与・スキル欄のキャッシュを無効化する（1回のUPDATE）"""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    get_user_model().objects.filter(pk__in=user_ids).update(
+        salary_dashboard_version=F('salary_dashboard_version') + 1
+    )
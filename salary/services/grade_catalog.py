@@ -0,0 +1,141 @@
+"""
+給与グレードカタログ（昇進経路・必要スキルのプロセス内キャッシュ）
+
+グレード・スキル・昇進経路は変更が少ない小さなマスタのため、
+プロセスごとに一度だけ読み込んで変更不可のスナップショットとして共有する。
+グレード・スキルの編集時は共有キャッシュのバージョンを更新し、
+各プロセスは一定間隔でバージョンを確認して読み直す（同一プロセス内の編集は即時反映）。
+"""
+
+from dataclasses import dataclass
+import threading
+import time
+from types import MappingProxyType
+from typing import FrozenSet, List, Mapping, Optional, Tuple
+
+from core.cache_versions import bump_cache_version, get_cache_version
+
+from ..models import SalaryGrade, Skill
+
+VERSION_KEY = 'salary:grade_catalog:version'
+
+# 共有キャッシュのバージョンを確認する間隔（秒）。他プロセスでの編集はこの間隔以内に反映される
+VERSION_CHECK_INTERVAL = 5.0
+
+_lock = threading.Lock()
+_catalog = None
+_checked_at = 0.0
+
+
+@dataclass(frozen=True)
+class GradeCatalog:
+    """
+    給与グレードと昇進経路の変更不可スナップショット
+
+    グレード・スキルのモデルインスタンスは共有されるため、読み取り専用として扱うこと
+    """
+
+    version: int
+    grades: Mapping[int, SalaryGrade]
+    skills: Mapping[int, Skill]
+    next_grade_ids: Mapping[int, Tuple[int, ...]]
+    previous_grade_ids: Mapping[int, Tuple[int, ...]]
+    required_skill_ids: Mapping[int, FrozenSet[int]]
+    levels: Mapping[int, int]
+
+    def grade(self, grade_id: int) -> Optional[SalaryGrade]:
+        return self.grades.get(grade_id)
+
+    def next_grades(self, grade_id: int) -> List[SalaryGrade]:
+        """昇進先のグレード（レベル順）"""
+        return [self.grades[next_id] for next_id in self.next_grade_ids.get(grade_id, ())]
+
+    def previous_grades(self, grade_id: int) -> List[SalaryGrade]:
+        """このグレードを昇進先に持つグレード（レベル順）"""
+        return [self.grades[previous_id] for previous_id in self.previous_grade_ids.get(grade_id, ())]
+
+    def required_skills(self, grade_id: int) -> List[Skill]:
+        """必要スキル（Skillの既定の並び順: カテゴリ・名前順）"""
+        skills = [self.skills[skill_id] for skill_id in self.required_skill_ids.get(grade_id, ())]
+        return sorted(skills, key=lambda skill: (skill.category, skill.name, skill.pk))
+
+
+def _load_catalog(version: int) -> GradeCatalog:
+    """グレード・スキル・昇進経路・必要スキルを読み込む（4クエリ）"""
+    grades = {grade.pk: grade for grade in SalaryGrade.objects.order_by('level', 'name')}
+    skills = {skill.pk: skill for skill in Skill.objects.all()}
+
+    def sort_key(grade_id):
+        grade = grades[grade_id]
+        return grade.level, grade.name, grade.pk
+
+    next_ids = {}
+    previous_ids = {}
+    for from_id, to_id in SalaryGrade.next_possible_grades.through.objects.values_list(
+        'from_salarygrade_id', 'to_salarygrade_id'
+    ):
+        next_ids.setdefault(from_id, []).append(to_id)
+        previous_ids.setdefault(to_id, []).append(from_id)
+
+    required = {}
+    for grade_id, skill_id in SalaryGrade.required_skills.through.objects.values_list(
+        'salarygrade_id', 'skill_id'
+    ):
+        required.setdefault(grade_id, set()).add(skill_id)
+
+    return GradeCatalog(
+        version=version,
+        grades=MappingProxyType(grades),
+        skills=MappingProxyType(skills),
+        next_grade_ids=MappingProxyType({
+            grade_id: tuple(sorted(ids, key=sort_key)) for grade_id, ids in next_ids.items()
+        }),
+        previous_grade_ids=MappingProxyType({
+            grade_id: tuple(sorted(ids, key=sort_key)) for grade_id, ids in previous_ids.items()
+        }),
+        required_skill_ids=MappingProxyType({
+            grade_id: frozenset(ids) for grade_id, ids in required.items()
+        }),
+        levels=MappingProxyType({grade_id: grade.level for grade_id, grade in grades.items()}),
+    )
+
+
+def get_grade_catalog() -> GradeCatalog:
+    """
+    給与グレードカタログを取得
+
+    プロセス内のスナップショットを返し、バージョンが更新されていた場合のみ読み直す
+    """
+    global _catalog, _checked_at
+    now = time.monotonic()
+    catalog = _catalog
+    if catalog is not None and now - _checked_at < VERSION_CHECK_INTERVAL:
+        return catalog
+
+    with _lock:
+        version = get_cache_version(VERSION_KEY)
+        if _catalog is None or _catalog.version != version:
+            _catalog = _load_catalog(version)
+        _checked_at = now
+        return _catalog
+
+
+def clear_local_grade_catalog() -> None:
+    """このプロセスのスナップショットを破棄し、次回の取得時に読み直させる"""
+    global _catalog
+    with _lock:
+        _catalog = None
+
+
+def bump_grade_catalog_version() -> int:
+    """
+    グレードカタログのバージョンを更新する
+
+    グレード・スキル・昇進経路・必要スキルが変わったときに呼び出す
+
+    Returns:
+        int: 更新後のバージョン
+    """
+    version = bump_cache_version(VERSION_KEY)
+    clear_local_grade_catalog()
+    return version
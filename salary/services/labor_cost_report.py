@@ -0,0 +1,265 @@
+"""
+グレード別・月別の人件費レポート
+
+日別の労働時間（全ユーザー分をデータベースで1回のクエリで集計）と、各日に有効だった給与グレード
+（UserSalaryGrade の適用日が最も新しい履歴）の時給を突き合わせ、グレードごとに集計する。
+当月は経過日数のペースから月末までの見込みも算出する。
+
+集計結果は年月ごとのバージョン付きキーでキャッシュする。
+- 月のバージョン: その月の打刻の変更時に更新
+- 給与のバージョン: 給与グレード履歴の変更時に更新
+- グレードカタログのバージョン: グレード（時給）の変更時に更新
+"""
+
+from bisect import bisect_right
+import calendar
+import csv
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import DateTimeField, DurationField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from zoneinfo import ZoneInfo
+
+from core.cache_versions import bump_cache_version_on_commit, get_cache_version
+from timeclock.models import TimeRecord
+
+from ..models import UserSalaryGrade
+from .grade_catalog import get_grade_catalog
+
+MONTH_VERSION_KEY = 'salary:labor_cost:version:{year}:{month}'
+WAGE_VERSION_KEY = 'salary:labor_cost:wage_version'
+REPORT_KEY = 'salary:labor_cost:report:{year}:{month}:{version}'
+
+# 集計結果の保持期間（秒）。変更時はバージョンで無効化される
+REPORT_TIMEOUT = 60 * 60 * 24
+
+CSV_HEADER = ['グレード', 'レベル', '時給', '勤務者数', '勤務日数（延べ）', '労働時間（時間）', '人件費', '月末見込み']
+
+
+@dataclass
+class GradeLaborCost:
+    """グレードごとの人件費（グレード未設定の日は grade_id=None にまとめる）"""
+    grade_id: Optional[int]
+    grade_name: str
+    level: Optional[int]
+    hourly_wage: Optional[int]
+    user_ids: set = field(default_factory=set)
+    work_days: int = 0
+    work_minutes: int = 0
+    cost: int = 0
+    projected_cost: int = 0
+
+    @property
+    def work_hours(self) -> float:
+        return round(self.work_minutes / 60, 2)
+
+    def as_dict(self) -> Dict:
+        data = asdict(self)
+        data['worker_count'] = len(data.pop('user_ids'))
+        data['work_hours'] = self.work_hours
+        return data
+
+
+def bump_labor_cost_month_version(year: int, month: int) -> None:
+    """指定年月の人件費レポートを無効化する（打刻の変更時）"""
+    bump_cache_version_on_commit(MONTH_VERSION_KEY.format(year=year, month=month))
+
+
+def bump_labor_cost_wage_version() -> None:
+    """全期間の人件費レポートを無効化する（給与グレード履歴の変更時）"""
+    bump_cache_version_on_commit(WAGE_VERSION_KEY)
+
+
+def get_labor_cost_version(year: int, month: int) -> str:
+    return (
+        f'{get_cache_version(MONTH_VERSION_KEY.format(year=year, month=month))}:'
+        f'{get_cache_version(WAGE_VERSION_KEY)}:{get_grade_catalog().version}'
+    )
+
+
+def _month_range(year: int, month: int):
+    days_in_month = calendar.monthrange(year, month)[1]
+    return date(year, month, 1), date(year, month, days_in_month), days_in_month
+
+
+def _daily_cost(minutes: int, hourly_wage) -> int:
+    """日別の給与（WorkTimeService.get_daily_summary と同じく時間を小数点2桁に丸めて計算）"""
+    return int(Decimal(str(round(minutes / 60, 2))) * hourly_wage)
+
+
+def _daily_work_minutes(start_date: date, end_date: date) -> List[Tuple[int, date, int]]:
+    """
+    ユーザーごと・日別（JST）の労働時間（分）をデータベースで集計する
+
+    打刻の順序（出勤 → 休憩開始・終了の組 → 退勤）は TimeRecord.clean で検証済みのため、
+    労働時間は「退勤 - 出勤 - (休憩終了の合計 - 休憩開始の合計)」で求められる。
+    WorkTimeService.get_daily_summary と同じく、退勤打刻のない日と労働時間が0の日は含めない
+
+    Returns:
+        [(ユーザーID, 日付, 分)] のリスト
+    """
+    jst = ZoneInfo(settings.TIME_ZONE)
+    range_start = datetime.combine(start_date, datetime.min.time()).replace(tzinfo=jst)
+    range_end = datetime.combine(end_date + timedelta(days=1), datetime.min.time()).replace(tzinfo=jst)
+
+    def offsets(clock_type):
+        # 集計期間の開始時刻からの経過時間の合計
+        return Sum('offset', filter=Q(clock_type=clock_type))
+
+    days = TimeRecord.objects.filter(
+        timestamp__gte=range_start, timestamp__lt=range_end
+    ).annotate(
+        offset=ExpressionWrapper(
+            F('timestamp') - Value(range_start, output_field=DateTimeField()), output_field=DurationField()
+        ),
+    ).values('user_id', work_date=TruncDate('timestamp', tzinfo=jst)).annotate(
+        clock_in=offsets('clock_in'),
+        clock_out=offsets('clock_out'),
+        break_start=offsets('break_start'),
+        break_end=offsets('break_end'),
+    ).filter(clock_in__isnull=False, clock_out__isnull=False).order_by()
+
+    daily_minutes = []
+    for day in days:
+        work_time = day['clock_out'] - day['clock_in']
+        if day['break_start'] is not None and day['break_end'] is not None:
+            work_time -= day['break_end'] - day['break_start']
+        # get_daily_summary の work_hours（小数点2桁）が0の日は労働なしとみなす
+        if round(work_time.total_seconds() / 3600, 2) > 0:
+            daily_minutes.append((day['user_id'], day['work_date'], int(work_time.total_seconds() / 60)))
+    return daily_minutes
+
+
+def _grade_timelines(user_ids: Iterable[int], end_date: date) -> Dict[int, tuple]:
+    """
+    ユーザーごとのグレード履歴（適用日順）を1回のクエリで取得
+
+    Returns:
+        {ユーザーID: (適用日のリスト, グレードIDのリスト)}
+    """
+    timelines = {}
+    history = UserSalaryGrade.objects.filter(
+        user_id__in=list(user_ids), effective_date__lte=end_date
+    ).order_by('user_id', 'effective_date', 'id').values_list('user_id', 'effective_date', 'salary_grade_id')
+    for user_id, effective_date, grade_id in history:
+        dates, grade_ids = timelines.setdefault(user_id, ([], []))
+        if dates and dates[-1] == effective_date:
+            # 同日の履歴は後に登録したものを有効とする
+            grade_ids[-1] = grade_id
+        else:
+            dates.append(effective_date)
+            grade_ids.append(grade_id)
+    return timelines
+
+
+def build_labor_cost_report(year: int, month: int, today: Optional[date] = None) -> Dict:
+    """
+    指定年月の人件費レポートを集計する（キャッシュしない）
+
+    クエリは打刻の日別集計（全ユーザー分）とグレード履歴の2回のみで、
+    日別の労働時間とその日に有効なグレードの突き合わせは集計済みの行の1回の走査で行う
+
+    Args:
+        year: 年
+        month: 月
+        today: 基準日（Noneの場合はJSTの本日）。当月の見込み算出に使用
+
+    Returns:
+        {
+            'year', 'month',
+            'rows': グレードごとの集計（レベル順、グレード未設定は末尾）,
+            'total': 全体の集計,
+            'elapsed_days': 集計済みの日数, 'days_in_month': 月の日数,
+            'is_projection': 月末見込みを推計しているか
+        }
+    """
+    if today is None:
+        today = timezone.now().astimezone(ZoneInfo(settings.TIME_ZONE)).date()
+    start_date, end_date, days_in_month = _month_range(year, month)
+    elapsed_days = max(0, min((today - start_date).days + 1, days_in_month))
+
+    catalog = get_grade_catalog()
+    daily_minutes = _daily_work_minutes(start_date, min(end_date, today))
+    timelines = _grade_timelines({user_id for user_id, _, _ in daily_minutes}, end_date)
+
+    rows: Dict[Optional[int], GradeLaborCost] = {}
+    for user_id, work_date, minutes in daily_minutes:
+        dates, grade_ids = timelines.get(user_id, ((), ()))
+        index = bisect_right(dates, work_date) - 1
+        grade = catalog.grade(grade_ids[index]) if index >= 0 else None
+
+        row = rows.get(grade.pk if grade else None)
+        if row is None:
+            row = rows[grade.pk if grade else None] = GradeLaborCost(
+                grade_id=grade.pk if grade else None,
+                grade_name=grade.name if grade else 'グレード未設定',
+                level=grade.level if grade else None,
+                hourly_wage=int(grade.hourly_wage) if grade else None,
+            )
+        row.user_ids.add(user_id)
+        row.work_days += 1
+        row.work_minutes += minutes
+        if grade:
+            row.cost += _daily_cost(minutes, grade.hourly_wage)
+
+    # 当月は経過日数のペースで月末まで延長する（過去の月は実績のまま）
+    is_projection = 0 < elapsed_days < days_in_month
+    total = GradeLaborCost(grade_id=None, grade_name='合計', level=None, hourly_wage=None)
+    for row in rows.values():
+        row.projected_cost = round(row.cost * days_in_month / elapsed_days) if is_projection else row.cost
+        total.user_ids |= row.user_ids
+        total.work_days += row.work_days
+        total.work_minutes += row.work_minutes
+        total.cost += row.cost
+        total.projected_cost += row.projected_cost
+
+    ordered = sorted(
+        rows.values(),
+        key=lambda row: (row.grade_id is None, row.level or 0, row.grade_name)
+    )
+    return {
+        'year': year,
+        'month': month,
+        'rows': [row.as_dict() for row in ordered],
+        'total': total.as_dict(),
+        'elapsed_days': elapsed_days,
+        'days_in_month': days_in_month,
+        'is_projection': is_projection,
+    }
+
+
+def get_labor_cost_report(year: int, month: int) -> Dict:
+    """指定年月の人件費レポートを取得（バージョン付きキーでキャッシュ）"""
+    today = timezone.now().astimezone(ZoneInfo(settings.TIME_ZONE)).date()
+    # 当月は日付が変わると集計範囲と見込みの経過日数が変わるため、基準日もキーに含める
+    is_current_month = (year, month) == (today.year, today.month)
+    version = f'{get_labor_cost_version(year, month)}:{today if is_current_month else ""}'
+    key = REPORT_KEY.format(year=year, month=month, version=version)
+    report = cache.get(key)
+    if report is None:
+        report = build_labor_cost_report(year, month, today)
+        cache.set(key, report, REPORT_TIMEOUT)
+    return report
+
+
+def write_labor_cost_csv(report: Dict, output) -> None:
+    """人件費レポートをCSVで書き出す"""
+    writer = csv.writer(output)
+    writer.writerow(CSV_HEADER)
+    for row in report['rows'] + [report['total']]:
+        writer.writerow([
+            row['grade_name'],
+            row['level'] if row['level'] is not None else '',
+            row['hourly_wage'] if row['hourly_wage'] is not None else '',
+            row['worker_count'],
+            row['work_days'],
+            row['work_hours'],
+            row['cost'],
+            row['projected_cost'],
+        ])
@@ -0,0 +1,54 @@
+"""
+承認待ち申告数カウンター
+
+管理者メニューの承認待ち件数を画面表示のたびにCOUNTで集計せず、
+申告の作成・ステータス変更・削除に合わせて Counter テーブルの値を増減する。
+増減は UPDATE ... SET value = value + n で行うため、同時に更新されても失われない。
+"""
+
+from typing import Tuple
+
+from django.db.models import F
+
+from ..models import Counter, SkillApplication
+
+PENDING_APPLICATIONS = 'pending_applications'
+
+
+def _count_pending() -> int:
+    return SkillApplication.objects.filter(status='pending').count()
+
+
+def get_pending_application_count() -> int:
+    """承認待ち申告数を取得（カウンター未作成時のみ集計して作成）"""
+    value = Counter.objects.filter(name=PENDING_APPLICATIONS).values_list('value', flat=True).first()
+    if value is None:
+        _, value = reconcile_pending_application_count()
+    return value
+
+
+def adjust_pending_application_count(delta: int) -> None:
+    """
+    承認待ち申告数を増減する
+
+    呼び出し元のトランザクション内で申告の変更と同時に反映される
+    """
+    if not delta:
+        return
+    updated = Counter.objects.filter(name=PENDING_APPLICATIONS).update(value=F('value') + delta)
+    if not updated:
+        # カウンター未作成の場合は現在の件数から作成する（今回の変更も集計に含まれる）
+        reconcile_pending_application_count()
+
+
+def reconcile_pending_application_count() -> Tuple[int, int]:
+    """
+    承認待ち申告数を実際の件数で補正する
+
+    Returns:
+        (補正前の値（未作成の場合はNone）, 補正後の値)
+    """
+    previous = Counter.objects.filter(name=PENDING_APPLICATIONS).values_list('value', flat=True).first()
+    value = _count_pending()
+    Counter.objects.update_or_create(name=PENDING_APPLICATIONS, defaults={'value': value})
+    return previous, value
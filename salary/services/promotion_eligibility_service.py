@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q
+
+from .grade_catalog import get_grade_catalog
+
+User = get_user_model()
+
+
+class PromotionEligibilityService:
+    """
+    昇進条件の達成者を集合演算で判定するサービス
+
+    ユーザーごとにスキルや現在のグレードを問い合わせず、
+    「必要スキルをすべて習得している」（UserSkillと必要スキルの関係除算）と
+    「現在のグレードから昇進可能である」をそれぞれ1つの条件としてまとめて評価する。
+    昇進経路と必要スキルはグレードカタログから取得する
+    """
+
+    def __init__(self, users=None):
+        self.users = users if users is not None else User.objects.all()
+
+    def eligible_users(self, target_grade):
+        """
+        指定グレードへの昇進条件を満たすユーザーのQuerySetを取得（1クエリ）
+
+        条件:
+            - 現在のグレード（User.current_salary_grade）の昇進先に target_grade が含まれる
+            - target_grade の必要スキルをすべて習得している
+
+        Args:
+            target_grade: 昇進先のSalaryGrade
+
+        Returns:
+            QuerySet: 条件を満たすユーザー（名前順）
+        """
+        catalog = get_grade_catalog()
+
+        # 昇進経路: target_grade を昇進先に持つグレード
+        source_grade_ids = catalog.previous_grade_ids.get(target_grade.pk, ())
+        users = self.users.filter(current_salary_grade_id__in=source_grade_ids)
+
+        # 関係除算: 必要スキルのうち習得済みの件数が必要スキル数と一致する
+        required_skill_ids = catalog.required_skill_ids.get(target_grade.pk, frozenset())
+        if required_skill_ids:
+            users = users.annotate(
+                required_skill_count=Count(
+                    'userskill',
+                    filter=Q(userskill__skill_id__in=required_skill_ids),
+                    distinct=True
+                )
+            ).filter(required_skill_count=len(required_skill_ids))
+
+        return users.order_by('name', 'pk')
@@ -0,0 +1,247 @@
+"""
+グレード間の昇進経路（推移閉包）
+
+next_possible_grades は1段階の昇進先しか持たないため、「グレードXに到達するには何が必要か」に
+答えるには経路をたどるたびに問い合わせが必要になる。そこで全グレードの組について
+最短段数・経路・経路上の必要スキルの和集合を GradePromotionPath に保持しておき、
+ユーザーの現在のグレードと目標グレードの1行を引くだけで答えられるようにする。
+
+- 再構築: グレード・昇進経路・必要スキルの変更時にシグナルから予約し、コミット後に1回だけ行う
+  （グレード数が少ないため全件作り直す。共有のグレードカタログは未コミットの内容を取り込まないよう使わない）
+- 循環: 昇進経路の循環を検出し、再構築時に警告ログを出力する
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from django.db import transaction
+
+from ..models import GradePromotionPath, SalaryGrade, UserSkill
+from .grade_catalog import get_grade_catalog
+
+logger = logging.getLogger(__name__)
+
+
+def compute_promotion_paths(
+    grade_ids: Sequence[int],
+    next_grade_ids: Mapping[int, Iterable[int]],
+    required_skill_ids: Mapping[int, Iterable[int]],
+) -> Dict[Tuple[int, int], Tuple[Tuple[int, ...], frozenset]]:
+    """
+    全グレードの組について最短の昇進経路を求める（グレードごとの幅優先探索）
+
+    最短段数の経路が複数ある場合は、必要スキルの和集合が最も小さい経路を選ぶ
+    （同数の場合は昇進先の並び順で先に見つかった経路）
+
+    Args:
+        grade_ids: グレードIDのリスト（探索順）
+        next_grade_ids: {グレードID: 昇進先のグレードID}
+        required_skill_ids: {グレードID: 必要スキルID}
+
+    Returns:
+        {(昇進元ID, 昇進先ID): (経路のグレードIDのタプル, 必要スキルIDの和集合)}
+    """
+    required = {grade_id: frozenset(ids) for grade_id, ids in required_skill_ids.items()}
+    paths = {}
+    for source_id in grade_ids:
+        reached = {source_id}
+        frontier = {source_id: ((source_id,), frozenset())}
+        while frontier:
+            next_frontier = {}
+            for route, skills in frontier.values():
+                for next_id in next_grade_ids.get(route[-1], ()):
+                    if next_id in reached:
+                        continue
+                    candidate = (route + (next_id,), skills | required.get(next_id, frozenset()))
+                    current = next_frontier.get(next_id)
+                    if current is None or len(candidate[1]) < len(current[1]):
+                        next_frontier[next_id] = candidate
+            reached.update(next_frontier)
+            for target_id, path in next_frontier.items():
+                paths[(source_id, target_id)] = path
+            frontier = next_frontier
+    return paths
+
+
+def find_grade_cycles(grade_ids: Sequence[int], next_grade_ids: Mapping[int, Iterable[int]]) -> List[List[int]]:
+    """
+    昇進経路の循環を検出する（深さ優先探索）
+
+    探索中のグレードに戻る昇進先（後退辺）ごとに1つの循環を返す。
+    循環がなければ空のリストになる
+
+    Returns:
+        循環ごとのグレードIDのリスト（例: [A, B, C] は A → B → C → A）
+    """
+    visiting, done = set(), set()
+    cycles = []
+
+    for root_id in grade_ids:
+        if root_id in done:
+            continue
+        stack = [(root_id, iter(next_grade_ids.get(root_id, ())))]
+        path = [root_id]
+        visiting.add(root_id)
+        while stack:
+            grade_id, children = stack[-1]
+            child_id = next(children, None)
+            if child_id is None:
+                stack.pop()
+                path.pop()
+                visiting.discard(grade_id)
+                done.add(grade_id)
+            elif child_id in visiting:
+                cycles.append(path[path.index(child_id):])
+            elif child_id not in done:
+                stack.append((child_id, iter(next_grade_ids.get(child_id, ()))))
+                path.append(child_id)
+                visiting.add(child_id)
+    return cycles
+
+
+def load_promotion_graph() -> Tuple[Dict[int, str], Dict[int, List[int]], Dict[int, Set[int]]]:
+    """
+    昇進経路の計算に使うグレード・昇進先・必要スキルをデータベースから直接読み込む（3クエリ）
+
+    Returns:
+        ({グレードID: グレード名}（レベル・名前順）, {グレードID: 昇進先のグレードID（同じ順）},
+         {グレードID: 必要スキルID})
+    """
+    names = dict(SalaryGrade.objects.order_by('level', 'name', 'pk').values_list('pk', 'name'))
+    order = {grade_id: index for index, grade_id in enumerate(names)}
+    next_ids = {}
+    for from_id, to_id in SalaryGrade.next_possible_grades.through.objects.values_list(
+        'from_salarygrade_id', 'to_salarygrade_id'
+    ):
+        next_ids.setdefault(from_id, []).append(to_id)
+    for ids in next_ids.values():
+        ids.sort(key=order.get)
+    required = {}
+    for grade_id, skill_id in SalaryGrade.required_skills.through.objects.values_list('salarygrade_id', 'skill_id'):
+        required.setdefault(grade_id, set()).add(skill_id)
+    return names, next_ids, required
+
+
+def find_promotion_cycles() -> List[List[str]]:
+    """
+    現在の昇進経路の循環をグレード名で取得
+
+    Returns:
+        循環ごとのグレード名のリスト（先頭のグレードに戻るまで。例: [A, B, C, A]）
+    """
+    names, next_ids, _ = load_promotion_graph()
+    return _named_cycles(names, next_ids)
+
+
+def _named_cycles(names: Mapping[int, str], next_grade_ids: Mapping[int, Iterable[int]]) -> List[List[str]]:
+    return [
+        [names[grade_id] for grade_id in cycle + cycle[:1]]
+        for cycle in find_grade_cycles(list(names), next_grade_ids)
+    ]
+
+
+def rebuild_promotion_paths() -> List[List[str]]:
+    """
+    昇進経路テーブルを作り直す
+
+    Returns:
+        検出した循環（find_promotion_cycles と同じ形式）
+    """
+    names, next_ids, required = load_promotion_graph()
+    paths = compute_promotion_paths(list(names), next_ids, required)
+
+    with transaction.atomic():
+        GradePromotionPath.objects.all().delete()
+        GradePromotionPath.objects.bulk_create([
+            GradePromotionPath(
+                from_grade_id=from_id,
+                to_grade_id=to_id,
+                min_steps=len(route) - 1,
+                route=list(route),
+                required_skill_ids=sorted(skills),
+            )
+            for (from_id, to_id), (route, skills) in paths.items()
+        ])
+
+    cycles = _named_cycles(names, next_ids)
+    for cycle in cycles:
+        logger.warning("Promotion path cycle detected: %s", ' → '.join(cycle))
+    return cycles
+
+
+# スレッド（＝DB接続）ごとの再構築の予約数と、再構築済みの予約数
+_rebuild_requests = threading.local()
+
+
+def _rebuild_if_requested() -> None:
+    """コミット後のコールバック。前回の再構築以降に予約がある場合のみ作り直す"""
+    requested = getattr(_rebuild_requests, 'requested', 0)
+    if getattr(_rebuild_requests, 'rebuilt', 0) == requested:
+        return
+    rebuild_promotion_paths()
+    _rebuild_requests.rebuilt = requested
+
+
+def schedule_promotion_paths_rebuild() -> None:
+    """
+    コミット後に昇進経路テーブルを作り直す（トランザクション外では即時に作り直す）
+
+    呼び出しごとにコミット後のコールバックを登録するが、再構築は全件の作り直しで冪等なため、
+    同じコミットで実行される2つ目以降のコールバックは何もしない
+    """
+    _rebuild_requests.requested = getattr(_rebuild_requests, 'requested', 0) + 1
+    transaction.on_commit(_rebuild_if_requested)
+
+
+def get_promotion_route(user, target_grade) -> Optional[Dict]:
+    """
+    ユーザーの現在のグレードから目標グレードまでの最短経路と未習得スキルを取得
+
+    昇進経路テーブルの1行とユーザーの習得スキルを引くだけで求める（2クエリ）
+
+    Args:
+        user: 対象ユーザー
+        target_grade: 目標のSalaryGrade
+
+    Returns:
+        {
+            'from_grade', 'to_grade': 現在のグレード・目標グレード,
+            'min_steps': 最短段数,
+            'route': 経路上のグレードのリスト,
+            'required_skills': 経路上で必要なスキル,
+            'missing_skills': そのうち未習得のスキル,
+        }
+        現在のグレードが未設定、または目標グレードに到達できない場合は None
+    """
+    catalog = get_grade_catalog()
+    from_grade_id = user.current_salary_grade_id
+    if from_grade_id is None:
+        return None
+
+    if from_grade_id == target_grade.pk:
+        route, required_skill_ids = [from_grade_id], []
+    else:
+        path = GradePromotionPath.objects.filter(
+            from_grade_id=from_grade_id, to_grade_id=target_grade.pk
+        ).values_list('route', 'required_skill_ids').first()
+        if path is None:
+            return None
+        route, required_skill_ids = path
+
+    acquired_skill_ids: Set[int] = set(
+        UserSkill.objects.filter(user=user, skill_id__in=required_skill_ids).values_list('skill_id', flat=True)
+    )
+
+    def skills(skill_ids):
+        found = [catalog.skills[skill_id] for skill_id in skill_ids if skill_id in catalog.skills]
+        return sorted(found, key=lambda skill: (skill.category, skill.name, skill.pk))
+
+    return {
+        'from_grade': catalog.grade(from_grade_id),
+        'to_grade': catalog.grade(target_grade.pk),
+        'min_steps': len(route) - 1,
+        'route': [catalog.grades[grade_id] for grade_id in route if grade_id in catalog.grades],
+        'required_skills': skills(required_skill_ids),
+        'missing_skills': skills(skill_id for skill_id in required_skill_ids if skill_id not in acquired_skill_ids),
+    }
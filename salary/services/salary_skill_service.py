@@ -1,4 +1,5 @@
 from ..models import UserSkill, SkillApplication, UserSalaryGrade, SalaryGrade, Skill
+from .grade_catalog import get_grade_catalog
 
 
 class SalarySkillService:
@@ -21,7 +22,7 @@ class SalarySkillService:
     def get_current_grade_info(self):
         """現在の給与グレード情報を取得"""
         try:
-            current_grade = self.user.current_salary_grade
+            current_grade = get_grade_catalog().grade(self.user.current_salary_grade_id)
             if current_grade:
                 return {
                     'name': current_grade.name,
@@ -56,34 +57,46 @@ class SalarySkillService:
             return []
         
         current_grade = current_grade_info['grade_object']
-        next_grades = current_grade.next_possible_grades.all()
+        catalog = get_grade_catalog()
+        next_grades = catalog.next_grades(current_grade.id)
+        if not next_grades:
+            return []
+        
+        # 習得済み・申告中のスキルは昇進先ごとではなく1回だけ取得する
+        acquired_skill_ids = set(
+            UserSkill.objects.filter(user=self.user).values_list('skill_id', flat=True)
+        )
+        pending_skill_ids = set(
+            SkillApplication.objects.filter(
+                user=self.user, status='pending'
+            ).values_list('skill_id', flat=True)
+        )
         
         promotion_paths = []
         for grade in next_grades:
-            path_info = self._analyze_grade_requirements(grade)
+            path_info = self._analyze_grade_requirements(
+                grade, catalog, acquired_skill_ids, pending_skill_ids
+            )
             promotion_paths.append(path_info)
         
         # 完成度順でソート（完成度が高い順）
         promotion_paths.sort(key=lambda x: x['completion_rate'], reverse=True)
         return promotion_paths
     
-    def _analyze_grade_requirements(self, target_grade):
-        """指定グレードの必要スキルと現在の達成状況を分析"""
-        required_skills = target_grade.required_skills.all()
-        user_skills = UserSkill.objects.filter(
-            user=self.user, 
-            skill__in=required_skills
-        ).values_list('skill_id', flat=True)
-        
-        # 申告中のスキルも取得
-        pending_skills = SkillApplication.objects.filter(
-            user=self.user,
-            skill__in=required_skills,
-            status='pending'
-        ).values_list('skill_id', flat=True)
-        
-        acquired_skill_ids = set(user_skills)
-        pending_skill_ids = set(pending_skills)
+    def _analyze_grade_requirements(self, target_grade, catalog, user_skill_ids, user_pending_skill_ids):
+        """
+        指定グレードの必要スキルと現在の達成状況を分析
+        
+        Args:
+            target_grade: 昇進先のグレード
+            catalog: グレードカタログ
+            user_skill_ids: ユーザーの習得済みスキルIDの集合
+            user_pending_skill_ids: ユーザーの申告中スキルIDの集合
+        """
+        required_skills = catalog.required_skills(target_grade.id)
+        required_skill_ids = catalog.required_skill_ids.get(target_grade.id, frozenset())
+        acquired_skill_ids = required_skill_ids & user_skill_ids
+        pending_skill_ids = required_skill_ids & user_pending_skill_ids
         
         skill_status = []
         for skill in required_skills:
@@ -169,10 +182,7 @@ class SalarySkillService:
     
     def has_salary_grade(self):
         """給与グレードが設定されているかチェック"""
-        try:
-            return self.user.current_salary_grade is not None
-        except ValueError:
-            return False
+        return self.user.current_salary_grade_id is not None
     
     def apply_for_skill(self, skill_id, comment=""):
         """スキル習得を申告"""
@@ -0,0 +1,147 @@
+from typing import Dict, List
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import AdminActionLog, SkillApplication, UserSkill
+from .dashboard_cache import bump_dashboard_cache_version
+from .pending_counter import adjust_pending_application_count
+
+# 一括処理の結果（申告IDごと）
+RESULT_APPROVED = 'approved'
+RESULT_REJECTED = 'rejected'
+RESULT_NOT_FOUND = 'not_found'
+RESULT_ALREADY_ACQUIRED = 'already_acquired'
+
+
+class SkillApplicationBulkService:
+    """
+    スキル習得申告の一括承認・却下を行うサービス
+
+    申告ごとに取得・判定・保存を繰り返さず、承認待ちの申告を1回のクエリでロックし、
+    ステータスの更新は1回のUPDATE、UserSkill・操作ログの作成は bulk_create で行う
+    """
+
+    def __init__(self, admin_user):
+        self.admin_user = admin_user
+
+    def approve(self, application_ids) -> List[Dict]:
+        """
+        申告を一括承認する
+
+        習得済みのスキルの申告は承認せず承認待ちのまま残す（同じ一括処理内の重複申告も含む）
+
+        Args:
+            application_ids: 申告IDのリスト
+
+        Returns:
+            [{'id': 申告ID, 'result': 結果}, ...]（指定順）
+        """
+        ids = self._normalize_ids(application_ids)
+        with transaction.atomic():
+            applications = self._lock_pending(ids)
+
+            # 習得済みスキルを1回のクエリでまとめて取得
+            acquired = set(UserSkill.objects.filter(
+                user_id__in={application.user_id for application in applications.values()},
+                skill_id__in={application.skill_id for application in applications.values()}
+            ).values_list('user_id', 'skill_id'))
+
+            approved = []
+            results = {}
+            for app_id, application in applications.items():
+                key = (application.user_id, application.skill_id)
+                if key in acquired:
+                    results[app_id] = RESULT_ALREADY_ACQUIRED
+                    continue
+                acquired.add(key)
+                approved.append(application)
+                results[app_id] = RESULT_APPROVED
+
+            if approved:
+                now = timezone.now()
+                self._update_status(approved, 'approved', now)
+                UserSkill.objects.bulk_create([
+                    UserSkill(
+                        user_id=application.user_id,
+                        skill_id=application.skill_id,
+                        acquired_date=now.date(),
+                        approved_by=self.admin_user
+                    ) for application in approved
+                ])
+                self._log(approved, 'application_approve', '承認')
+
+        return self._build_results(application_ids, results)
+
+    def reject(self, application_ids) -> List[Dict]:
+        """
+        申告を一括却下する
+
+        Args:
+            application_ids: 申告IDのリスト
+
+        Returns:
+            [{'id': 申告ID, 'result': 結果}, ...]（指定順）
+        """
+        ids = self._normalize_ids(application_ids)
+        with transaction.atomic():
+            applications = self._lock_pending(ids)
+            rejected = list(applications.values())
+            if rejected:
+                self._update_status(rejected, 'rejected', timezone.now())
+                self._log(rejected, 'application_reject', '却下')
+
+        results = {app_id: RESULT_REJECTED for app_id in applications}
+        return self._build_results(application_ids, results)
+
+    def _normalize_ids(self, application_ids):
+        """整数に変換できるIDのみを重複なく取り出す"""
+        ids = []
+        for app_id in application_ids:
+            try:
+                ids.append(int(app_id))
+            except (TypeError, ValueError):
+                continue
+        return list(dict.fromkeys(ids))
+
+    def _lock_pending(self, ids):
+        """承認待ちの申告を1回のクエリでロックして取得（申告日順）"""
+        if not ids:
+            return {}
+        applications = SkillApplication.objects.select_for_update(of=('self',)).select_related(
+            'skill'
+        ).filter(id__in=ids, status='pending').order_by('application_date', 'id')
+        return {application.id: application for application in applications}
+
+    def _update_status(self, applications, status, processed_date):
+        SkillApplication.objects.filter(
+            id__in=[application.id for application in applications]
+        ).update(
+            status=status,
+            processed_by=self.admin_user,
+            processed_date=processed_date
+        )
+        # QuerySet.update・bulk_create はシグナルを送らないため承認待ち申告数・ダッシュボードを直接更新する
+        adjust_pending_application_count(-len(applications))
+        bump_dashboard_cache_version(application.user_id for application in applications)
+
+    def _log(self, applications, action, verb):
+        AdminActionLog.objects.bulk_create([
+            AdminActionLog(
+                admin_user=self.admin_user,
+                action=action,
+                target_user_id=application.user_id,
+                description=f'スキル「{application.skill.name}」の申告を{verb}'
+            ) for application in applications
+        ])
+
+    def _build_results(self, application_ids, results):
+        """指定されたIDの順に結果を並べる（承認待ちでない・存在しないIDは not_found）"""
+        outcomes = []
+        for app_id in application_ids:
+            try:
+                key = int(app_id)
+            except (TypeError, ValueError):
+                key = None
+            outcomes.append({'id': app_id, 'result': results.get(key, RESULT_NOT_FOUND)})
+        return outcomes
@@ -0,0 +1,67 @@
+"""
+ユーザー×スキルの習得状況マトリクス
+
+習得状況（UserSkill）を (user_id, skill_id) の組として1回のクエリで読み込み、
+スキルごとのビット集合（Pythonの整数。ユーザーIDの昇順に1ビットずつ割り当てる）に詰める。
+スキルの習得者数・グレードの所属者数と、それぞれのユーザー一覧はビット演算で求める。
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+from django.contrib.auth import get_user_model
+
+from ..models import UserSkill
+
+User = get_user_model()
+
+
+class SkillMatrix:
+    """ユーザー×スキルの習得状況（スキルごと・グレードごとのビット集合）"""
+
+    def __init__(self, users: List[tuple], pairs: Iterable[tuple]):
+        """
+        Args:
+            users: (ユーザーID, 名前, 現在のグレードID) のリスト（ユーザーIDの昇順）
+            pairs: (ユーザーID, スキルID) の組
+        """
+        self.user_ids = [user_id for user_id, _, _ in users]
+        self.user_names = {user_id: name for user_id, name, _ in users}
+        self.bit_of = {user_id: index for index, user_id in enumerate(self.user_ids)}
+
+        self.skill_bits: Dict[int, int] = {}
+        for user_id, skill_id in pairs:
+            bit = self.bit_of.get(user_id)
+            if bit is not None:
+                self.skill_bits[skill_id] = self.skill_bits.get(skill_id, 0) | (1 << bit)
+
+        self.grade_bits: Dict[int, int] = {}
+        for user_id, _, grade_id in users:
+            if grade_id is not None:
+                self.grade_bits[grade_id] = self.grade_bits.get(grade_id, 0) | (1 << self.bit_of[user_id])
+
+    @classmethod
+    def load(cls) -> 'SkillMatrix':
+        """全ユーザーの習得状況を読み込む（ユーザーと習得スキルの2クエリ）"""
+        users = list(User.objects.order_by('id').values_list('id', 'name', 'current_salary_grade_id'))
+        pairs = UserSkill.objects.values_list('user_id', 'skill_id').order_by()
+        return cls(users, pairs)
+
+    def user_ids_of(self, bits: int, limit: Optional[int] = None) -> List[int]:
+        """ビット集合をユーザーIDのリスト（昇順）に変換"""
+        user_ids = []
+        while bits and (limit is None or len(user_ids) < limit):
+            lowest = bits & -bits
+            user_ids.append(self.user_ids[lowest.bit_length() - 1])
+            bits ^= lowest
+        return user_ids
+
+    def holders(self, skill_id: int) -> int:
+        """スキルの習得者のビット集合"""
+        return self.skill_bits.get(skill_id, 0)
+
+    def holders_count(self, skill_id: int) -> int:
+        return self.holders(skill_id).bit_count()
+
+    def grade_members(self, grade_id: int) -> int:
+        """現在のグレードが指定グレードのユーザーのビット集合"""
+        return self.grade_bits.get(grade_id, 0)
@@ -0,0 +1,134 @@
+"""
+給与関連のシグナル
+
+- 給与グレード履歴の変更に応じてユーザーの現在のグレードを更新する
+- グレード・スキルの変更に応じてグレードカタログのバージョンを更新する
+- グレード・昇進経路・必要スキルの変更に応じてグレード間の昇進経路テーブルを再構築する
+- スキル申告の作成・ステータス変更・削除に応じて承認待ち申告数カウンターを増減する
+- スキル・申告・グレード履歴の変更に応じてダッシュボードの給与・スキル欄のキャッシュを無効化する
+- 打刻・グレード履歴の変更に応じて人件費レポートのキャッシュを無効化する
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from zoneinfo import ZoneInfo
+
+from core.models import previous_value, stored_value, track_stored_values
+from timeclock.models import TimeRecord
+
+from .models import SalaryGrade, Skill, SkillApplication, UserSalaryGrade, UserSkill
+from .services.dashboard_cache import bump_dashboard_cache_version
+from .services.grade_catalog import bump_grade_catalog_version, clear_local_grade_catalog
+from .services.labor_cost_report import bump_labor_cost_month_version, bump_labor_cost_wage_version
+from .services.pending_counter import adjust_pending_application_count
+from .services.promotion_paths import schedule_promotion_paths_rebuild
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=UserSalaryGrade)
+@receiver(post_delete, sender=UserSalaryGrade)
+def refresh_current_salary_grade(sender, instance, **kwargs):
+    """
+    UserSalaryGrade作成・編集・削除時にUser.current_salary_gradeを更新
+
+    Args:
+        sender: シグナル送信元のモデルクラス
+        instance: 保存・削除されたUserSalaryGradeインスタンス
+        **kwargs: その他のシグナル引数
+    """
+    try:
+        instance.user.refresh_current_salary_grade()
+    except sender.user.RelatedObjectDoesNotExist:
+        # ユーザー削除に伴う履歴の削除
+        logger.debug(f"Skip current salary grade refresh: user_id={instance.user_id} no longer exists")
+
+
+@receiver(post_save, sender=SalaryGrade)
+@receiver(post_delete, sender=SalaryGrade)
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+@receiver(m2m_changed, sender=SalaryGrade.required_skills.through)
+@receiver(m2m_changed, sender=SalaryGrade.next_possible_grades.through)
+def invalidate_grade_catalog(sender, **kwargs):
+    """
+    グレード・スキル・昇進経路・必要スキルの変更時にグレードカタログを無効化
+
+    このプロセスのスナップショットは即時に破棄し、他プロセス向けのバージョンはコミット後に更新する。
+    m2m_changed は変更前（pre_*）にも送られるため、変更後のみ処理する
+    """
+    action = kwargs.get('action')
+    if action is not None and not action.startswith('post_'):
+        return
+    clear_local_grade_catalog()
+    transaction.on_commit(bump_grade_catalog_version)
+
+
+@receiver(post_save, sender=SalaryGrade)
+@receiver(post_delete, sender=SalaryGrade)
+@receiver(post_delete, sender=Skill)
+@receiver(m2m_changed, sender=SalaryGrade.required_skills.through)
+@receiver(m2m_changed, sender=SalaryGrade.next_possible_grades.through)
+def refresh_promotion_paths(sender, **kwargs):
+    """
+    グレード・昇進経路・必要スキルの変更時に昇進経路テーブルを再構築
+
+    グレードの保存と必要スキル・昇進先の設定で何度も送られるため、
+    コミット後に1回だけ、データベースから直接読み込んで作り直す
+    """
+    action = kwargs.get('action')
+    if action is not None and not action.startswith('post_'):
+        return
+    if kwargs.get('raw'):
+        # フィクスチャ読み込み中は関連が揃っていないため再構築しない
+        return
+    schedule_promotion_paths_rebuild()
+
+
+# 保存時に承認待ちからの変化を判定できるよう、データベース上のステータスを保持する
+track_stored_values(SkillApplication, 'status')
+
+
+@receiver(post_save, sender=SkillApplication)
+def count_saved_application(sender, instance, created, **kwargs):
+    """申告の作成・ステータス変更時に承認待ち申告数を増減"""
+    was_pending = not created and previous_value(instance, 'status') == 'pending'
+    is_pending = instance.status == 'pending'
+    adjust_pending_application_count(int(is_pending) - int(was_pending))
+
+
+@receiver(post_delete, sender=SkillApplication)
+def count_deleted_application(sender, instance, **kwargs):
+    """承認待ちの申告の削除時に承認待ち申告数を減らす"""
+    if stored_value(instance, 'status') == 'pending':
+        adjust_pending_application_count(-1)
+
+
+@receiver(post_save, sender=UserSkill)
+@receiver(post_delete, sender=UserSkill)
+@receiver(post_save, sender=SkillApplication)
+@receiver(post_delete, sender=SkillApplication)
+@receiver(post_save, sender=UserSalaryGrade)
+@receiver(post_delete, sender=UserSalaryGrade)
+def invalidate_salary_dashboard(sender, instance, **kwargs):
+    """ユーザーのスキル・申告・グレード履歴の変更時にダッシュボードの給与・スキル欄を無効化"""
+    bump_dashboard_cache_version([instance.user_id])
+
+
+@receiver(post_save, sender=TimeRecord)
+@receiver(post_delete, sender=TimeRecord)
+def invalidate_labor_cost_month(sender, instance, **kwargs):
+    """打刻の変更時にその月（JST）の人件費レポートを無効化"""
+    record_date = instance.timestamp.astimezone(ZoneInfo(settings.TIME_ZONE)).date()
+    bump_labor_cost_month_version(record_date.year, record_date.month)
+
+
+@receiver(post_save, sender=UserSalaryGrade)
+@receiver(post_delete, sender=UserSalaryGrade)
+def invalidate_labor_cost_wages(sender, instance, **kwargs):
+    """給与グレード履歴の変更時に人件費レポートを無効化（適用日以降の全月に影響するため全体）"""
+    bump_labor_cost_wage_version()
@@ -1,3 +1,764 @@
+"""
+給与・スキル機能テスト
+"""
+
+from datetime import date, timedelta
+from io import StringIO
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
 from django.test import TestCase
+from zoneinfo import ZoneInfo
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from salary.models import AdminActionLog, Counter, GradePromotionPath, SalaryGrade, Skill, SkillApplication, UserSalaryGrade, UserSkill
+from salary.services.grade_catalog import get_grade_catalog
+from salary.services.labor_cost_report import build_labor_cost_report, get_labor_cost_report
+from salary.services.pending_counter import PENDING_APPLICATIONS, get_pending_application_count
+from salary.services.promotion_eligibility_service import PromotionEligibilityService
+from salary.services.promotion_paths import find_grade_cycles, find_promotion_cycles
+from salary.services.salary_skill_service import SalarySkillService
+from salary.services.skill_application_service import SkillApplicationBulkService
+from salary.services.skill_matrix import SkillMatrix
+
+User = get_user_model()
+
+
+class PromotionEligibilityTest(TestCase):
+    """昇進条件達成者の集合演算による判定のテスト"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', name='Admin', password='pass')
+        self.register = Skill.objects.create(name='レジ', description='', category='customer_service')
+        self.cooking = Skill.objects.create(name='調理', description='', category='technical')
+
+        self.junior = SalaryGrade.objects.create(name='Junior', hourly_wage=1000, level=1)
+        self.middle = SalaryGrade.objects.create(name='Middle', hourly_wage=1100, level=1)
+        self.senior = SalaryGrade.objects.create(name='Senior', hourly_wage=1200, level=2)
+        self.senior.required_skills.set([self.register, self.cooking])
+        self.junior.next_possible_grades.set([self.senior])
+
+    def _create_user(self, name, grades=(), skills=()):
+        user = User.objects.create_user(email=f'{name.lower()}@example.com', name=name)
+        for effective_date, grade in grades:
+            UserSalaryGrade.objects.create(user=user, salary_grade=grade, effective_date=effective_date)
+        for skill in skills:
+            UserSkill.objects.create(user=user, skill=skill, acquired_date=date(2025, 1, 1))
+        return user
+
+    def test_eligible_users_require_path_and_all_skills(self):
+        eligible = self._create_user(
+            'Eligible', [(date(2025, 1, 1), self.junior)], [self.register, self.cooking]
+        )
+        self._create_user('MissingSkill', [(date(2025, 1, 1), self.junior)], [self.register])
+        self._create_user('NoPath', [(date(2025, 1, 1), self.middle)], [self.register, self.cooking])
+        self._create_user('NoGrade', [], [self.register, self.cooking])
+        # 昇進経路があるのは過去のグレードのみ（現在は Middle）
+        self._create_user(
+            'Moved', [(date(2025, 1, 1), self.junior), (date(2025, 6, 1), self.middle)],
+            [self.register, self.cooking]
+        )
+
+        users = list(PromotionEligibilityService().eligible_users(self.senior))
+
+        self.assertEqual(users, [eligible])
+
+    def test_grade_without_required_skills_checks_path_only(self):
+        self.junior.next_possible_grades.add(self.middle)
+        user = self._create_user('Anyone', [(date(2025, 1, 1), self.junior)])
+
+        self.assertEqual(list(PromotionEligibilityService().eligible_users(self.middle)), [user])
+        self.assertEqual(list(PromotionEligibilityService().eligible_users(self.senior)), [])
+
+    def test_eligibility_is_a_single_query(self):
+        for index in range(20):
+            self._create_user(f'User{index}', [(date(2025, 1, 1), self.junior)], [self.register, self.cooking])
+
+        # 昇進経路・必要スキルはグレードカタログから取得する
+        get_grade_catalog()
+        with self.assertNumQueries(1):
+            users = list(PromotionEligibilityService().eligible_users(self.senior))
+        self.assertEqual(len(users), 20)
+
+    def test_grade_detail_query_count_does_not_grow_with_users(self):
+        """グレード詳細画面のクエリ数がユーザー数に比例しない"""
+        self.client.force_login(self.admin)
+        url = reverse('salary:admin_grade_detail', args=[self.senior.pk])
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            return len(queries.captured_queries)
+
+        self._create_user('First', [(date(2025, 1, 1), self.junior)], [self.register, self.cooking])
+        # 初回はグレードカタログの読み込みを含む
+        count_queries()
+        baseline = count_queries()
+
+        for index in range(10):
+            self._create_user(f'User{index}', [(date(2025, 1, 1), self.junior)], [self.register, self.cooking])
+
+        self.assertEqual(count_queries(), baseline)
+        self.assertEqual(self.client.get(url).context['eligible_users_count'], 11)
+
+    def test_user_list_promotion_conditions_query_count_is_constant(self):
+        """ユーザー管理画面の昇進条件判定のクエリ数がユーザー数に比例しない"""
+        self.client.force_login(self.admin)
+        url = reverse('salary:admin_user_management')
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            return response, len(queries.captured_queries)
+
+        self._create_user('First', [(date(2025, 1, 1), self.junior)], [self.register, self.cooking])
+        # 初回はグレードカタログの読み込みを含む
+        count_queries()
+        _, baseline = count_queries()
+
+        for index in range(10):
+            self._create_user(f'User{index}', [(date(2025, 1, 1), self.junior)], [self.register])
+
+        response, queries = count_queries()
+        self.assertEqual(queries, baseline)
+
+        conditions = {user.name: user.promotion_conditions for user in response.context['users']}
+        self.assertEqual(conditions['Admin'], [])
+        self.assertEqual(
+            [(c['grade'], c['can_promote']) for c in conditions['First']], [(self.senior, True)]
+        )
+        self.assertEqual(conditions['User0'][0]['missing_skills'], {self.cooking.pk})
+
+
+class CurrentSalaryGradeTest(TestCase):
+    """ユーザーの現在のグレード（履歴から自動更新される参照）のテスト"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', name='Admin', password='pass')
+        self.user = User.objects.create_user(email='user@example.com', name='User')
+        self.junior = SalaryGrade.objects.create(name='Junior', hourly_wage=1000, level=1)
+        self.senior = SalaryGrade.objects.create(name='Senior', hourly_wage=1200, level=2)
+
+    def _reload(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_follows_latest_effective_date(self):
+        UserSalaryGrade.objects.create(user=self.user, salary_grade=self.senior, effective_date=date(2025, 6, 1))
+        # 過去の日付の履歴を後から登録しても現在のグレードは変わらない
+        UserSalaryGrade.objects.create(user=self.user, salary_grade=self.junior, effective_date=date(2025, 1, 1))
+
+        self.assertEqual(self._reload().current_salary_grade, self.senior)
+        self.assertEqual(self._reload().current_hourly_wage, 1200)
+
+    def test_updated_on_edit_and_delete(self):
+        history = UserSalaryGrade.objects.create(user=self.user, salary_grade=self.junior, effective_date=date(2025, 1, 1))
+        self.assertEqual(self.user.current_salary_grade, self.junior)
+
+        history.salary_grade = self.senior
+        history.save()
+        self.assertEqual(self._reload().current_salary_grade, self.senior)
+
+        history.delete()
+        self.assertIsNone(self._reload().current_salary_grade)
+
+    def test_stale_user_save_keeps_current_grade(self):
+        """読み込み済みのユーザーを保存しても、その後に更新された現在のグレードを書き戻さない"""
+        stale = self._reload()
+        UserSalaryGrade.objects.create(user=self.user, salary_grade=self.senior, effective_date=date(2025, 1, 1))
+
+        stale.name = 'Renamed'
+        stale.save()
+        user = self._reload()
+        self.assertEqual((user.name, user.current_salary_grade), ('Renamed', self.senior))
+
+        # 遅延読み込みのフィールドを個別に読み込まず、削除済みの行は作り直す
+        deferred = User.objects.only('id', 'name', 'hire_date').get(pk=self.user.pk)
+        with CaptureQueriesContext(connection) as queries:
+            deferred.save()
+        self.assertFalse([q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT')])
+
+        User.objects.filter(pk=self.user.pk).delete()
+        stale.save()
+        self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+
+    def test_user_list_reads_grades_with_users(self):
+        """ユーザー管理画面で現在のグレードを履歴から問い合わせない"""
+        for index in range(10):
+            user = User.objects.create_user(email=f'user{index}@example.com', name=f'User{index}')
+            UserSalaryGrade.objects.create(user=user, salary_grade=self.junior, effective_date=date(2025, 1, 1))
+        self.client.force_login(self.admin)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('salary:admin_user_management'), {'grade': self.junior.pk})
+
+        self.assertEqual(len(response.context['users']), 10)
+        history_queries = [q['sql'] for q in queries.captured_queries if 'salary_usersalarygrade' in q['sql']]
+        self.assertEqual(history_queries, [])
+
+
+class GradeCatalogTest(TestCase):
+    """グレードカタログ（プロセス内キャッシュ）のテスト"""
+
+    def setUp(self):
+        self.register = Skill.objects.create(name='レジ', description='', category='customer_service')
+        self.cooking = Skill.objects.create(name='調理', description='', category='technical')
+        self.junior = SalaryGrade.objects.create(name='Junior', hourly_wage=1000, level=1)
+        self.senior = SalaryGrade.objects.create(name='Senior', hourly_wage=1200, level=2)
+        self.leader = SalaryGrade.objects.create(name='Leader', hourly_wage=1300, level=3)
+        self.junior.next_possible_grades.set([self.leader, self.senior])
+        self.senior.required_skills.set([self.register])
+
+    def test_snapshot_holds_graph_and_requirements(self):
+        catalog = get_grade_catalog()
+
+        self.assertEqual(catalog.next_grades(self.junior.pk), [self.senior, self.leader])
+        self.assertEqual(catalog.previous_grades(self.senior.pk), [self.junior])
+        self.assertEqual(catalog.required_skill_ids[self.senior.pk], frozenset([self.register.pk]))
+        self.assertEqual(catalog.levels[self.leader.pk], 3)
+
+    def test_loaded_once_until_edited(self):
+        catalog = get_grade_catalog()
+        with self.assertNumQueries(0):
+            self.assertIs(get_grade_catalog(), catalog)
+
+        self.senior.required_skills.add(self.cooking)
+
+        self.assertEqual(
+            get_grade_catalog().required_skill_ids[self.senior.pk],
+            frozenset([self.register.pk, self.cooking.pk])
+        )
+
+    def test_promotion_paths_use_catalog(self):
+        """ユーザーの昇進ルートの算出でグレード・必要スキルを問い合わせない"""
+        user = User.objects.create_user(email='user@example.com', name='User')
+        UserSalaryGrade.objects.create(user=user, salary_grade=self.junior, effective_date=date(2025, 1, 1))
+        UserSkill.objects.create(user=user, skill=self.register, acquired_date=date(2025, 1, 1))
+        get_grade_catalog()
+
+        with CaptureQueriesContext(connection) as queries:
+            paths = SalarySkillService(user).get_promotion_paths()
+
+        grade_queries = [q['sql'] for q in queries.captured_queries if 'salary_salarygrade' in q['sql']]
+        self.assertEqual(grade_queries, [])
+        self.assertEqual(
+            [(path['grade'], path['completion_rate']) for path in paths],
+            [(self.senior, 100), (self.leader, 100)]
+        )
+
+
+class SkillApplicationBulkTest(TestCase):
+    """スキル申告の一括承認・却下のテスト"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', name='Admin', password='pass')
+        self.skills = [
+            Skill.objects.create(name=f'Skill{index}', description='', category='technical')
+            for index in range(3)
+        ]
+
+    def _apply(self, count, skill_index=0):
+        applications = []
+        for index in range(count):
+            user = User.objects.create_user(email=f'user{skill_index}-{index}@example.com', name=f'User{index}')
+            applications.append(SkillApplication.objects.create(user=user, skill=self.skills[skill_index]))
+        return applications
+
+    def test_approve_reports_outcome_per_id(self):
+        fresh, held, processed = self._apply(3)
+        UserSkill.objects.create(user=held.user, skill=held.skill, acquired_date=date(2025, 1, 1))
+        duplicate = SkillApplication.objects.create(user=fresh.user, skill=fresh.skill)
+        processed.status = 'rejected'
+        processed.save()
+
+        results = SkillApplicationBulkService(self.admin).approve(
+            [fresh.pk, held.pk, duplicate.pk, processed.pk, 99999]
+        )
+
+        self.assertEqual([result['result'] for result in results], [
+            'approved', 'already_acquired', 'already_acquired', 'not_found', 'not_found'
+        ])
+        fresh.refresh_from_db()
+        self.assertEqual((fresh.status, fresh.processed_by), ('approved', self.admin))
+        held.refresh_from_db()
+        self.assertEqual(held.status, 'pending')
+        self.assertTrue(UserSkill.objects.filter(user=fresh.user, skill=fresh.skill, approved_by=self.admin).exists())
+        self.assertEqual(AdminActionLog.objects.filter(action='application_approve').count(), 1)
+
+    def test_query_count_does_not_grow_with_applications(self):
+        def count_queries(applications, method):
+            with CaptureQueriesContext(connection) as queries:
+                getattr(SkillApplicationBulkService(self.admin), method)([a.pk for a in applications])
+            return len(queries.captured_queries)
+
+        self.assertEqual(count_queries(self._apply(2, 0), 'approve'), count_queries(self._apply(20, 1), 'approve'))
+        self.assertEqual(UserSkill.objects.count(), 22)
+
+        rejected = self._apply(20, 2)
+        self.assertEqual(count_queries(rejected[:2], 'reject'), count_queries(rejected[2:], 'reject'))
+        self.assertEqual(SkillApplication.objects.filter(status='rejected').count(), 20)
+        self.assertEqual(AdminActionLog.objects.filter(action='application_reject').count(), 20)
+
+    def test_bulk_approve_api_returns_results(self):
+        application, = self._apply(1)
+        self.client.force_login(self.admin)
+
+        response = self.client.post(
+            reverse('salary:admin_bulk_approve'),
+            data=json.dumps({'application_ids': [application.pk, 99999]}),
+            content_type='application/json'
+        )
+
+        data = response.json()
+        self.assertEqual(data['status'], 'error')
+        self.assertEqual(data['processed_count'], 1)
+        self.assertEqual(data['results'], [
+            {'id': application.pk, 'result': 'approved'},
+            {'id': 99999, 'result': 'not_found'},
+        ])
+
+
+class AdminActivityFeedTest(TestCase):
+    """活動ログの差分取得・整理のテスト"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', name='Admin', password='pass')
+        self.user = User.objects.create_user(email='user@example.com', name='User')
+        self.client.force_login(self.admin)
+        self.url = reverse('salary:admin_recent_activities')
+
+    def _log(self, description):
+        return AdminActionLog.objects.create(
+            admin_user=self.admin, action='skill_grant', target_user=self.user, description=description
+        )
+
+    def test_empty_dashboard_renders_polling_container(self):
+        """活動ログが空でも、新着の取得先と空のカーソルを持つ一覧を出力する"""
+        response = self.client.get(reverse('salary:admin_dashboard'))
+        self.assertContains(response, f'data-url="{self.url}"')
+        self.assertContains(response, 'data-cursor=""')
+
+    def test_returns_only_new_logs_after_cursor(self):
+        first = self._log('first')
+        data = self.client.get(self.url).json()
+        self.assertEqual([a['id'] for a in data['activities']], [first.id])
+        self.assertEqual(data['cursor'], first.id)
+
+        self._log('second')
+        third = self._log('third')
+        data = self.client.get(self.url, {'since_id': first.id}).json()
+
+        self.assertEqual([a['description'] for a in data['activities']], ['third', 'second'])
+        self.assertEqual(data['cursor'], third.id)
+        self.assertFalse(data['has_more'])
+        self.assertEqual(data['activities'][0]['target_user']['name'], 'User')
+
+        data = self.client.get(self.url, {'since_id': first.id, 'limit': 1}).json()
+        self.assertEqual([a['id'] for a in data['activities']], [third.id])
+        self.assertTrue(data['has_more'])
+
+    def test_not_modified_until_new_log(self):
+        log = self._log('first')
+        response = self.client.get(self.url, {'since_id': log.id})
+        self.assertEqual(response.json()['activities'], [])
+
+        response = self.client.get(self.url, {'since_id': log.id}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        self._log('second')
+        response = self.client.get(self.url, {'since_id': log.id}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_requires_admin(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    def test_prune_command_deletes_old_logs(self):
+        old = self._log('old')
+        AdminActionLog.objects.filter(pk=old.pk).update(timestamp=timezone.now() - timedelta(days=400))
+        recent = self._log('recent')
+
+        out = StringIO()
+        call_command('prune_admin_action_logs', '--months', '12', '--dry-run', stdout=out)
+        self.assertEqual(AdminActionLog.objects.count(), 2)
+
+        call_command('prune_admin_action_logs', '--months', '12', '--batch-size', '1', stdout=out)
+        self.assertEqual(list(AdminActionLog.objects.values_list('id', flat=True)), [recent.id])
+
+
+class PendingApplicationCounterTest(TestCase):
+    """承認待ち申告数カウンターのテスト"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', name='Admin', password='pass')
+        self.user = User.objects.create_user(email='user@example.com', name='User')
+        self.skills = [
+            Skill.objects.create(name=f'Skill{index}', description='', category='technical')
+            for index in range(3)
+        ]
+
+    def test_follows_create_status_change_and_delete(self):
+        first, second, third = [
+            SkillApplication.objects.create(user=self.user, skill=skill) for skill in self.skills
+        ]
+        self.assertEqual(get_pending_application_count(), 3)
+
+        first.status = 'approved'
+        first.save()
+        SkillApplicationBulkService(self.admin).reject([second.pk])
+        self.assertEqual(get_pending_application_count(), 1)
+
+        # 読み込み直したインスタンスでも変更前のステータスを判定できる
+        application = SkillApplication.objects.get(pk=first.pk)
+        application.status = 'pending'
+        application.save()
+        self.assertEqual(get_pending_application_count(), 2)
+
+        third.delete()
+        SkillApplication.objects.get(pk=second.pk).delete()
+        self.assertEqual(get_pending_application_count(), 1)
+
+    def test_menu_reads_counter_without_count_query(self):
+        SkillApplication.objects.create(user=self.user, skill=self.skills[0])
+        self.client.force_login(self.admin)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('salary:admin_skills'))
+
+        self.assertContains(response, '<span class="badge bg-danger ms-2">1</span>')
+        application_queries = [q['sql'] for q in queries.captured_queries if 'salary_skillapplication' in q['sql']]
+        self.assertEqual(application_queries, [])
+
+    def test_reconcile_command_corrects_drift(self):
+        SkillApplication.objects.create(user=self.user, skill=self.skills[0])
+        Counter.objects.filter(name=PENDING_APPLICATIONS).update(value=10)
+
+        call_command('reconcile_salary_counters', stdout=StringIO())
+
+        self.assertEqual(get_pending_application_count(), 1)
+
+
+class SalaryDashboardCacheTest(TestCase):
+    """ダッシュボードの給与・スキル欄のキャッシュのテスト"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', name='Admin', password='pass')
+        self.user = User.objects.create_user(email='user@example.com', name='User', password='pass')
+        self.register = Skill.objects.create(name='レジ', description='', category='customer_service')
+        self.junior = SalaryGrade.objects.create(name='Junior', hourly_wage=1000, level=1)
+        UserSalaryGrade.objects.create(user=self.user, salary_grade=self.junior, effective_date=date(2025, 1, 1))
+        self.client.force_login(self.user)
+        self.url = reverse('timeclock:dashboard')
+
+    def _get(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        skill_queries = [
+            q['sql'] for q in queries.captured_queries
+            if 'salary_userskill' in q['sql'] or 'salary_skillapplication' in q['sql']
+        ]
+        return response, skill_queries
+
+    def test_repeat_loads_skip_service_until_user_changes(self):
+        response, skill_queries = self._get()
+        self.assertContains(response, 'Junior')
+        self.assertNotEqual(skill_queries, [])
+
+        response, skill_queries = self._get()
+        self.assertContains(response, 'Junior')
+        self.assertEqual(skill_queries, [])
+
+        UserSkill.objects.create(user=self.user, skill=self.register, acquired_date=date(2025, 1, 1))
+        response, skill_queries = self._get()
+        self.assertContains(response, 'skill-badge-acquired')
+
+    def test_bulk_approve_invalidates_section(self):
+        application = SkillApplication.objects.create(user=self.user, skill=self.register)
+        response, _ = self._get()
+        self.assertContains(response, 'pending-skills-area')
+
+        SkillApplicationBulkService(self.admin).approve([application.pk])
+
+        response, _ = self._get()
+        self.assertNotContains(response, 'pending-skills-area')
+        self.assertContains(response, 'skill-badge-acquired')
+
+    def test_saving_stale_user_keeps_maintained_fields(self):
+        stale = User.objects.get(pk=self.user.pk)
+        UserSkill.objects.create(user=self.user, skill=self.register, acquired_date=date(2025, 1, 1))
+        UserSalaryGrade.objects.filter(user=self.user).delete()
+
+        stale.name = 'Renamed'
+        stale.save()
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.name, 'Renamed')
+        self.assertIsNone(user.current_salary_grade)
+        self.assertEqual(user.salary_dashboard_version, stale.salary_dashboard_version + 2)
+
+
+class LaborCostReportTest(TestCase):
+    """グレード別人件費レポートのテスト"""
+
+    def setUp(self):
+        from timeclock.models import TimeRecord
+        self.TimeRecord = TimeRecord
+        self.admin = User.objects.create_superuser(email='admin@example.com', name='Admin', password='pass')
+        self.junior = SalaryGrade.objects.create(name='Junior', hourly_wage=1000, level=1)
+        self.senior = SalaryGrade.objects.create(name='Senior', hourly_wage=1500, level=2)
+        self.alice = User.objects.create_user(email='alice@example.com', name='Alice')
+        self.bob = User.objects.create_user(email='bob@example.com', name='Bob')
+        # Alice は 6/10 から Senior
+        UserSalaryGrade.objects.create(user=self.alice, salary_grade=self.junior, effective_date=date(2025, 1, 1))
+        UserSalaryGrade.objects.create(user=self.alice, salary_grade=self.senior, effective_date=date(2025, 6, 10))
+
+    def _work(self, user, day, hours):
+        jst = ZoneInfo('Asia/Tokyo')
+        start = timezone.datetime(day.year, day.month, day.day, 9, 0, tzinfo=jst)
+        self.TimeRecord.objects.create(user=user, clock_type='clock_in', timestamp=start)
+        self.TimeRecord.objects.create(user=user, clock_type='clock_out', timestamp=start + timedelta(hours=hours))
+
+    def test_costs_use_grade_effective_on_each_day(self):
+        self._work(self.alice, date(2025, 6, 9), 4)
+        self._work(self.alice, date(2025, 6, 10), 2)
+        self._work(self.bob, date(2025, 6, 10), 3)
+        get_grade_catalog()
+
+        with self.assertNumQueries(2):
+            report = build_labor_cost_report(2025, 6, today=date(2025, 6, 10))
+
+        rows = {row['grade_name']: row for row in report['rows']}
+        self.assertEqual([row['grade_name'] for row in report['rows']], ['Junior', 'Senior', 'グレード未設定'])
+        self.assertEqual((rows['Junior']['cost'], rows['Junior']['work_hours']), (4000, 4.0))
+        self.assertEqual(rows['Senior']['cost'], 3000)
+        self.assertEqual((rows['グレード未設定']['cost'], rows['グレード未設定']['worker_count']), (0, 1))
+        # 10日経過時点のペースで30日分に延長
+        self.assertTrue(report['is_projection'])
+        self.assertEqual(rows['Junior']['projected_cost'], 12000)
+        self.assertEqual(report['total']['cost'], 7000)
+        self.assertEqual(report['total']['worker_count'], 2)
+
+    def test_breaks_are_excluded_from_work_time(self):
+        jst = ZoneInfo('Asia/Tokyo')
+        start = timezone.datetime(2025, 6, 2, 9, 0, tzinfo=jst)
+        for clock_type, hours in [('clock_in', 0), ('break_start', 2), ('break_end', 3), ('clock_out', 6)]:
+            self.TimeRecord.objects.create(user=self.alice, clock_type=clock_type, timestamp=start + timedelta(hours=hours))
+        # 退勤していない日は含めない
+        self.TimeRecord.objects.create(user=self.bob, clock_type='clock_in', timestamp=start)
+
+        report = build_labor_cost_report(2025, 6, today=date(2025, 6, 30))
+
+        self.assertEqual([(row['grade_name'], row['work_hours'], row['cost']) for row in report['rows']], [('Junior', 5.0, 5000)])
+
+    def test_past_month_is_cached_until_records_change(self):
+        self._work(self.alice, date(2025, 6, 9), 4)
+        self.assertEqual(get_labor_cost_report(2025, 6)['total']['cost'], 4000)
+
+        with CaptureQueriesContext(connection) as queries:
+            get_labor_cost_report(2025, 6)
+        self.assertEqual([q for q in queries.captured_queries if 'timeclock_timerecord' in q['sql']], [])
+
+        self._work(self.alice, date(2025, 6, 11), 2)
+        report = get_labor_cost_report(2025, 6)
+        self.assertEqual(report['total']['cost'], 7000)
+        self.assertFalse(report['is_projection'])
+
+    def test_csv_export(self):
+        self._work(self.alice, date(2025, 6, 9), 4)
+        self.client.force_login(self.admin)
+
+        response = self.client.get(
+            reverse('salary:admin_labor_cost_report'), {'year': 2025, 'month': 6, 'format': 'csv'}
+        )
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = response.content.decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[1], 'Junior,1,1000,1,1,4.0,4000,4000')
+        self.assertEqual(lines[-1], '合計,,,1,1,4.0,4000,4000')
+        self.assertEqual(self.client.get(reverse('salary:admin_labor_cost_report')).status_code, 200)
+
+
+class SkillMatrixTest(TestCase):
+    """習得状況マトリクス（ビット集合）のテスト"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', name='Admin', password='pass')
+        self.register = Skill.objects.create(name='レジ', description='', category='customer_service')
+        self.cooking = Skill.objects.create(name='調理', description='', category='technical')
+
+        self.junior = SalaryGrade.objects.create(name='Junior', hourly_wage=1000, level=1)
+        self.senior = SalaryGrade.objects.create(name='Senior', hourly_wage=1200, level=2)
+        self.senior.required_skills.set([self.register, self.cooking])
+        self.junior.next_possible_grades.set([self.senior])
+
+    def _create_user(self, name, grade=None, skills=()):
+        user = User.objects.create_user(email=f'{name.lower()}@example.com', name=name)
+        if grade:
+            UserSalaryGrade.objects.create(user=user, salary_grade=grade, effective_date=date(2025, 1, 1))
+        for skill in skills:
+            UserSkill.objects.create(user=user, skill=skill, acquired_date=date(2025, 1, 1))
+        return user
+
+    def test_counts_and_set_queries_use_bits(self):
+        both = self._create_user('Both', self.junior, [self.register, self.cooking])
+        register_only = self._create_user('RegisterOnly', self.junior, [self.register])
+        self._create_user('Nothing')
+
+        matrix = SkillMatrix.load()
+
+        self.assertEqual(matrix.holders_count(self.register.pk), 2)
+        self.assertEqual(matrix.user_ids_of(matrix.holders(self.register.pk)), [both.pk, register_only.pk])
+        self.assertEqual(matrix.user_ids_of(matrix.holders(self.cooking.pk)), [both.pk])
+        self.assertEqual(matrix.user_ids_of(matrix.grade_members(self.junior.pk)), [both.pk, register_only.pk])
+        self.assertEqual(matrix.user_ids_of(matrix.holders(self.register.pk), limit=1), [both.pk])
+
+    def test_dashboard_maps_query_count_is_constant(self):
+        """管理者ダッシュボードのマップ作成のクエリ数が習得者数に比例しない"""
+        self.client.force_login(self.admin)
+        url = reverse('salary:admin_dashboard')
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            return response, len(queries.captured_queries)
+
+        self._create_user('First', self.junior, [self.register])
+        # 初回はグレードカタログの読み込みを含む
+        count_queries()
+        _, baseline = count_queries()
+
+        for index in range(10):
+            self._create_user(f'User{index}', self.junior, [self.register, self.cooking])
+
+        response, queries = count_queries()
+        self.assertEqual(queries, baseline)
+
+        skills_map = {skill['id']: skill for skill in response.context['skills_map']}
+        self.assertEqual(skills_map[self.register.pk]['holders_count'], 11)
+        self.assertEqual(len(skills_map[self.register.pk]['holder_names']), 6)
+        grades_map = {grade['id']: grade for grade in response.context['grades_map']}
+        self.assertEqual(grades_map[self.junior.pk]['members_count'], 11)
+        self.assertContains(response, 'User0')
+
+
+class PromotionPathTest(TestCase):
+    """グレード間の昇進経路（推移閉包）のテスト"""
+
+    def setUp(self):
+        self.register = Skill.objects.create(name='レジ', description='', category='customer_service')
+        self.cooking = Skill.objects.create(name='調理', description='', category='technical')
+        self.training = Skill.objects.create(name='指導', description='', category='management')
+
+        # 昇進経路テーブルはコミット後に作り直される
+        with self.captureOnCommitCallbacks(execute=True):
+            self.junior = SalaryGrade.objects.create(name='Junior', hourly_wage=1000, level=1)
+            self.cook = SalaryGrade.objects.create(name='Cook', hourly_wage=1100, level=2)
+            self.cashier = SalaryGrade.objects.create(name='Cashier', hourly_wage=1100, level=2)
+            self.leader = SalaryGrade.objects.create(name='Leader', hourly_wage=1300, level=3)
+            self.cook.required_skills.set([self.cooking, self.register])
+            self.cashier.required_skills.set([self.register])
+            self.leader.required_skills.set([self.training])
+            self.junior.next_possible_grades.set([self.cook, self.cashier])
+            self.cook.next_possible_grades.set([self.leader])
+            self.cashier.next_possible_grades.set([self.leader])
+
+        self.user = User.objects.create_user(email='user@example.com', name='User')
+        UserSalaryGrade.objects.create(user=self.user, salary_grade=self.junior, effective_date=date(2025, 1, 1))
+        UserSkill.objects.create(user=self.user, skill=self.register, acquired_date=date(2025, 1, 1))
+
+    def _path(self, from_grade, to_grade):
+        return GradePromotionPath.objects.get(from_grade=from_grade, to_grade=to_grade)
+
+    def test_closure_keeps_shortest_route_with_fewest_skills(self):
+        path = self._path(self.junior, self.leader)
+        self.assertEqual(path.min_steps, 2)
+        # Cook 経由より必要スキルの少ない Cashier 経由を選ぶ
+        self.assertEqual(path.route, [self.junior.pk, self.cashier.pk, self.leader.pk])
+        self.assertEqual(set(path.required_skill_ids), {self.register.pk, self.training.pk})
+        self.assertFalse(GradePromotionPath.objects.filter(from_grade=self.leader).exists())
+
+    def test_rebuilt_when_required_skills_or_paths_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.leader.required_skills.add(self.cooking)
+        self.assertIn(self.cooking.pk, self._path(self.junior, self.leader).required_skill_ids)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.junior.next_possible_grades.add(self.leader)
+        path = self._path(self.junior, self.leader)
+        self.assertEqual((path.min_steps, path.route), (1, [self.junior.pk, self.leader.pk]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cashier.delete()
+        self.assertEqual(
+            self._path(self.cook, self.leader).route, [self.cook.pk, self.leader.pk]
+        )
+        self.assertFalse(GradePromotionPath.objects.filter(to_grade_id=self.cashier.pk).exists())
+
+    def test_rebuilt_once_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            grade = SalaryGrade.objects.create(name='Manager', hourly_wage=1500, level=4)
+            grade.required_skills.set([self.training])
+            self.leader.next_possible_grades.add(grade)
+            # ロールバックした変更では再構築しない
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                SalaryGrade.objects.create(name='Ghost', hourly_wage=900, level=1).next_possible_grades.add(self.junior)
+                raise RuntimeError
+        self.assertFalse(GradePromotionPath.objects.filter(to_grade=grade).exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        rebuilds = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('DELETE FROM "salary_gradepromotionpath"')]
+        self.assertEqual(len(rebuilds), 1)
+        self.assertEqual(self._path(self.junior, grade).min_steps, 3)
+        self.assertFalse(GradePromotionPath.objects.exclude(from_grade__in=SalaryGrade.objects.all()).exists())
+
+    def test_detects_cycles(self):
+        with self.assertLogs('salary.services.promotion_paths', 'WARNING') as logs, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.leader.next_possible_grades.add(self.junior)
+        self.assertIn('Leader → Junior', logs.output[0])
+
+        self.assertEqual(find_promotion_cycles(), [['Junior', 'Cashier', 'Leader', 'Junior']])
+        self.assertEqual(find_grade_cycles([self.junior.pk], {self.junior.pk: (self.cook.pk,)}), [])
+        # 循環があっても自分自身以外への最短経路は求まる
+        self.assertEqual(self._path(self.leader, self.cashier).min_steps, 2)
+
+    def test_api_returns_route_and_missing_skills(self):
+        self.client.force_login(self.user)
+        url = reverse('salary:promotion_route_api', args=[self.leader.pk])
+        get_grade_catalog()
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(url).json()
+
+        self.assertTrue(data['reachable'])
+        self.assertEqual(data['min_steps'], 2)
+        self.assertEqual([grade['name'] for grade in data['route']], ['Junior', 'Cashier', 'Leader'])
+        self.assertEqual([skill['name'] for skill in data['missing_skills']], ['指導'])
+        # セッション・ユーザーの読み込みと、昇進経路・習得スキルの各1クエリ
+        self.assertLessEqual(len(queries.captured_queries), 4)
+
+        data = self.client.get(reverse('salary:promotion_route_api', args=[self.junior.pk])).json()
+        self.assertEqual((data['reachable'], data['min_steps'], data['missing_skills']), (True, 0, []))
+
+        other = SalaryGrade.objects.create(name='Other', hourly_wage=900, level=1)
+        data = self.client.get(reverse('salary:promotion_route_api', args=[other.pk])).json()
+        self.assertFalse(data['reachable'])
+
+    def test_api_validates_user_id_for_admins(self):
+        admin = User.objects.create_superuser(email='admin@example.com', name='Admin', password='pass')
+        self.client.force_login(admin)
+        url = reverse('salary:promotion_route_api', args=[self.leader.pk])
 
-# Create your tests here.
+        self.assertEqual(self.client.get(url, {'user_id': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'user_id': self.user.pk + 1000}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'user_id': self.user.pk}).json()['min_steps'], 2)
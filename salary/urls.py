@@ -11,10 +11,14 @@ urlpatterns = [
     # スキル申告API  
     path('apply-skill/', views.apply_skill_api, name='apply_skill_api'),
     
+    # 昇進経路API
+    path('promotion-route/<int:grade_id>/', views.promotion_route_api, name='promotion_route_api'),
+    
     # 管理者画面
     path('admin/', include([
         # ダッシュボード
         path('dashboard/', admin_views.AdminDashboardView.as_view(), name='admin_dashboard'),
+        path('api/recent-activities/', admin_views.AdminRecentActivitiesAPI.as_view(), name='admin_recent_activities'),
         
         # スキル管理
         path('skills/', admin_views.AdminSkillListView.as_view(), name='admin_skills'),
@@ -46,5 +50,8 @@ urlpatterns = [
         path('applications/api/bulk-reject/', admin_views.AdminBulkRejectAPI.as_view(), name='admin_bulk_reject'),
         path('applications/api/<int:pk>/approve/', admin_views.AdminApproveApplicationAPI.as_view(), name='admin_approve_application'),
         path('applications/api/<int:pk>/reject/', admin_views.AdminRejectApplicationAPI.as_view(), name='admin_reject_application'),
+        
+        # レポート
+        path('reports/labor-cost/', admin_views.AdminLaborCostReportView.as_view(), name='admin_labor_cost_report'),
     ])),
 ]
\ No newline at end of file
@@ -1,12 +1,15 @@
 from django.shortcuts import render, get_object_or_404
+from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
 import json
 
 from .models import Skill, SkillApplication, UserSkill
+from .services.grade_catalog import get_grade_catalog
+from .services.promotion_paths import get_promotion_route
 from .services.salary_skill_service import SalarySkillService
 
 
@@ -102,3 +105,44 @@ def apply_skill_api(request):
         return JsonResponse({
             'error': 'エラーが発生しました'
         }, status=500)
+
+
+@login_required
+def promotion_route_api(request, grade_id):
+    """
+    現在のグレードから指定グレードまでの最短の昇進経路と未習得スキルを返すAPI
+
+    管理者は user_id パラメータで他のユーザーを指定できる
+    """
+    target_grade = get_grade_catalog().grade(grade_id)
+    if target_grade is None:
+        raise Http404('グレードが見つかりません')
+    user = request.user
+    user_id = request.GET.get('user_id')
+    if user_id and (request.user.is_staff or request.user.is_superuser):
+        if not user_id.isdigit():
+            return JsonResponse({
+                'error': 'ユーザーIDが不正です'
+            }, status=400)
+        user = get_object_or_404(get_user_model(), pk=user_id)
+
+    route = get_promotion_route(user, target_grade)
+    if route is None:
+        return JsonResponse({
+            'reachable': False,
+            'to_grade': {'id': target_grade.id, 'name': target_grade.name},
+            'message': '現在のグレードからこのグレードへの昇進経路はありません',
+        })
+
+    def skill_data(skill):
+        return {'id': skill.id, 'name': skill.name, 'category': skill.get_category_display()}
+
+    return JsonResponse({
+        'reachable': True,
+        'min_steps': route['min_steps'],
+        'route': [
+            {'id': grade.id, 'name': grade.name, 'level': grade.level} for grade in route['route']
+        ],
+        'required_skills': [skill_data(skill) for skill in route['required_skills']],
+        'missing_skills': [skill_data(skill) for skill in route['missing_skills']],
+    })
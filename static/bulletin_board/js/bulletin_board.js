@@ -5,11 +5,12 @@ document.addEventListener('DOMContentLoaded', function () {
     initializeMessageForm();
     initializeDropdowns();
     initializePostModal();
+    initializeInfiniteScroll();
 });
 
-// リアクションボタンの初期化
-function initializeReactionButtons() {
-    document.querySelectorAll('.reaction-btn').forEach(button => {
+// リアクションボタンの初期化（root: 対象のカードを含む要素。省略時はページ全体）
+function initializeReactionButtons(root = document) {
+    root.querySelectorAll('.reaction-btn').forEach(button => {
         // ツールチップを設定
         button.setAttribute('title', 'クリック：リアクション切り替え、長押し：ユーザー一覧表示');
 
@@ -72,10 +73,10 @@ function initializeReactionButtons() {
     });
 }
 
-// ピン留めボタンの初期化
-function initializePinButtons() {
+// ピン留めボタンの初期化（root: 対象のカードを含む要素。省略時はページ全体）
+function initializePinButtons(root = document) {
     // ピン留めボタン
-    document.querySelectorAll('.pin-btn').forEach(button => {
+    root.querySelectorAll('.pin-btn').forEach(button => {
         button.addEventListener('click', function () {
             const messageId = this.dataset.messageId;
             const duration = this.dataset.duration;
@@ -105,7 +106,7 @@ function initializePinButtons() {
     });
 
     // ピン留め解除ボタン
-    document.querySelectorAll('.unpin-btn').forEach(button => {
+    root.querySelectorAll('.unpin-btn').forEach(button => {
         button.addEventListener('click', function () {
             const messageId = this.dataset.messageId;
 
@@ -135,6 +136,72 @@ function initializePinButtons() {
     });
 }
 
+// 無限スクロールの初期化（末尾の「もっと見る」が見えたら続きのメッセージを読み込む）
+function initializeInfiniteScroll() {
+    const feed = document.getElementById('messageFeed');
+    const more = document.getElementById('feedMore');
+    if (!feed || !more) return;
+
+    let loading = false;
+    let observer = null;
+
+    async function loadMoreMessages() {
+        const cursor = feed.dataset.nextCursor;
+        if (loading || !cursor) return;
+
+        loading = true;
+        more.classList.add('loading');
+
+        try {
+            const response = await fetch(`${feed.dataset.feedUrl}?cursor=${encodeURIComponent(cursor)}`);
+            const data = await response.json();
+
+            if (!data.success) {
+                showError('メッセージの読み込み中にエラーが発生しました: ' + data.error);
+                return;
+            }
+
+            // 受け取ったカードにボタンのイベントを設定してから追加
+            const container = document.createElement('div');
+            container.innerHTML = data.html;
+            initializeReactionButtons(container);
+            initializePinButtons(container);
+            feed.append(...container.children);
+
+            feed.dataset.nextCursor = data.next_cursor || '';
+            if (!data.has_more) {
+                if (observer) observer.disconnect();
+                more.remove();
+            } else if (observer) {
+                // 追加後も末尾が見えたままの場合に続けて読み込めるよう監視し直す
+                observer.unobserve(more);
+                observer.observe(more);
+            }
+        } catch (error) {
+            console.error('Feed error:', error);
+            showError('通信エラーが発生しました');
+        } finally {
+            loading = false;
+            more.classList.remove('loading');
+        }
+    }
+
+    // リンクのクリックでもページ遷移せずに続きを読み込む
+    more.querySelector('a').addEventListener('click', function (e) {
+        e.preventDefault();
+        loadMoreMessages();
+    });
+
+    if ('IntersectionObserver' in window) {
+        observer = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                loadMoreMessages();
+            }
+        }, { rootMargin: '200px' });
+        observer.observe(more);
+    }
+}
+
 // メッセージフォームの初期化
 function initializeMessageForm() {
     const form = document.querySelector('form[method="post"]');
@@ -5,6 +5,7 @@ function initLeaderboard() {
     const elements = cacheElements();
     bindEvents(elements);
     injectSpinnerStyles();
+    initRankingList(elements);
 }
 
 // DOM要素取得
@@ -12,7 +13,13 @@ function cacheElements() {
     return {
         joinBtn: document.getElementById('joinBtn'),
         updateBtn: document.getElementById('updateBtn'),
-        recalculateBtn: document.getElementById('recalculateBtn')
+        recalculateBtn: document.getElementById('recalculateBtn'),
+        rankingList: document.getElementById('rankingList'),
+        rankingMore: document.getElementById('rankingMore'),
+        loadMoreBtn: document.getElementById('loadMoreBtn'),
+        aroundSection: document.getElementById('aroundSection'),
+        aroundList: document.getElementById('aroundList'),
+        participantCount: document.getElementById('participantCount')
     };
 }
 
@@ -156,6 +163,231 @@ async function handleRecalculate() {
     }
 }
 
+// ランキング一覧（上位N件・自分の周辺・さらに表示）
+function initRankingList(elements) {
+    const list = elements.rankingList;
+    if (!list) return;
+
+    const state = {
+        list: list,
+        aroundList: elements.aroundList,
+        aroundSection: elements.aroundSection,
+        moreSection: elements.rankingMore,
+        participantCount: elements.participantCount,
+        currentUserId: Number(list.dataset.currentUserId),
+        top: Number(list.dataset.top),
+        nextCursor: null,
+        version: 0,
+        reloadTimer: null
+    };
+
+    if (elements.loadMoreBtn) {
+        elements.loadMoreBtn.addEventListener('click', () => loadMoreRanking(state, elements.loadMoreBtn));
+    }
+
+    loadRankingWindow(state).then(() => connectRankingStream(state));
+}
+
+// ランキングAPIのURLを作成
+function rankingApiUrl(state, url, params) {
+    const query = new URLSearchParams({
+        year: state.list.dataset.year,
+        month: state.list.dataset.month,
+        ...params
+    });
+    return `${url}?${query.toString()}`;
+}
+
+// 上位N件と自分の前後K件を読み込む
+async function loadRankingWindow(state) {
+    try {
+        const response = await fetch(rankingApiUrl(state, state.list.dataset.windowUrl, {
+            top: state.top,
+            around: state.list.dataset.around
+        }));
+        const data = await response.json();
+        if (!data.success) {
+            handleApiError(data);
+            return;
+        }
+
+        state.version = data.version;
+        state.nextCursor = data.top_next_cursor;
+        renderRankingRows(state.list, data.top, state.currentUserId);
+
+        const hasAround = data.around.length > 0;
+        renderRankingRows(state.aroundList, data.around, state.currentUserId);
+        state.aroundSection.classList.toggle('d-none', !hasAround);
+
+        updateRankingFooter(state, data.participant_count);
+    } catch (error) {
+        console.error('ランキング取得エラー:', error);
+        showError('ネットワークエラーが発生しました');
+    }
+}
+
+// 続きをキーセットページングで読み込む
+async function loadMoreRanking(state, button) {
+    if (!state.nextCursor) return;
+    setButtonLoading(button, true);
+
+    try {
+        const response = await fetch(rankingApiUrl(state, state.list.dataset.entriesUrl, {
+            cursor: state.nextCursor
+        }));
+        const data = await response.json();
+        if (!data.success) {
+            handleApiError(data);
+            return;
+        }
+
+        data.entries.forEach(row => {
+            state.list.appendChild(createRankingItem(row, state.currentUserId));
+            // 自分まで到達したら周辺表示は不要
+            if (row.user_id === state.currentUserId) {
+                state.aroundSection.classList.add('d-none');
+            }
+        });
+        state.top += data.entries.length;
+        state.nextCursor = data.next_cursor;
+        updateRankingFooter(state);
+    } catch (error) {
+        console.error('ランキング取得エラー:', error);
+        showError('ネットワークエラーが発生しました');
+    } finally {
+        setButtonLoading(button, false);
+    }
+}
+
+function updateRankingFooter(state, participantCount) {
+    state.moreSection.classList.toggle('d-none', !state.nextCursor);
+    state.list.classList.toggle('scrollable', state.list.children.length > 5);
+
+    if (state.participantCount && participantCount !== undefined) {
+        state.participantCount.textContent = `${participantCount}人参加`;
+        state.participantCount.classList.toggle('d-none', participantCount === 0);
+    }
+}
+
+// 一覧の行をまとめて描画
+function renderRankingRows(container, rows, currentUserId) {
+    container.replaceChildren(...rows.map(row => createRankingItem(row, currentUserId)));
+}
+
+// ランキングのリアルタイム更新（Server-Sent Events）
+function connectRankingStream(state) {
+    const streamUrl = state.list.dataset.streamUrl;
+    if (!streamUrl || !window.EventSource) return;
+
+    // EventSource は再接続時に Last-Event-ID を自動で送信する
+    const source = new EventSource(streamUrl);
+
+    // 差分を再現できない場合は表示範囲を読み直す
+    source.addEventListener('snapshot', event => {
+        const data = JSON.parse(event.data);
+        if (data.version > state.version) {
+            scheduleRankingReload(state);
+        }
+    });
+
+    source.addEventListener('ranking', event => {
+        const data = JSON.parse(event.data);
+        if (data.version <= state.version) return;
+        state.version = data.version;
+
+        let needsReload = data.removed.some(userId => findRankingItems(userId).length > 0);
+        data.changes.forEach(row => {
+            const items = findRankingItems(row.user_id);
+            if (items.length > 0) {
+                items.forEach(item => applyRankingRow(item, row));
+            } else if (isWithinDisplayedRange(state.list, row.rank) || isWithinDisplayedRange(state.aroundList, row.rank)) {
+                // 表示範囲に新しく入ってきた参加者がいる
+                needsReload = true;
+            }
+        });
+        if (data.changes.some(row => row.user_id === state.currentUserId)) {
+            // 自分の順位が変わると周辺の顔ぶれも変わる
+            needsReload = true;
+        }
+
+        sortRankingList(state.list);
+        sortRankingList(state.aroundList);
+        updateRankingFooter(state, data.participant_count);
+        if (needsReload) {
+            scheduleRankingReload(state);
+        }
+    });
+
+    window.addEventListener('beforeunload', () => source.close());
+}
+
+// 連続したイベントでの読み直しをまとめる
+function scheduleRankingReload(state) {
+    clearTimeout(state.reloadTimer);
+    state.reloadTimer = setTimeout(() => loadRankingWindow(state), 1000);
+}
+
+function findRankingItems(userId) {
+    return document.querySelectorAll(`.ranking-item[data-user-id="${userId}"]`);
+}
+
+function isWithinDisplayedRange(container, rank) {
+    const items = container.querySelectorAll('.ranking-item');
+    if (items.length === 0) return false;
+    return rank >= Number(items[0].dataset.rank) && rank <= Number(items[items.length - 1].dataset.rank);
+}
+
+// 1行分の順位・労働時間を反映
+function applyRankingRow(item, row) {
+    item.dataset.rank = row.rank;
+    item.classList.remove('rank-1', 'rank-2', 'rank-3');
+    if (row.rank <= 3) item.classList.add(`rank-${row.rank}`);
+    item.querySelector('.rank-number').innerHTML = renderRankNumber(row.rank);
+    item.querySelector('.work-time').textContent = row.total_hours_display;
+    item.querySelector('.work-minutes').textContent = `(${row.total_minutes}分)`;
+}
+
+// 順位順に並べ替え
+function sortRankingList(container) {
+    Array.from(container.querySelectorAll('.ranking-item'))
+        .sort((a, b) => (Number(a.dataset.rank) - Number(b.dataset.rank)) || (Number(a.dataset.userId) - Number(b.dataset.userId)))
+        .forEach(item => container.appendChild(item));
+}
+
+// 順位表示（上位3位はメダル）
+function renderRankNumber(rank) {
+    const medals = { 1: ['gold', '1st'], 2: ['silver', '2nd'], 3: ['bronze', '3rd'] };
+    if (medals[rank]) {
+        const [color, label] = medals[rank];
+        return `<div class="rank-medal ${color}"><i class="bi bi-trophy-fill"></i><span class="rank-position">${label}</span></div>`;
+    }
+    return `<span class="rank-text">${rank}</span>`;
+}
+
+// 順位行を作成
+function createRankingItem(row, currentUserId) {
+    const item = document.createElement('div');
+    item.className = 'ranking-item';
+    if (row.user_id === currentUserId) item.classList.add('current-user');
+    item.dataset.userId = row.user_id;
+    item.innerHTML = `
+        <div class="rank-info">
+            <div class="rank-number"></div>
+            <div class="user-info"><div class="user-name"></div></div>
+        </div>
+        <div class="work-time-display">
+            <span class="work-time"></span>
+            <span class="work-minutes text-muted"></span>
+        </div>
+    `;
+    item.querySelector('.user-name').textContent = row.user_name;
+    if (row.user_id === currentUserId) {
+        item.querySelector('.user-name').insertAdjacentHTML('beforeend', '<span class="badge bg-primary ms-2">あなた</span>');
+    }
+    applyRankingRow(item, row);
+    return item;
+}
+
 // ボタンローディング状態制御
 function setButtonLoading(button, isLoading) {
     if (!button) return;
@@ -39,19 +39,104 @@ document.addEventListener('DOMContentLoaded', function() {
         setInterval(refreshActivityLog, 5 * 60 * 1000);
     }
     
+    const ACTIVITY_LOG_SIZE = 10;
+    const ACTIVITY_ICONS = {
+        skill_create: 'bi-plus-circle text-success',
+        skill_edit: 'bi-pencil text-primary',
+        skill_grant: 'bi-award text-success',
+        skill_revoke: 'bi-x-circle text-warning',
+        grade_create: 'bi-plus-square text-success',
+        grade_edit: 'bi-gear text-primary',
+        grade_change: 'bi-arrow-up text-info',
+        application_approve: 'bi-check-circle text-success',
+        application_reject: 'bi-x-circle text-danger'
+    };
+    
     function refreshActivityLog() {
-        // 実際の実装では、APIから最新の活動ログを取得してDOMを更新
-        // 現在はコメントアウト - 必要に応じて実装
-        /*
-        fetch('/salary/admin/api/recent-activities/')
-            .then(response => response.json())
+        // 前回取得した最新のログIDより新しいログのみを取得（変化がなければ304）
+        const cursor = activityLog.dataset.cursor;
+        const url = activityLog.dataset.url + (cursor ? '?since_id=' + encodeURIComponent(cursor) : '');
+        
+        fetch(url, { headers: { 'Accept': 'application/json' } })
+            .then(response => response.status === 304 ? null : response.json())
             .then(data => {
-                if (data.status === 'success' && data.activities) {
-                    updateActivityLog(data.activities);
+                if (data && data.status === 'success' && data.activities.length > 0) {
+                    updateActivityLog(data.activities, data.has_more);
+                    activityLog.dataset.cursor = data.cursor;
                 }
             })
             .catch(error => console.log('Activity log update failed:', error));
-        */
+    }
+    
+    function updateActivityLog(activities, replace) {
+        // 初めての活動が届いたら「まだ活動履歴がありません」の表示を消す
+        const emptyMessage = document.querySelector('.activity-log-empty');
+        if (emptyMessage) {
+            emptyMessage.remove();
+        }
+        
+        // 取得しきれない件数の新着がある場合は一覧を置き換える
+        if (replace) {
+            activityLog.innerHTML = '';
+        }
+        
+        // 新しい順に届くため、古いものから先頭に挿入する
+        activities.slice().reverse().forEach(activity => {
+            activityLog.insertBefore(buildActivityItem(activity), activityLog.firstChild);
+        });
+        
+        while (activityLog.children.length > ACTIVITY_LOG_SIZE) {
+            activityLog.removeChild(activityLog.lastChild);
+        }
+    }
+    
+    function buildActivityItem(activity) {
+        const item = document.createElement('div');
+        item.className = 'activity-item';
+        item.dataset.id = activity.id;
+        
+        const icon = document.createElement('div');
+        icon.className = 'activity-icon';
+        const iconElement = document.createElement('i');
+        iconElement.className = 'bi ' + (ACTIVITY_ICONS[activity.action] || 'bi-info-circle text-secondary');
+        icon.appendChild(iconElement);
+        
+        const content = document.createElement('div');
+        content.className = 'activity-content';
+        const description = document.createElement('div');
+        description.className = 'activity-description';
+        description.textContent = activity.description;
+        
+        const meta = document.createElement('div');
+        meta.className = 'activity-meta';
+        const admin = document.createElement('span');
+        admin.className = 'activity-admin';
+        admin.textContent = activity.admin_user;
+        const time = document.createElement('span');
+        time.className = 'activity-time';
+        const timestamp = new Date(activity.timestamp);
+        time.textContent = (timestamp.getMonth() + 1) + '/' + timestamp.getDate() + ' ' +
+            String(timestamp.getHours()).padStart(2, '0') + ':' + String(timestamp.getMinutes()).padStart(2, '0');
+        meta.appendChild(admin);
+        meta.appendChild(time);
+        
+        if (activity.target_user) {
+            const target = document.createElement('span');
+            target.className = 'activity-target';
+            target.appendChild(document.createTextNode('→ '));
+            const link = document.createElement('a');
+            link.href = activity.target_user.url;
+            link.className = 'text-decoration-none';
+            link.textContent = activity.target_user.name;
+            target.appendChild(link);
+            meta.appendChild(target);
+        }
+        
+        content.appendChild(description);
+        content.appendChild(meta);
+        item.appendChild(icon);
+        item.appendChild(content);
+        return item;
     }
     
     // === 承認待ち通知の点滅効果 ===
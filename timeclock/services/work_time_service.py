@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta, date
-from typing import Dict, Optional, Any
+from typing import Any, Dict, Iterable, Optional
 from django.conf import settings
 from django.utils import timezone
 from zoneinfo import ZoneInfo
@@ -94,6 +94,67 @@ class WorkTimeService:
             'error': None
         }
     
+    def get_daily_work_minutes(self, start_date: date, end_date: date) -> Dict[date, int]:
+        """
+        期間内の日別労働時間（分）を1回のクエリで計算する
+
+        get_daily_summary を日数分呼び出す場合と同じ基準（退勤打刻がない日は0分）で計算する
+
+        Args:
+            start_date: 開始日
+            end_date: 終了日（この日を含む）
+
+        Returns:
+            {date: 分} 形式の辞書（労働時間がある日のみ）
+        """
+        return self.get_users_daily_work_minutes(
+            start_date, end_date, user_ids=[self.user.pk]
+        ).get(self.user.pk, {})
+
+    @classmethod
+    def get_users_daily_work_minutes(
+        cls, start_date: date, end_date: date, user_ids: Optional[Iterable[int]] = None
+    ) -> Dict[int, Dict[date, int]]:
+        """
+        複数ユーザーの期間内の日別労働時間（分）を1回のクエリで計算する
+
+        Args:
+            start_date: 開始日
+            end_date: 終了日（この日を含む）
+            user_ids: 対象ユーザーIDのリスト（Noneの場合は全ユーザー）
+
+        Returns:
+            {ユーザーID: {date: 分}} 形式の辞書（労働時間がある日のみ）
+        """
+        service = cls(None)
+        jst = service.jst
+        range_start = datetime.combine(start_date, datetime.min.time()).replace(tzinfo=jst)
+        range_end = datetime.combine(end_date + timedelta(days=1), datetime.min.time()).replace(tzinfo=jst)
+
+        records = TimeRecord.objects.filter(
+            timestamp__gte=range_start,
+            timestamp__lt=range_end
+        ).order_by('user_id', 'timestamp')
+        if user_ids is not None:
+            records = records.filter(user_id__in=list(user_ids))
+
+        # 打刻をユーザー・JSTの日付ごとにまとめる
+        records_by_day = {}
+        for record in records.only('user_id', 'clock_type', 'timestamp'):
+            key = (record.user_id, record.timestamp.astimezone(jst).date())
+            records_by_day.setdefault(key, []).append(record)
+
+        daily_minutes = {}
+        for (user_id, target_date), day_records in records_by_day.items():
+            result = service._calculate_work_and_break_time(day_records)
+            if not result['has_clock_out']:
+                continue
+            # get_daily_summary の work_hours（小数点2桁）が0の日は労働なしとみなす
+            if round(result['work_time'].total_seconds() / 3600, 2) > 0:
+                daily_minutes.setdefault(user_id, {})[target_date] = int(result['work_time'].total_seconds() / 60)
+
+        return daily_minutes
+
     def get_monthly_summary(self, year: Optional[int] = None, month: Optional[int] = None) -> Dict[str, Any]:
         """
         月次の労働時間と給与を計算する
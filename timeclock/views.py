@@ -6,6 +6,7 @@ from django.core.exceptions import ValidationError
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.conf import settings
+from django.utils.functional import SimpleLazyObject
 from zoneinfo import ZoneInfo
 import calendar
 from datetime import datetime, date, timedelta
@@ -15,7 +16,7 @@ from .services import WorkTimeService
 from .services.paid_leave_calculator import PaidLeaveCalculator
 from .services.paid_leave_balance_manager import PaidLeaveBalanceManager
 from leaderboard.models import LeaderboardEntry
-from leaderboard.services.leaderboard_service import LeaderboardService
+from salary.services.dashboard_cache import SECTION_CACHE_TIMEOUT, get_dashboard_cache_version
 from salary.services.salary_skill_service import SalarySkillService
 
 @login_required
@@ -118,19 +119,8 @@ def clock_action(request):
             # シグナルを再有効化
             handle_time_record_save._disabled = False
             handle_time_record_delete._disabled = False
-
-        if action_type == 'clock_out':
-            try:
-                year = timestamp.year
-                month = timestamp.month
-                entry = LeaderboardEntry.objects.get(user=user, year=year, month=month)
-                service = LeaderboardService(user)
-                service.update_user_stats(year, month)
-                service.update_leaderboard(year, month)
-            except LeaderboardEntry.DoesNotExist:
-                pass
-            except Exception:
-                pass
+        
+        # 退勤時のランキング更新はleaderboard.signalsで差分更新される
             
     except ValidationError as e:
         messages.error(request, str(e.message if hasattr(e, 'message') else e.messages[0]))
@@ -231,8 +221,9 @@ def dashboard(request):
         paid_leave_status['hire_date_missing'] = True
     
     # 給与・スキル情報を取得
+    # 描画結果はユーザーごとにキャッシュし、キャッシュがない場合のみサービスを実行する
     salary_skill_service = SalarySkillService(request.user)
-    salary_skill_info = salary_skill_service.get_dashboard_info()
+    salary_skill_info = SimpleLazyObject(salary_skill_service.get_dashboard_info)
     
     # 現在月かどうかを判定
     is_current_month = (year == now.year and month == now.month)
@@ -248,6 +239,8 @@ def dashboard(request):
         'weekdays': ['月', '火', '水', '木', '金', '土', '日'],
         'paid_leave_status': paid_leave_status,
         'salary_skill_info': salary_skill_info,
+        'salary_skill_cache_version': get_dashboard_cache_version(request.user),
+        'salary_skill_cache_timeout': SECTION_CACHE_TIMEOUT,
         'is_current_month': is_current_month
     }
     